@@ -0,0 +1,14 @@
+"""Standalone performance benchmarks.
+
+Each module is runnable on its own and prints a short report::
+
+    python -m benchmarks.bench_profile_sync
+
+Benchmarks never touch Telegram; they only need the packages from
+``requirements.txt``.
+"""
+
+import os
+
+# Settings require a token at import time; benchmarks never talk to Telegram.
+os.environ.setdefault("BOT_TOKEN", "0:fake_token_for_benchmarks")
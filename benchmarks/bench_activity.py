@@ -0,0 +1,143 @@
+"""DB writes of per-update ``last_seen_at`` vs. the coalescing ActivityTracker.
+
+Replays ``--seconds`` of traffic at each of ``--rates`` updates per second from
+``--users`` users (uniformly chosen) in simulated time, flushing the tracker
+every ``--interval`` simulated seconds against a throw-away SQLite file.
+
+For the per-update path the cost of one ``UPDATE`` + commit is measured on
+``--sample`` updates and extrapolated; it writes one row per update.
+
+Run::
+
+    python -m benchmarks.bench_activity --rates 1000 10000 --users 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from bot.database.activity import ActivityTracker
+from bot.database.models import Base, Session, User
+from bot.database.repository import SessionRepository
+
+
+async def _make_engine(path: Path, users: int) -> tuple[AsyncEngine, list[int]]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [{"telegram_id": i, "first_name": f"User{i}"} for i in range(1, users + 1)],
+        )
+        await conn.execute(insert(Session), [{"user_id": i} for i in range(1, users + 1)])
+
+    statements = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(
+        _conn: Any,
+        _cursor: Any,
+        statement: str,
+        _params: Any,
+        _context: Any,
+        _executemany: bool,
+    ) -> None:
+        if statement.startswith("UPDATE"):
+            statements[0] += 1
+
+    return engine, statements
+
+
+async def bench_per_update(path: Path, users: int, sample: int) -> float:
+    """Seconds of DB time per update when every update writes its own row."""
+    engine, _ = await _make_engine(path, users)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for _ in range(sample):
+        async with factory() as session:
+            await SessionRepository(session).bulk_touch(
+                {rng.randint(1, users): datetime.now(timezone.utc)}
+            )
+            await session.commit()
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return elapsed / sample
+
+
+async def bench_tracker(
+    path: Path, rate: int, seconds: int, users: int, interval: float
+) -> tuple[int, int, float]:
+    """Returns UPDATE executions (an executemany counts once), rows written and DB seconds."""
+    engine, statements = await _make_engine(path, users)
+    tracker = ActivityTracker(async_sessionmaker(engine, expire_on_commit=False), interval)
+    rng = random.Random(7)
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    next_flush = now + interval
+    db_seconds = 0.0
+    for i in range(rate * seconds):
+        at = now + i / rate
+        if at >= next_flush:
+            start = time.perf_counter()
+            await tracker.flush()
+            db_seconds += time.perf_counter() - start
+            next_flush += interval
+        tracker.touch(rng.randint(1, users), at=at)
+    start = time.perf_counter()
+    await tracker.flush()
+    db_seconds += time.perf_counter() - start
+    await engine.dispose()
+    return statements[0], tracker.flushed_rows, db_seconds
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rates", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_update = await bench_per_update(Path(tmp) / "naive.db", args.users, args.sample)
+        print(
+            f"{args.seconds} s of traffic, {args.users} users, "
+            f"flush every {args.interval:g} s\n"
+        )
+        print(
+            f"{'upd/s':>7}  {'path':<10}{'executes':>10}{'rows':>10}"
+            f"{'DB s':>9}{'DB load':>9}"
+        )
+        for rate in args.rates:
+            updates = rate * args.seconds
+            naive_db = per_update * updates
+            stmts, rows, db_seconds = await bench_tracker(
+                Path(tmp) / f"tracker-{rate}.db", rate, args.seconds, args.users, args.interval
+            )
+            for name, s, r, db in (
+                ("per-update", updates, updates, naive_db),
+                ("tracker", stmts, rows, db_seconds),
+            ):
+                print(
+                    f"{rate:>7}  {name:<10}{s:>10}{r:>10}{db:>9.2f}"
+                    f"{db / args.seconds:>8.0%}"
+                )
+            print(
+                f"{'':>7}  saved {1 - stmts / updates:.2%} of statements, "
+                f"{1 - rows / updates:.1%} of row writes\n"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
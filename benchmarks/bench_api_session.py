@@ -0,0 +1,104 @@
+"""Bot API client throughput at different connection-pool sizes.
+
+Runs a fake Bot API server on localhost that answers every method after
+``--latency-ms`` (a stand-in for the round trip to Telegram). Then it sends
+``--requests`` ``sendChatAction`` calls with ``--concurrency`` in flight, once
+through aiogram's default session and once per ``--pools`` size through
+:class:`~bot.utils.http.TunedAiohttpSession`. Reports requests per second,
+p50/p99 latency and the number of TCP connections the server accepted.
+
+Client and server share one event loop and one core, so past a certain pool
+size the numbers measure Python overhead rather than the network.
+
+Run::
+
+    python -m benchmarks.bench_api_session --requests 5000 --pools 10 50 100 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import SendChatAction
+from aiohttp import web
+
+from benchmarks._stats import summarize
+from bot.utils.http import TunedAiohttpSession
+
+
+class _FakeBotAPI:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.peers: set[tuple[str, int]] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.transport is not None:
+            self.peers.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": True})
+
+    async def start(self) -> tuple[web.AppRunner, str]:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return runner, f"http://127.0.0.1:{port}"
+
+
+async def _run(
+    name: str, session: BaseSession, api: _FakeBotAPI, args: argparse.Namespace
+) -> None:
+    bot = Bot("42:BENCH", session=session)
+    method = SendChatAction(chat_id=1, action="typing")
+    latencies: list[float] = []
+    remaining = iter(range(args.requests))
+    api.peers.clear()
+
+    async def client() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await bot(method)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+
+    s = summarize(latencies)
+    print(
+        f"{name:<14}{args.requests / elapsed:>10.0f}{s['p50']:>9.1f}{s['p99']:>9.1f}"
+        f"{len(api.peers):>8}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--pools", type=int, nargs="+", default=[10, 50, 100, 300])
+    args = parser.parse_args()
+
+    fake = _FakeBotAPI(args.latency_ms / 1000)
+    runner, base_url = await fake.start()
+    server = TelegramAPIServer.from_base(base_url)
+
+    print(f"{'session':<14}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'conns':>8}")
+    await _run("default", AiohttpSession(api=server), fake, args)
+    for pool in args.pools:
+        await _run(f"pool={pool}", TunedAiohttpSession(limit=pool, api=server), fake, args)
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Callback dispatch cost: aiogram filters vs. :class:`CallbackRouter`.
+
+Registers ``--routes`` handlers (``"s{i}:open"``, plus a ``"s{i}:page:*"``
+prefix route for every tenth screen) once as a plain router with
+``F.data == …`` / ``F.data.startswith(…)`` filters and once on a
+:class:`~bot.utils.callback_router.CallbackRouter`. Then it feeds the same
+callback updates, spread evenly over the routes, through
+``Dispatcher.feed_update`` and reports microseconds per update.
+
+Run::
+
+    python -m benchmarks.bench_callback_router --routes 10 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from bot.utils.callback_router import CallbackRouter
+
+
+async def _noop(callback: CallbackQuery) -> None:
+    return None
+
+
+def _patterns(routes: int) -> list[str]:
+    patterns = [f"s{i}:open" for i in range(routes)]
+    patterns[::10] = [f"s{i}:page:*" for i in range(0, routes, 10)]
+    return patterns
+
+
+def _filter_router(patterns: list[str]) -> Router:
+    router = Router()
+    for pattern in patterns:
+        if pattern.endswith(":*"):
+            router.callback_query.register(_noop, F.data.startswith(pattern[:-1]))
+        else:
+            router.callback_query.register(_noop, F.data == pattern)
+    return router
+
+
+def _indexed_router(patterns: list[str]) -> Router:
+    router = CallbackRouter()
+    for pattern in patterns:
+        router.add_route(pattern, _noop)
+    return router
+
+
+def _updates(patterns: list[str], count: int) -> list[Update]:
+    user = User(id=1, is_bot=False, first_name="Bench")
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"))
+    rng = random.Random(0)
+    updates = []
+    for i in range(count):
+        pattern = rng.choice(patterns)
+        data = pattern.replace("*", str(i % 7)) if pattern.endswith("*") else pattern
+        query = CallbackQuery(
+            id=str(i), from_user=user, chat_instance="1", message=message, data=data
+        )
+        updates.append(Update(update_id=i, callback_query=query))
+    return updates
+
+
+async def _measure(router: Router, updates: list[Update]) -> float:
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot("42:BENCH")
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / len(updates) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'routes':>7}{'filters µs':>12}{'index µs':>10}{'speedup':>9}")
+    for routes in args.routes:
+        patterns = _patterns(routes)
+        updates = _updates(patterns, args.updates)
+        linear = await _measure(_filter_router(patterns), updates)
+        indexed = await _measure(_indexed_router(patterns), updates)
+        print(f"{routes:>7}{linear:>12.1f}{indexed:>10.1f}{linear / indexed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""Throughput vs. ordering: unordered tasks, one serial lane, per-chat lanes.
+
+Feeds ``--chats`` × ``--per-chat`` message updates through a real
+dispatcher, one task per update like polling does. The handler sleeps a
+random 1–``--max-ms`` ms, so later messages often finish first. Reported
+per mode:
+
+* updates per second,
+* out-of-order completions (a message handled after a later one from the
+  same chat),
+* peak handlers running at once.
+
+Run::
+
+    python -m benchmarks.bench_chat_lanes --chats 50 --per-chat 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+
+from bot.middlewares.lanes import ChatLaneMiddleware
+
+
+def _updates(chats: int, per_chat: int) -> list[Update]:
+    updates = []
+    for seq in range(per_chat):
+        for chat_id in range(1, chats + 1):
+            update_id = len(updates) + 1
+            updates.append(
+                Update.model_validate(
+                    {
+                        "update_id": update_id,
+                        "message": {
+                            "message_id": seq,
+                            "date": 0,
+                            "chat": {"id": chat_id, "type": "private"},
+                            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+                            "text": str(seq),
+                        },
+                    }
+                )
+            )
+    return updates
+
+
+async def _run(
+    name: str, lanes: ChatLaneMiddleware | None, updates: list[Update], max_ms: float
+) -> None:
+    rng = random.Random(7)
+    delays = [rng.uniform(1, max_ms) / 1000 for _ in updates]
+    last_seen: dict[int, int] = {}
+    out_of_order = running = peak = 0
+
+    dp = Dispatcher()
+    if lanes is not None:
+        dp.update.outer_middleware(lanes)
+
+    @dp.message()
+    async def handle(message: Message, event_update: Update) -> None:
+        nonlocal out_of_order, running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delays[event_update.update_id - 1])
+        running -= 1
+        if last_seen.get(message.chat.id, -1) > message.message_id:
+            out_of_order += 1
+        last_seen[message.chat.id] = max(last_seen.get(message.chat.id, -1), message.message_id)
+
+    bot = Bot("42:BENCH")
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.create_task(dp.feed_update(bot, u)) for u in updates))
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+
+    print(f"{name:<16}{len(updates) / elapsed:>12.0f}{out_of_order:>14}{peak:>8}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--per-chat", type=int, default=8)
+    parser.add_argument("--max-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    updates = _updates(args.chats, args.per_chat)
+    print(f"{'mode':<16}{'updates/s':>12}{'out of order':>14}{'peak':>8}")
+    await _run("unordered", None, updates, args.max_ms)
+    await _run("serial", ChatLaneMiddleware(concurrency=1), updates, args.max_ms)
+    await _run(
+        f"lanes x{args.concurrency}",
+        ChatLaneMiddleware(concurrency=args.concurrency),
+        updates,
+        args.max_ms,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
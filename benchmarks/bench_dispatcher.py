@@ -0,0 +1,431 @@
+"""End-to-end dispatcher benchmark with regression check.
+
+Builds the real dispatcher with :func:`bot.main.build_dispatcher` (all
+middlewares, FSM storage, handlers). It uses a bot from
+:func:`bot.main.create_bot`, whose transport is a stub that answers every Bot
+API call locally, optionally after ``--api-latency-ms``. Synthetic raw
+updates are fed through ``dp.feed_raw_update`` with ``--concurrency`` updates
+in flight. There is one scenario per traffic shape:
+
+* ``start`` — a ``/start`` storm from distinct users (registers them);
+* ``callback`` — taps on the main-menu buttons (profile, help, settings, back);
+* ``text`` — free-text messages;
+* ``mixed`` — 20 % ``/start``, 40 % taps, 40 % text.
+
+For each scenario it reports updates per second and p50/p95/p99 latency,
+overall and per handler, plus updates that failed with an exception. Updates
+answered by no handler (e.g. throttled) are counted as ``(unhandled)``. The
+results are written as JSON to ``--output``.
+
+With ``--baseline`` the run is compared with a saved result. The script
+exits with status 1 if a scenario's throughput drops, or its p95 latency
+(or the p95 of a handler with at least ``--min-samples`` samples) grows,
+by more than ``--tolerance``, or if more updates fail than before.
+
+The database is a throw-away SQLite file unless ``BENCH_DATABASE_URL`` is
+set. **A database given there is wiped**: the run drops and recreates all of
+the bot's tables. The script refuses to start if that database already has
+tables, unless ``--reset-db`` is passed to confirm it may be erased. Other
+settings (``FSM_STORAGE``, ``PROFILE_SYNC_ENABLED``, ``THROTTLE_RATE`` …) come
+from the environment as usual.
+
+Run::
+
+    python -m benchmarks.bench_dispatcher --save-baseline benchmarks/results/baseline.json
+    # … change something …
+    python -m benchmarks.bench_dispatcher --baseline benchmarks/results/baseline.json
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="bench-dispatcher-")
+# Settings are read at import time, so the environment must be ready first.
+_EXTERNAL_DB = "BENCH_DATABASE_URL" in os.environ
+os.environ["DATABASE_URL"] = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{_TMP}/bench.db"
+)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import random  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from collections import defaultdict  # noqa: E402
+from collections.abc import AsyncGenerator, Callable  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Any  # noqa: E402
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import TelegramMethod  # noqa: E402
+from aiogram.methods.base import TelegramType  # noqa: E402
+from aiogram.types import Chat, Message, TelegramObject  # noqa: E402
+from sqlalchemy import inspect  # noqa: E402
+
+from benchmarks._stats import summarize  # noqa: E402
+from bot.config import settings  # noqa: E402
+from bot.database import create_tables, drop_tables, engine  # noqa: E402
+from bot.main import build_dispatcher, create_bot, on_shutdown, on_startup  # noqa: E402
+from bot.utils.logger import configure_logging  # noqa: E402
+
+SCENARIOS = ("start", "callback", "text", "mixed")
+UNHANDLED = "(unhandled)"
+_TAPS = ("menu:profile", "menu:help", "menu:settings", "menu:main")
+
+
+class StubSession(BaseSession):
+    """Bot API transport that answers locally: sent/edited messages echo back, the rest ``True``."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.requests = 0
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.__api_method__ in ("sendMessage", "editMessageText"):
+            chat_id = getattr(method, "chat_id", None) or 0
+            message = Message(
+                message_id=self.requests,
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=int(chat_id), type="private"),
+                text=getattr(method, "text", None),
+            )
+            return message.as_(bot)  # type: ignore[return-value]
+        return True  # type: ignore[return-value]
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+# ── Synthetic updates ────────────────────────────────────────────────────────
+
+def _user(user_id: int) -> dict[str, Any]:
+    return {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": f"User{user_id}",
+        "username": f"user{user_id}",
+        "language_code": "ru",
+    }
+
+
+def _message(update_id: int, user_id: int, text: str) -> dict[str, Any]:
+    message: dict[str, Any] = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+    return {"update_id": update_id, "message": message}
+
+
+def _callback(update_id: int, user_id: int, data: str) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+                "text": "Главное меню:",
+            },
+        },
+    }
+
+
+def generate(scenario: str, count: int, users: int, first_id: int, seed: int) -> list[dict]:
+    """Return *count* raw updates of *scenario* from user ids ``1..users``."""
+    rng = random.Random(f"{scenario}:{seed}")
+    kinds: dict[str, Callable[[int, int], dict[str, Any]]] = {
+        "start": lambda uid, user: _message(uid, user, "/start"),
+        "callback": lambda uid, user: _callback(uid, user, rng.choice(_TAPS)),
+        "text": lambda uid, user: _message(uid, user, f"hello {rng.randint(1, 10**6)}"),
+    }
+    updates = []
+    for i in range(count):
+        update_id = first_id + i
+        if scenario == "start":
+            user = i % users + 1
+            kind = "start"
+        else:
+            user = rng.randint(1, users)
+            kind = scenario
+            if scenario == "mixed":
+                kind = rng.choices(("start", "callback", "text"), weights=(2, 4, 4))[0]
+        updates.append(kinds[kind](update_id, user))
+    return updates
+
+
+# ── Running ──────────────────────────────────────────────────────────────────
+
+class _HandlerProbe:
+    """Inner middleware remembering which handler took each update."""
+
+    def __init__(self) -> None:
+        self.handled: dict[int, str] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Any],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        update = data.get("event_update")
+        if update is not None:
+            self.handled[update.update_id] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+
+async def run_scenario(
+    dp: Dispatcher, bot: Bot, probe: _HandlerProbe, updates: list[dict], concurrency: int
+) -> dict[str, Any]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    total: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    errors: dict[str, int] = defaultdict(int)
+
+    async def feed(raw: dict[str, Any]) -> None:
+        async with sem:
+            started = time.perf_counter()
+            try:
+                await dp.feed_raw_update(bot, raw)
+            except Exception as exc:  # logged by the bot; counted, not fatal
+                errors[type(exc).__name__] += 1
+            elapsed = (time.perf_counter() - started) * 1000
+        total.append(elapsed)
+        latencies[probe.handled.pop(raw["update_id"], UNHANDLED)].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(feed(raw) for raw in updates))
+    seconds = time.perf_counter() - started
+    return {
+        "updates": len(updates),
+        "seconds": round(seconds, 4),
+        "updates_per_second": round(len(updates) / seconds, 1),
+        "errors": dict(errors),
+        "latency_ms": _rounded(summarize(total)),
+        "handlers": {
+            name: _rounded(summarize(samples)) for name, samples in sorted(latencies.items())
+        },
+    }
+
+
+def _rounded(summary: dict[str, float]) -> dict[str, float]:
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+def _metadata(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": engine.dialect.name,
+        "fsm_storage": settings.fsm_storage.value,
+        "scenarios": args.scenarios,
+        "updates": args.updates,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "api_latency_ms": args.api_latency_ms,
+    }
+
+
+# ── Reporting ────────────────────────────────────────────────────────────────
+
+def print_report(results: dict[str, Any]) -> None:
+    print(
+        f"{'scenario / handler':<24}{'count':>7}{'upd/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+    )
+    for name, scenario in results["scenarios"].items():
+        latency = scenario["latency_ms"]
+        print(
+            f"{name:<24}{scenario['updates']:>7}{scenario['updates_per_second']:>9.0f}"
+            f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+            f"{sum(scenario['errors'].values()):>8}"
+        )
+        for handler, stats in scenario["handlers"].items():
+            print(
+                f"  {handler:<22}{stats['count']:>7}{'':>9}"
+                f"{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}"
+            )
+
+
+_COMPARABLE = (
+    "database", "fsm_storage", "scenarios", "updates", "users", "concurrency", "api_latency_ms"
+)
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float,
+    min_samples: int,
+    min_delta_ms: float,
+) -> list[str]:
+    """Return human-readable regressions of *current* against *baseline*.
+
+    p95 growth below *min_delta_ms* is ignored, so sub-millisecond handlers
+    do not flap on scheduler noise.
+    """
+    regressions = []
+    for name, scenario in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if scenario["updates_per_second"] < before["updates_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {before['updates_per_second']:.0f} -> "
+                f"{scenario['updates_per_second']:.0f} updates/s"
+            )
+        failed, failed_before = sum(scenario["errors"].values()), sum(before["errors"].values())
+        if failed > failed_before:
+            regressions.append(f"{name}: {failed_before} -> {failed} failed updates")
+        checks = [(name, scenario["latency_ms"], before["latency_ms"])]
+        checks += [
+            (f"{name}/{handler}", stats, before["handlers"][handler])
+            for handler, stats in scenario["handlers"].items()
+            if handler in before["handlers"]
+            and min(stats["count"], before["handlers"][handler]["count"]) >= min_samples
+        ]
+        for label, now, then in checks:
+            if now["p95"] > then["p95"] * (1 + tolerance) + min_delta_ms:
+                regressions.append(f"{label}: p95 {then['p95']:.2f} -> {now['p95']:.2f} ms")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--updates", type=int, default=3000, help="Updates per scenario")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/dispatcher.json"))
+    parser.add_argument("--baseline", type=Path, help="Compare with this saved result")
+    parser.add_argument("--save-baseline", type=Path, help="Also write the result here")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10, help="Allowed regression (0.1 = 10%%)"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=1.0, help="Ignore p95 growth below this"
+    )
+    parser.add_argument(
+        "--min-samples", type=int, default=100, help="Samples a handler needs for a p95 check"
+    )
+    parser.add_argument(
+        "--reset-db",
+        action="store_true",
+        help="Allow dropping the tables of a non-empty BENCH_DATABASE_URL database",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    if _EXTERNAL_DB:
+        async with engine.connect() as conn:
+            existing = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+        if existing and not args.reset_db:
+            print(
+                f"refusing to run: {engine.url.render_as_string(hide_password=True)} already "
+                f"has tables ({', '.join(sorted(existing))}) and would be wiped; "
+                "pass --reset-db to allow it",
+                file=sys.stderr,
+            )
+            await engine.dispose()
+            return 2
+        await drop_tables()
+    await create_tables()
+    bot = create_bot(session=StubSession(args.api_latency_ms / 1000))
+    dp = build_dispatcher()
+    probe = _HandlerProbe()
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(probe)
+
+    await on_startup(bot, configure=False)
+    results: dict[str, Any] = {"meta": _metadata(args), "scenarios": {}}
+    try:
+        next_id = 1
+        for scenario in args.scenarios:
+            updates = generate(scenario, args.updates, args.users, next_id, args.seed)
+            next_id += len(updates)
+            results["scenarios"][scenario] = await run_scenario(
+                dp, bot, probe, updates, args.concurrency
+            )
+    finally:
+        await on_shutdown(bot, configure=False)
+        await dp.storage.close()
+        await engine.dispose()
+
+    print_report(results)
+    for path in filter(None, (args.output, args.save_baseline)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    differing = [
+        key for key in _COMPARABLE if baseline["meta"].get(key) != results["meta"].get(key)
+    ]
+    if differing:
+        print(f"warning: baseline was run with different {', '.join(differing)}")
+    regressions = compare(
+        results, baseline, args.tolerance, args.min_samples, args.min_delta_ms
+    )
+    if not regressions:
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"\nregressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+if __name__ == "__main__":
+    try:
+        code = asyncio.run(main())
+    finally:
+        shutil.rmtree(_TMP, ignore_errors=True)
+    sys.exit(code)
@@ -0,0 +1,116 @@
+"""Redis round trips per update: aiogram's ``RedisStorage`` vs. ours.
+
+Simulates ``--updates`` updates from ``--users`` users. Every update does
+what aiogram's FSM middleware and a typical handler do: ``get_state``, then
+``get_data``; every ``--write-every``-th update also calls ``update_data``
+and ``set_state`` (a form step). Storages:
+
+* ``aiogram`` — :class:`aiogram.fsm.storage.redis.RedisStorage` (two string
+  keys, one command per call);
+* ``ours`` — :class:`~bot.storage.redis_storage.RedisStorage` (one hash,
+  ``HMGET`` prefetch, pipelined writes);
+* ``ours + near-cache`` — the same with keyspace-notification invalidation.
+
+Runs against fakeredis, and also against ``REDIS_URL`` when it is set.
+Reports round trips per update and mean µs per update.
+
+Run::
+
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.bench_fsm_redis
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage as AiogramRedisStorage
+
+from bot.storage.redis_storage import RedisStorage
+
+
+def _count_round_trips(client: Any) -> list[int]:
+    trips = [0]
+    execute_command, pipeline = client.execute_command, client.pipeline
+
+    async def counted_command(*args: Any, **kwargs: Any) -> Any:
+        trips[0] += 1
+        return await execute_command(*args, **kwargs)
+
+    def counted_pipeline(*args: Any, **kwargs: Any) -> Any:
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*a: Any, **kw: Any) -> Any:
+            trips[0] += 1
+            return await execute(*a, **kw)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    client.execute_command, client.pipeline = counted_command, counted_pipeline
+    return trips
+
+
+async def _run(name: str, storage: BaseStorage, client: Any, args: argparse.Namespace) -> None:
+    rng = random.Random(1)
+    keys = [StorageKey(bot_id=42, chat_id=uid, user_id=uid) for uid in range(1, args.users + 1)]
+    if isinstance(storage, RedisStorage) and storage._near_cache:
+        await storage.get_state(keys[0])  # start the invalidation listener
+        await asyncio.sleep(0.1)
+    trips = _count_round_trips(client)
+
+    started = time.perf_counter()
+    for i in range(args.updates):
+        key = rng.choice(keys)
+        await storage.get_state(key)
+        await storage.get_data(key)
+        if i % args.write_every == 0:
+            await storage.update_data(key, {f"field{i % 5}": "answer", "step": i})
+            await storage.set_state(key, f"Form:step{i % 5}")
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<30}{trips[0] / args.updates:>10.2f}{elapsed / args.updates * 1e6:>10.0f}")
+    await storage.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--write-every", type=int, default=3)
+    args = parser.parse_args()
+
+    factories: list[tuple[str, Callable[[], Any]]] = []
+    try:
+        import fakeredis
+
+        server = fakeredis.FakeServer()
+        factories.append(("fakeredis", lambda: fakeredis.FakeAsyncRedis(server=server)))
+    except ImportError:
+        print("fakeredis not installed — skipping in-process Redis")
+    if os.environ.get("REDIS_URL"):
+        from redis.asyncio import Redis
+
+        factories.append(("redis", lambda: Redis.from_url(os.environ["REDIS_URL"])))
+
+    print(f"{'storage':<30}{'RT/upd':>10}{'µs/upd':>10}")
+    for label, make_client in factories:
+        client = make_client()
+        await _run(f"{label} aiogram", AiogramRedisStorage(client), client, args)
+        client = make_client()
+        await _run(f"{label} ours", RedisStorage(client), client, args)
+        client = make_client()
+        await _run(
+            f"{label} ours + near-cache", RedisStorage(client, near_cache=True), client, args
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""FSM storage cost per update: memory, naive SQL and :class:`SQLStorage`.
+
+``--users`` users each walk a ``--steps``-step form, round-robin, against a
+throw-away SQLite file. Each update does what a typical FSM handler does:
+``get_state`` (the state filter), ``update_data`` and ``set_state``. Storages:
+
+* ``memory`` — aiogram's ``MemoryStorage`` (nothing persisted);
+* ``naive sql`` — every call reads or writes the ``sessions`` row in its own
+  transaction through :class:`~bot.database.repository.SessionRepository`;
+* ``sql storage`` — :class:`~bot.storage.sql_storage.SQLStorage` (cached,
+  lazily loaded, coalesced writes), flushed on close.
+
+Reports updates per second and SQL statements per update.
+
+Run::
+
+    python -m benchmarks.bench_fsm_storage --users 200 --steps 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import User as TelegramUser
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.database.models import Base
+from bot.database.repository import SessionRepository, UserRepository
+from bot.storage.sql_storage import SQLStorage
+
+
+class _NaiveSQLStorage(BaseStorage):
+    """Read-through, write-through storage: one transaction per call."""
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession]) -> None:
+        self._factory = factory
+
+    async def _write(self, user_id: int, **values: Any) -> None:
+        async with self._factory() as session:
+            repo = SessionRepository(session)
+            row = await repo.get_state_by_telegram_id(user_id)
+            if row is None:
+                await repo.create_with_state({user_id: values})
+            else:
+                await repo.update_state(row.id, values.get("state", row.state), values.get("data"))
+            await session.commit()
+
+    async def _read(self, user_id: int) -> Any:
+        async with self._factory() as session:
+            return await SessionRepository(session).get_state_by_telegram_id(user_id)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key.user_id, state=state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        row = await self._read(key.user_id)
+        return row.state if row else None
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._write(key.user_id, data=json.dumps(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        row = await self._read(key.user_id)
+        return json.loads(row.data) if row and row.data else {}
+
+    async def close(self) -> None:
+        pass
+
+
+async def _run(name: str, storage: BaseStorage, args: argparse.Namespace, stats: list[int]) -> None:
+    keys = [StorageKey(bot_id=42, chat_id=uid, user_id=uid) for uid in range(1, args.users + 1)]
+    stats[0] = 0
+    started = time.perf_counter()
+    for step in range(args.steps):
+        for key in keys:
+            await storage.get_state(key)
+            await storage.update_data(key, {f"field{step}": f"value {step}"})
+            await storage.set_state(key, f"Form:step{step + 1}")
+    await storage.close()
+    elapsed = time.perf_counter() - started
+    updates = args.users * args.steps
+    print(f"{name:<14}{updates / elapsed:>10.0f}{stats[0] / updates:>10.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as session:
+            repo = UserRepository(session)
+            for uid in range(1, args.users + 1):
+                await repo.create(TelegramUser(id=uid, is_bot=False, first_name=f"User{uid}"))
+            await session.commit()
+
+        stats = [0]
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(*_: object) -> None:
+            stats[0] += 1
+
+        print(f"{'storage':<14}{'upd/s':>10}{'SQL/upd':>10}")
+        await _run("memory", MemoryStorage(), args, stats)
+        await _run("naive sql", _NaiveSQLStorage(factory), args, stats)
+        await _run("sql storage", SQLStorage(factory, interval=0.2), args, stats)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
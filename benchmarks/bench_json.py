@@ -0,0 +1,159 @@
+"""CPU time per update spent in JSON, per codec backend.
+
+For each installed backend (see :mod:`bot.utils.json_codec`) measures the
+three JSON steps of a typical webhook update:
+
+* ``decode`` — the request body of a message update and of a callback
+  query update (with an inline keyboard), from bytes to ``dict``;
+* ``encode`` — the ``sendMessage`` form with a keyboard, as built by
+  aiogram's session (``reply_markup`` goes through ``json_dumps``);
+* ``log`` — rendering an ``update_processed`` line with ``JSONRenderer``.
+
+Times are CPU microseconds per update (``time.process_time``).
+
+Run::
+
+    python -m benchmarks.bench_json --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+import structlog
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.utils.json_codec import BACKENDS, JsonCodec, get_codec
+
+_USER = {
+    "id": 111222333,
+    "is_bot": False,
+    "first_name": "Иван",
+    "last_name": "Петров",
+    "username": "ivan_petrov",
+    "language_code": "ru",
+}
+_CHAT = {"id": 111222333, "first_name": "Иван", "username": "ivan_petrov", "type": "private"}
+_KEYBOARD = {
+    "inline_keyboard": [
+        [
+            {"text": "👤 Профиль", "callback_data": "menu:profile"},
+            {"text": "❓ Помощь", "callback_data": "menu:help"},
+        ],
+        [{"text": "⚙️ Настройки", "callback_data": "menu:settings"}],
+    ]
+}
+MESSAGE_UPDATE = json.dumps(
+    {
+        "update_id": 912345678,
+        "message": {
+            "message_id": 4021,
+            "from": _USER,
+            "chat": _CHAT,
+            "date": 1714550400,
+            "text": "/start ref_campaign_2024 — привет! Посмотрите https://example.com",
+            "entities": [
+                {"offset": 0, "length": 6, "type": "bot_command"},
+                {"offset": 42, "length": 19, "type": "url"},
+            ],
+        },
+    },
+    ensure_ascii=False,
+).encode()
+CALLBACK_UPDATE = json.dumps(
+    {
+        "update_id": 912345679,
+        "callback_query": {
+            "id": "4776223178311456153",
+            "from": _USER,
+            "message": {
+                "message_id": 4022,
+                "from": {"id": 42, "is_bot": True, "first_name": "Bot", "username": "demo_bot"},
+                "chat": _CHAT,
+                "date": 1714550401,
+                "text": "Главное меню:",
+                "reply_markup": _KEYBOARD,
+            },
+            "chat_instance": "-3290752873467198125",
+            "data": "menu:profile",
+        },
+    },
+    ensure_ascii=False,
+).encode()
+LOG_EVENT = {
+    "user_id": 111222333,
+    "username": "ivan_petrov",
+    "update_type": "callback_query",
+    "processing_ms": 12,
+    "event": "update_processed",
+    "logger": "bot.middlewares.logging",
+    "level": "info",
+    "timestamp": "2024-05-01T10:00:00.123456Z",
+}
+
+
+def _cpu_us(fn: Callable[[], Any], number: int) -> float:
+    start = time.process_time()
+    for _ in range(number):
+        fn()
+    return (time.process_time() - start) / number * 1e6
+
+
+def _measure(codec: JsonCodec, number: int) -> tuple[float, float, float]:
+    if codec.name == "json":
+        # What aiohttp's request.json() does: decode to str, then parse.
+        def decode() -> None:
+            codec.loads(MESSAGE_UPDATE.decode())
+            codec.loads(CALLBACK_UPDATE.decode())
+
+    else:
+
+        def decode() -> None:
+            codec.loads(MESSAGE_UPDATE)
+            codec.loads(CALLBACK_UPDATE)
+
+    bot = Bot("42:BENCH")
+    session = AiohttpSession(json_loads=codec.loads, json_dumps=codec.dumps)
+    method = SendMessage(
+        chat_id=111222333,
+        text="👤 <b>Профиль</b>\n\nИмя: Иван Петров",
+        reply_markup=InlineKeyboardMarkup.model_validate(_KEYBOARD),
+    )
+    renderer = structlog.processors.JSONRenderer(serializer=codec.dumps)
+
+    return (
+        _cpu_us(decode, number) / 2,
+        _cpu_us(lambda: session.build_form_data(bot, method), number),
+        _cpu_us(lambda: renderer(None, "info", dict(LOG_EVENT)), number),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'decode':>9}{'encode':>9}{'log':>9}{'total':>9}{'saved':>9}")
+    baseline = None
+    for backend in reversed(BACKENDS):
+        codec = get_codec(backend)
+        if codec.name != backend:
+            print(f"{backend:<10}  not installed")
+            continue
+        steps = _measure(codec, args.number)
+        total = sum(steps)
+        baseline = baseline if baseline is not None else total
+        cells = "".join(f"{value:>9.2f}" for value in (*steps, total, baseline - total))
+        print(f"{backend:<10}{cells}")
+    print("µs of CPU per update")
+
+
+if __name__ == "__main__":
+    main()
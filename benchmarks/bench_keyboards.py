@@ -0,0 +1,104 @@
+"""Keyboard construction and serialization: per-call builders vs. the registry.
+
+Compares the original ``InlineKeyboardBuilder`` factories (reproduced below)
+with the registry-backed ones in :mod:`bot.keyboards.inline`. It also
+compares building the ``sendMessage`` form with aiogram's session against
+:class:`~bot.utils.http.TunedAiohttpSession`, which reuses the cached
+keyboard JSON.
+
+Run::
+
+    python -m benchmarks.bench_keyboards --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from bot.keyboards.inline import back_kb, main_menu_kb, paginate_kb
+from bot.utils.http import TunedAiohttpSession
+
+
+def _legacy_main_menu_kb() -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(text="👤 Профиль", callback_data="menu:profile"),
+        InlineKeyboardButton(text="❓ Помощь", callback_data="menu:help"),
+    )
+    builder.row(
+        InlineKeyboardButton(text="⚙️ Настройки", callback_data="menu:settings"),
+    )
+    return builder.as_markup()
+
+
+def _legacy_back_kb(target: str = "menu:main") -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(text="⬅️ Назад", callback_data=target))
+    return builder.as_markup()
+
+
+def _legacy_paginate_kb(page: int, total_pages: int, prefix: str) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    buttons: list[InlineKeyboardButton] = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"{prefix}:page:{page - 1}"))
+    buttons.append(InlineKeyboardButton(text=f"{page + 1}/{total_pages}", callback_data="noop"))
+    if page < total_pages - 1:
+        buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"{prefix}:page:{page + 1}"))
+    builder.row(*buttons)
+    return builder.as_markup()
+
+
+def _report(name: str, seconds: float, number: int, baseline: float | None = None) -> float:
+    per_call = seconds / number * 1e6
+    speedup = f"{baseline / per_call:>8.1f}x" if baseline else ""
+    print(f"{name:<34}{per_call:>10.2f}{speedup}")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.number
+
+    print(f"{'case':<34}{'µs/call':>10}{'speedup':>9}")
+    cases = [
+        ("main_menu_kb", _legacy_main_menu_kb, main_menu_kb),
+        ("back_kb", lambda: _legacy_back_kb("menu:main"), lambda: back_kb("menu:main")),
+        (
+            "paginate_kb (10 pages)",
+            lambda: [_legacy_paginate_kb(p, 10, "items") for p in range(10)],
+            lambda: [paginate_kb(p, 10, "items") for p in range(10)],
+        ),
+    ]
+    for name, legacy, cached in cases:
+        base = _report(f"{name} builder", timeit.timeit(legacy, number=n), n)
+        _report(f"{name} registry", timeit.timeit(cached, number=n), n, base)
+
+    bot = Bot("42:BENCH", default=DefaultBotProperties(parse_mode="HTML"))
+    method = SendMessage(chat_id=1, text="Привет!", reply_markup=main_menu_kb())
+    plain, tuned = AiohttpSession(), TunedAiohttpSession()
+    base = _report(
+        "sendMessage form, aiogram",
+        timeit.timeit(lambda: plain.build_form_data(bot, method), number=n),
+        n,
+    )
+    _report(
+        "sendMessage form, cached JSON",
+        timeit.timeit(lambda: tuned.build_form_data(bot, method), number=n),
+        n,
+        base,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Event-loop time spent logging: ``StreamHandler`` vs. the background writer.
+
+Runs ``--updates`` updates through :class:`~bot.middlewares.logging.LoggingMiddleware`
+with JSON logging, once with the synchronous ``StreamHandler`` and once with
+``LOG_ASYNC`` (:class:`~bot.utils.log_queue.BackgroundLogHandler`). The
+stream stands in for a slow stdout pipe: each ``write`` takes
+``--write-us`` microseconds. Reports the time the event loop spent per
+update, which includes GIL time taken by the writer thread. The time to
+drain the queue afterwards is reported separately.
+
+Run::
+
+    python -m benchmarks.bench_log_pipeline --updates 20000 --write-us 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+from typing import Any
+
+from aiogram.types import Update, User
+
+from bot.config import settings
+from bot.middlewares.logging import LoggingMiddleware
+from bot.utils.log_queue import BackgroundLogHandler
+from bot.utils.logger import configure_logging
+
+
+class _SlowStream(io.TextIOBase):
+    def __init__(self, write_seconds: float) -> None:
+        self.write_seconds = write_seconds
+        self.lines = 0
+
+    def write(self, s: str) -> int:
+        time.sleep(self.write_seconds)
+        self.lines += s.count("\n")
+        return len(s)
+
+
+async def _handler(event: Any, data: dict[str, Any]) -> None:
+    return None
+
+
+async def _run(name: str, use_background: bool, args: argparse.Namespace) -> float:
+    settings.log_json = True
+    settings.log_async = use_background
+    configure_logging()
+    stream = _SlowStream(args.write_us / 1e6)
+    handler = logging.getLogger().handlers[0]
+    if isinstance(handler, BackgroundLogHandler):
+        handler.stream = stream
+    else:
+        handler.setStream(stream)  # type: ignore[attr-defined]
+
+    middleware = LoggingMiddleware()
+    update = Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "Bench"},
+                "text": "hello",
+            },
+        }
+    )
+    data = {
+        "event_from_user": User(id=1, is_bot=False, first_name="Bench", username="b"),
+        "event_update": update,
+    }
+
+    started = time.perf_counter()
+    for _ in range(args.updates):
+        await middleware(_handler, update, data)
+    loop_us = (time.perf_counter() - started) / args.updates * 1e6
+
+    started = time.perf_counter()
+    handler.flush()
+    drain_ms = (time.perf_counter() - started) * 1000
+    dropped = getattr(handler, "dropped", 0)
+    print(f"{name:<12}{loop_us:>12.1f}{drain_ms:>11.0f}{stream.lines:>9}{dropped:>9}")
+    return loop_us
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--write-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    settings.log_queue_size = args.updates
+    print(f"{'handler':<12}{'loop µs/upd':>12}{'drain ms':>11}{'lines':>9}{'dropped':>9}")
+    sync = await _run("stream", False, args)
+    background = await _run("background", True, args)
+    print(f"event-loop time saved per update: {sync - background:.1f} µs")
+    logging.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""Per-update profile sync vs. the write-behind ProfileSyncBuffer.
+
+Simulates a ``/start`` storm: *updates* messages from *users* distinct users,
+handled with *concurrency* in-flight updates, against a throw-away SQLite file.
+
+Run::
+
+    python -m benchmarks.bench_profile_sync --updates 5000 --users 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from aiogram.types import User as TelegramUser
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from bot.database.models import Base
+from bot.database.profile_sync import ProfileSyncBuffer
+from bot.database.repository import UserRepository
+
+
+def _tg_user(telegram_id: int) -> TelegramUser:
+    return TelegramUser(
+        id=telegram_id,
+        is_bot=False,
+        first_name=f"User{telegram_id}",
+        username=f"user{telegram_id}_{random.randint(0, 3)}",  # profile occasionally changes
+        language_code="en",
+    )
+
+
+async def _make_engine(path: Path) -> tuple[AsyncEngine, list[int]]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    writes = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_write(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        if statement.startswith(("INSERT", "UPDATE")):
+            writes[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, writes
+
+
+async def _storm(handle, ids: list[int], concurrency: int) -> float:  # type: ignore[no-untyped-def]
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(telegram_id: int) -> None:
+        async with sem:
+            await handle(_tg_user(telegram_id))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_one(i) for i in ids))
+    return time.perf_counter() - start
+
+
+async def bench_per_update(
+    path: Path, ids: list[int], concurrency: int
+) -> tuple[float, int, int]:
+    engine, writes = await _make_engine(path)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    errors = 0
+
+    async def handle(tg_user: TelegramUser) -> None:
+        nonlocal errors
+        async with factory() as session:
+            try:
+                await UserRepository(session).get_or_create(tg_user)
+                await session.commit()
+            except DBAPIError:
+                # Concurrent first /starts race on the INSERT, and SQLite
+                # writers time out on "database is locked" under this load.
+                errors += 1
+
+    elapsed = await _storm(handle, ids, concurrency)
+    await engine.dispose()
+    return elapsed, writes[0], errors
+
+
+async def bench_write_behind(
+    path: Path, ids: list[int], concurrency: int, interval: float, max_rows: int
+) -> tuple[float, int, int]:
+    engine, writes = await _make_engine(path)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    buffer = ProfileSyncBuffer(factory, interval=interval, max_rows=max_rows)
+    buffer.start()
+
+    async def handle(tg_user: TelegramUser) -> None:
+        async with factory() as session:
+            await UserRepository(session, profile_sync=buffer).get_or_create(tg_user)
+            await session.commit()
+
+    start = time.perf_counter()
+    await _storm(handle, ids, concurrency)
+    await buffer.close()
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return elapsed, writes[0], 0
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--interval-ms", type=int, default=200)
+    parser.add_argument("--max-rows", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    ids = [rng.randint(1, args.users) for _ in range(args.updates)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_update = await bench_per_update(Path(tmp) / "a.db", ids, args.concurrency)
+        write_behind = await bench_write_behind(
+            Path(tmp) / "b.db", ids, args.concurrency, args.interval_ms / 1000, args.max_rows
+        )
+
+    print(f"{'path':<14}{'seconds':>10}{'updates/s':>12}{'writes':>10}{'errors':>8}")
+    for name, (elapsed, writes, errors) in (
+        ("per-update", per_update),
+        ("write-behind", write_behind),
+    ):
+        print(
+            f"{name:<14}{elapsed:>10.3f}{args.updates / elapsed:>12.0f}{writes:>10}{errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Per-check latency of the throttling backends.
+
+Measures the in-memory backend, the Redis token bucket against the in-process
+``fakeredis`` stand-in (if installed), and against a real server when
+``REDIS_URL`` is set. Pipelined ``allow_many`` batches are reported per check.
+
+Run::
+
+    python -m benchmarks.bench_throttling --checks 20000
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.bench_throttling
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks._stats import summarize
+from bot.middlewares.throttling import (
+    MemoryThrottleBackend,
+    RedisThrottleBackend,
+    ThrottleBackend,
+)
+
+
+async def _per_check(backend: ThrottleBackend, ids: list[int]) -> list[float]:
+    samples = []
+    for user_id in ids:
+        start = time.perf_counter()
+        await backend.allow(user_id)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def _pipelined(backend: RedisThrottleBackend, ids: list[int], batch: int) -> list[float]:
+    samples = []
+    for i in range(0, len(ids), batch):
+        chunk = ids[i : i + batch]
+        start = time.perf_counter()
+        await backend.allow_many(chunk)
+        per_check = (time.perf_counter() - start) * 1e6 / len(chunk)
+        samples.extend([per_check] * len(chunk))
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> None:
+    s = summarize(samples)
+    print(f"{name:<28}{s['mean']:>10.1f}{s['p50']:>10.1f}{s['p99']:>10.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    ids = [rng.randint(1, args.users) for _ in range(args.checks)]
+
+    print(f"{'backend':<28}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    _report("memory", await _per_check(MemoryThrottleBackend(rate=0.5), ids))
+
+    redis_clients = []
+    try:
+        import fakeredis
+
+        redis_clients.append(("fakeredis", fakeredis.FakeAsyncRedis()))
+    except ImportError:
+        print("fakeredis not installed — skipping in-process Redis")
+    if os.environ.get("REDIS_URL"):
+        from redis.asyncio import Redis
+
+        redis_clients.append(("redis", Redis.from_url(os.environ["REDIS_URL"])))
+
+    for name, client in redis_clients:
+        backend = RedisThrottleBackend(client, rate=0.5, prefix="bench:throttle:")
+        _report(f"{name} evalsha", await _per_check(backend, ids))
+        _report(f"{name} pipelined x{args.batch}", await _pipelined(backend, ids, args.batch))
+        await backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
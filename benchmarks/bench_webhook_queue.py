@@ -0,0 +1,142 @@
+"""Webhook ingestion: inline vs. detached tasks vs. bounded queue.
+
+Starts the webhook route on a local aiohttp server, with a handler that
+sleeps ``--handler-ms`` to stand in for a slow database. Then it posts
+``--requests`` updates over ``--concurrency`` connections. For each mode it
+reports:
+
+* HTTP latency as seen by Telegram,
+* the peak number of handlers running at once (unbounded for detached tasks),
+* how many requests were refused with 503,
+* the total time until every accepted update was handled.
+
+Client and server share one event loop, so absolute latencies are
+pessimistic; compare the modes with each other.
+
+Run::
+
+    python -m benchmarks.bench_webhook_queue --requests 2000 --handler-ms 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import BaseRequestHandler, SimpleRequestHandler
+from aiohttp import ClientSession, TCPConnector, web
+
+from benchmarks._stats import summarize
+from bot.webhook import QueuedRequestHandler
+
+
+class _Load:
+    def __init__(self, handler_seconds: float) -> None:
+        self.handler_seconds = handler_seconds
+        self.running = 0
+        self.peak = 0
+        self.handled = 0
+
+    def dispatcher(self) -> Dispatcher:
+        dp = Dispatcher()
+
+        @dp.message()
+        async def slow(_) -> None:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(self.handler_seconds)
+            self.running -= 1
+            self.handled += 1
+
+        return dp
+
+
+def _update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": update_id, "type": "private"},
+            "from": {"id": update_id, "is_bot": False, "first_name": "Bench"},
+            "text": "hi",
+        },
+    }
+
+
+async def _run(
+    name: str,
+    make_handler: Callable[[Dispatcher, Bot], BaseRequestHandler],
+    args: argparse.Namespace,
+) -> None:
+    load = _Load(args.handler_ms / 1000)
+    bot = Bot("42:BENCH")
+    app = web.Application()
+    make_handler(load.dispatcher(), bot).register(app, path="/webhook")
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    url = f"http://127.0.0.1:{port}/webhook"
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    ids = iter(range(1, args.requests + 1))
+    started = time.perf_counter()
+
+    async def client(session: ClientSession) -> None:
+        for update_id in ids:
+            t0 = time.perf_counter()
+            async with session.post(url, json=_update(update_id)) as response:
+                await response.read()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    async with ClientSession(connector=TCPConnector(limit=args.concurrency)) as session:
+        await asyncio.gather(*(client(session) for _ in range(args.concurrency)))
+    accepted = statuses.get(200, 0)
+    while load.handled < accepted:
+        await asyncio.sleep(0.005)
+    total = time.perf_counter() - started
+    await runner.cleanup()
+
+    s = summarize(latencies)
+    print(
+        f"{name:<12}{s['p50']:>9.1f}{s['p99']:>9.1f}{load.peak:>7}"
+        f"{statuses.get(503, 0):>9}{accepted / total:>11.0f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--handler-ms", type=float, default=50.0)
+    parser.add_argument("--queue", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'p50 ms':>9}{'p99 ms':>9}{'peak':>7}{'503s':>9}{'updates/s':>11}")
+    await _run(
+        "inline",
+        lambda dp, bot: SimpleRequestHandler(dp, bot, handle_in_background=False),
+        args,
+    )
+    await _run(
+        "background",
+        lambda dp, bot: SimpleRequestHandler(dp, bot, handle_in_background=True),
+        args,
+    )
+    await _run(
+        "queued",
+        lambda dp, bot: QueuedRequestHandler(dp, bot, max_queue=args.queue, workers=args.workers),
+        args,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
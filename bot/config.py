@@ -27,6 +27,31 @@ class BotMode(str, Enum):
     webhook = "webhook"
 
 
+class ThrottleBackendKind(str, Enum):
+    """Where throttling state lives."""
+
+    memory = "memory"
+    redis = "redis"
+
+
+class JsonBackend(str, Enum):
+    """JSON codec; ``auto`` picks the fastest installed one."""
+
+    auto = "auto"
+    orjson = "orjson"
+    msgspec = "msgspec"
+    json = "json"
+
+
+class FsmStorage(str, Enum):
+    """Backend of the aiogram FSM storage (``auto``: redis with ``REDIS_URL``, else memory)."""
+
+    auto = "auto"
+    memory = "memory"
+    database = "database"
+    redis = "redis"
+
+
 class Settings(BaseSettings):
     """Central configuration object.
 
@@ -50,10 +75,24 @@ class Settings(BaseSettings):
     # ── Telegram ─────────────────────────────────────────────────────────────
     bot_token: SecretStr = Field(..., description="Telegram Bot API token")
 
+    # ── Bot API client ───────────────────────────────────────────────────────
+    api_pool_size: int = Field(100, description="Max connections to the Bot API (0 = unlimited)")
+    api_pool_per_host: int = Field(0, description="Max connections per host (0 = unlimited)")
+    api_keepalive_timeout: float = Field(30.0, description="Seconds idle connections stay open")
+    api_dns_ttl: int = Field(300, description="Seconds resolved Bot API addresses are cached")
+    api_timeout: float = Field(60.0, description="Default Bot API request timeout, seconds")
+    api_method_timeouts: dict[str, float] = Field(
+        default_factory=dict,
+        description='Per-method timeouts, e.g. {"sendMessage": 10, "sendDocument": 120}',
+    )
+
     # ── App ──────────────────────────────────────────────────────────────────
     environment: Environment = Environment.development
     bot_mode: BotMode = BotMode.polling
     debug: bool = False
+    json_backend: JsonBackend = Field(
+        JsonBackend.auto, description="JSON codec for updates, API requests and logs"
+    )
 
     # ── Webhook (only used when bot_mode=webhook) ─────────────────────────
     webhook_host: Optional[str] = Field(None, description="Public HTTPS host, e.g. https://example.com")
@@ -61,6 +100,12 @@ class Settings(BaseSettings):
     webhook_secret: Optional[SecretStr] = None
     webapp_host: str = "0.0.0.0"
     webapp_port: int = 8080
+    bot_workers: int = Field(1, description="Webhook worker processes sharing the port")
+    worker_restart_delay: float = Field(1.0, description="Seconds before restarting a dead worker")
+    worker_shutdown_timeout: float = Field(30.0, description="Seconds workers get to shut down")
+    webhook_queue_size: int = Field(0, description="Queued updates at most; 0 handles inline")
+    webhook_queue_workers: int = Field(16, description="Workers draining the webhook queue")
+    webhook_retry_after: int = Field(1, description="Retry-After seconds when the queue is full")
 
     # ── Database ─────────────────────────────────────────────────────────────
     database_url: str = Field(
@@ -68,16 +113,109 @@ class Settings(BaseSettings):
         description="SQLAlchemy async DB URL",
     )
     db_echo: bool = False  # set True to log all SQL
+    db_pool_size: int = Field(10, description="Connections kept open in the pool")
+    db_max_overflow: int = Field(10, description="Extra connections opened under load")
+    db_pool_timeout: float = Field(30.0, description="Seconds to wait for a free connection")
+    db_pool_recycle: int = Field(1800, description="Reconnect after this many seconds (-1 = never)")
+    db_pre_ping_interval: float = Field(
+        30.0, description="Ping connections idle longer than this (0 = always, <0 = never)"
+    )
+    db_statement_cache_size: int = Field(
+        100, description="asyncpg prepared statements cached per connection (0 = off)"
+    )
+    db_sqlite_wal: bool = Field(True, description="Open SQLite files in WAL mode")
+    db_sqlite_synchronous: str = Field("NORMAL", description="SQLite PRAGMA synchronous")
+    db_sqlite_busy_timeout_ms: int = Field(5000, description="SQLite lock wait before failing")
+    db_sqlite_mmap_size: int = Field(
+        256 * 1024 * 1024, description="Bytes of the SQLite file to memory-map (0 = off)"
+    )
+    db_user_upsert: bool = Field(False, description="get_or_create via a single upsert statement")
+
+    # ── User cache ───────────────────────────────────────────────────────────
+    user_cache_size: int = Field(10_000, description="Cached user snapshots; 0 disables the cache")
+    user_cache_ttl: float = Field(60.0, description="Seconds a cached user snapshot stays valid")
+
+    # ── Profile sync (write-behind) ──────────────────────────────────────────
+    profile_sync_enabled: bool = Field(False, description="Buffer /start profile writes")
+    profile_sync_interval_ms: int = Field(200, description="Max delay of a buffered profile write")
+    profile_sync_max_rows: int = Field(500, description="Pending users that trigger an early flush")
+
+    # ── Activity tracking ────────────────────────────────────────────────────
+    activity_tracking_enabled: bool = Field(
+        False, description="Record sessions.last_seen_at for every update"
+    )
+    activity_flush_interval_ms: int = Field(
+        5000, description="Max delay of a buffered last_seen_at write"
+    )
+    activity_max_rows: int = Field(10_000, description="Pending users that trigger an early flush")
+
+    # ── FSM storage ──────────────────────────────────────────────────────────
+    fsm_storage: FsmStorage = Field(
+        FsmStorage.auto,
+        description=(
+            "Where FSM state is kept; 'database' reads users JOIN sessions on every update "
+            "whose state is not cached (on every update with BOT_WORKERS > 1)"
+        ),
+    )
+    fsm_flush_interval_ms: int = Field(200, description="Max delay of a buffered FSM write")
+    fsm_cache_ttl: float = Field(30.0, description="Seconds cached FSM state is served from memory")
+    fsm_cache_size: int = Field(10_000, description="Users whose FSM state is cached")
+    fsm_ttl: Optional[int] = Field(
+        86_400, description="Seconds an untouched conversation is kept (redis)"
+    )
+    fsm_near_cache: bool = Field(
+        False, description="Cache FSM state in-process, invalidated by keyspace events (redis)"
+    )
+
+    # ── Update scheduling ────────────────────────────────────────────────────
+    chat_lanes_enabled: bool = Field(False, description="Process updates of one chat in order")
+    chat_lanes_concurrency: int = Field(64, description="Updates processed at once across chats")
 
     # ── Redis (optional) ─────────────────────────────────────────────────────
     redis_url: Optional[str] = Field(None, description="redis://host:6379/0")
 
     # ── Throttling ────────────────────────────────────────────────────────────
     throttle_rate: float = Field(0.5, description="Min seconds between user requests")
+    throttle_backend: ThrottleBackendKind = ThrottleBackendKind.memory
+    throttle_burst: int = Field(1, description="Requests a user may send back-to-back (redis)")
+    throttle_max_entries: int = Field(1_000_000, description="Users tracked in memory at most")
+
+    # ── Outbound flood control ───────────────────────────────────────────────
+    flood_control_enabled: bool = Field(False, description="Pace outbound Bot API requests")
+    flood_global_rate: float = Field(30.0, description="Messages per second across all chats")
+    flood_chat_rate: float = Field(1.0, description="Messages per second to one private chat")
+    flood_chat_burst: int = Field(3, description="Back-to-back messages to one private chat")
+    flood_group_rate: float = Field(20 / 60, description="Messages per second to one group")
+    flood_max_retries: int = Field(3, description="Transparent retries after RetryAfter")
+
+    # ── Broadcast ────────────────────────────────────────────────────────────
+    broadcast_concurrency: int = Field(20, description="Parallel senders per broadcast")
+    broadcast_rate: float = Field(25.0, description="Global broadcast messages per second")
+    broadcast_chat_interval: float = Field(1.0, description="Min seconds between sends to a chat")
+    broadcast_batch_size: int = Field(500, description="Recipients fetched per query")
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+    metrics_enabled: bool = Field(True, description="Collect metrics and serve /metrics")
+    metrics_port: Optional[int] = Field(
+        None, description="Side HTTP server for /metrics in polling mode"
+    )
 
     # ── Logging ──────────────────────────────────────────────────────────────
     log_level: str = "INFO"
     log_json: bool = False  # structured JSON logs in production
+    log_async: bool = Field(False, description="Render and write logs on a background thread")
+    log_queue_size: int = Field(10_000, description="Log records buffered for the writer thread")
+    log_batch_size: int = Field(256, description="Log records written per batch")
+    log_sample_rates: dict[str, float] = Field(
+        default_factory=dict,
+        description='Fixed keep ratio per event, e.g. {"update_received": 0.01}',
+    )
+    log_sample_limits: dict[str, float] = Field(
+        default_factory=dict, description="Adaptive limit per event, in events per second"
+    )
+    log_sample_slow_ms: Optional[int] = Field(
+        1000, description="Sampled events at least this slow (processing_ms) are always kept"
+    )
 
     @field_validator("log_json", mode="before")
     @classmethod
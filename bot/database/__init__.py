@@ -4,16 +4,20 @@ from __future__ import annotations
 
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.config import settings
+from bot.database.activity import ActivityTracker
+from bot.database.cache import UserCache
+from bot.database.engine import build_engine
 from bot.database.models import Base
+from bot.database.profile_sync import ProfileSyncBuffer
+from bot.utils.metrics import instrument_engine
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.db_echo,
-    pool_pre_ping=True,
-)
+engine = build_engine(settings.database_url)
+
+if settings.metrics_enabled:
+    instrument_engine(engine)
 
 AsyncSessionFactory = async_sessionmaker(
     engine,
@@ -21,6 +25,36 @@ AsyncSessionFactory = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Process-wide read-through cache of user snapshots (``None`` = disabled).
+user_cache: UserCache | None = (
+    UserCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+    if settings.user_cache_size > 0
+    else None
+)
+
+# Process-wide write-behind buffer for /start profile syncs (``None`` = disabled).
+profile_sync: ProfileSyncBuffer | None = (
+    ProfileSyncBuffer(
+        AsyncSessionFactory,
+        interval=settings.profile_sync_interval_ms / 1000,
+        max_rows=settings.profile_sync_max_rows,
+        cache=user_cache,
+    )
+    if settings.profile_sync_enabled
+    else None
+)
+
+# Process-wide coalescing writer of sessions.last_seen_at (``None`` = disabled).
+activity_tracker: ActivityTracker | None = (
+    ActivityTracker(
+        AsyncSessionFactory,
+        interval=settings.activity_flush_interval_ms / 1000,
+        max_rows=settings.activity_max_rows,
+    )
+    if settings.activity_tracking_enabled
+    else None
+)
+
 
 async def create_tables() -> None:
     """Create all tables (dev/test helper — use Alembic in production)."""
@@ -51,4 +85,13 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
-__all__ = ["engine", "AsyncSessionFactory", "create_tables", "drop_tables", "get_session"]
+__all__ = [
+    "engine",
+    "AsyncSessionFactory",
+    "user_cache",
+    "profile_sync",
+    "activity_tracker",
+    "create_tables",
+    "drop_tables",
+    "get_session",
+]
@@ -0,0 +1,137 @@
+"""Coalesced ``last_seen_at`` tracking.
+
+Recording activity with an ``UPDATE sessions SET last_seen_at = …`` per
+incoming update costs one row write per message, for a value nobody needs
+to the second. :class:`ActivityTracker` instead keeps the latest timestamp
+per user in memory — a dict assignment per update — and writes all of them
+with one executemany ``UPDATE`` (:meth:`SessionRepository.bulk_touch`).
+
+Staleness is bounded: a touch reaches the database at most *interval*
+seconds (plus the time of the flush itself) after it happened, or sooner
+once *max_rows* distinct users are pending. :meth:`ActivityTracker.close`
+— called on shutdown — writes what is left. A failed flush keeps its rows
+for the next one, so the bound is only exceeded while the database is down.
+
+Usage::
+
+    tracker = ActivityTracker(AsyncSessionFactory, interval=5.0)
+    tracker.start()
+    tracker.touch(message.from_user.id)
+    await tracker.close()  # on shutdown
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.repository import SessionRepository
+from bot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ActivityTracker:
+    """Buffers per-user activity timestamps and flushes them in bulk.
+
+    Args:
+        session_factory: Factory used to open a session for each flush.
+        interval: Maximum seconds a touch may wait before being flushed.
+        max_rows: Number of pending users that triggers an early flush.
+        clock: Wall clock in seconds since the epoch, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 5.0,
+        max_rows: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._max_rows = max_rows
+        self._clock = clock
+        self._pending: dict[int, float] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.touches = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, telegram_id: int, at: Optional[float] = None) -> None:
+        """Record activity of *telegram_id* now (or at epoch seconds *at*)."""
+        self._pending[telegram_id] = self._clock() if at is None else at
+        self.touches += 1
+        if len(self._pending) >= self._max_rows:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background flush loop (idempotent)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="activity-flush")
+
+    async def flush(self) -> int:
+        """Write all pending timestamps now.
+
+        Returns:
+            Number of users whose timestamp was written.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            seen = {
+                telegram_id: datetime.fromtimestamp(at, timezone.utc)
+                for telegram_id, at in pending.items()
+            }
+            try:
+                async with self._session_factory() as session:
+                    await SessionRepository(session).bulk_touch(seen)
+                    await session.commit()
+            except Exception:
+                # Re-queue, but never overwrite a newer touch that arrived meanwhile.
+                for telegram_id, at in pending.items():
+                    self._pending.setdefault(telegram_id, at)
+                raise
+
+        self.flushes += 1
+        self.flushed_rows += len(seen)
+        return len(seen)
+
+    async def close(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        written = await self.flush()
+        logger.info(
+            "activity_tracker_closed",
+            flushed_rows=written,
+            touches=self.touches,
+            writes=self.flushed_rows,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.exception(
+                    "activity_flush_failed", pending=len(self._pending), error=str(exc)
+                )
@@ -0,0 +1,211 @@
+"""Read-through cache for user lookups.
+
+Handlers that only need to *read* the current user (profile screen, role
+checks, …) go through :meth:`UserRepository.get_snapshot
+<bot.database.repository.UserRepository.get_snapshot>`, which consults a
+process-wide :class:`UserCache` before touching the database.
+
+The cache stores immutable :class:`UserSnapshot` objects rather than ORM
+instances, so a cached value can never be lazily refreshed, expired or
+flushed by an unrelated session. Entries are evicted LRU-first once
+*maxsize* is reached and treated as missing after *ttl* seconds. Writes
+through :class:`~bot.database.repository.UserRepository` drop the affected
+entry, and drop it again when their transaction commits; other processes see
+a change after at most *ttl* seconds.
+
+Usage::
+
+    cache = UserCache(maxsize=10_000, ttl=60)
+    async with AsyncSessionFactory() as session:
+        user = await UserRepository(session, cache=cache).get_snapshot(telegram_id)
+    print(cache.stats())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from bot.database.models import User, UserRole
+
+Loader = Callable[[], Awaitable[Optional["UserSnapshot"]]]
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Read-only copy of a :class:`~bot.database.models.User` row."""
+
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: str
+    last_name: Optional[str]
+    language_code: Optional[str]
+    is_bot: bool
+    is_active: bool
+    role: UserRole
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> UserSnapshot:
+        """Copy the column values of a loaded :class:`User`."""
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            language_code=user.language_code,
+            is_bot=user.is_bot,
+            is_active=user.is_active,
+            role=user.role,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    @property
+    def full_name(self) -> str:
+        """Human-readable display name."""
+        if self.last_name:
+            return f"{self.first_name} {self.last_name}"
+        return self.first_name
+
+
+class UserCache:
+    """Bounded LRU + TTL cache of :class:`UserSnapshot` keyed by Telegram ID.
+
+    Concurrent misses for the same key share one loader call, so a burst of
+    taps from one user costs a single query.
+
+    Args:
+        maxsize: Maximum number of cached users.
+        ttl: Seconds an entry stays valid.
+        clock: Monotonic time source (overridable in tests).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[int, tuple[float, UserSnapshot]] = OrderedDict()
+        self._telegram_ids: dict[int, int] = {}  # users.id -> telegram_id
+        self._inflight: dict[tuple[str, int], asyncio.Future[Optional[UserSnapshot]]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, telegram_id: int) -> Optional[UserSnapshot]:
+        """Return a fresh cached snapshot or ``None`` (does not count as hit/miss)."""
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= self._clock():
+            self._drop(telegram_id)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        return snapshot
+
+    async def get_or_load(self, telegram_id: int, loader: Loader) -> Optional[UserSnapshot]:
+        """Return the snapshot for *telegram_id*, calling *loader* on a miss."""
+        snapshot = self.get(telegram_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await self._load(("telegram_id", telegram_id), loader)
+
+    async def get_or_load_by_id(self, user_id: int, loader: Loader) -> Optional[UserSnapshot]:
+        """Same as :meth:`get_or_load` but keyed by the internal ``users.id``."""
+        telegram_id = self._telegram_ids.get(user_id)
+        snapshot = self.get(telegram_id) if telegram_id is not None else None
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await self._load(("id", user_id), loader)
+
+    def put(self, snapshot: UserSnapshot) -> None:
+        """Insert or refresh *snapshot*, evicting the least recently used entry."""
+        telegram_id = snapshot.telegram_id
+        self._entries[telegram_id] = (self._clock() + self._ttl, snapshot)
+        self._entries.move_to_end(telegram_id)
+        self._telegram_ids[snapshot.id] = telegram_id
+        while len(self._entries) > self._maxsize:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate(self, telegram_id: int) -> None:
+        """Forget *telegram_id*; loads already in flight will not be stored."""
+        self._generation += 1
+        self._drop(telegram_id)
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        self._generation += 1
+        self._entries.clear()
+        self._telegram_ids.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return counters useful for sizing the cache."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    async def _load(self, key: tuple[str, int], loader: Loader) -> Optional[UserSnapshot]:
+        self.misses += 1
+        while (pending := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                # Only the task running the shared load was cancelled: the
+                # next waiter takes over the load instead of failing too.
+
+        future: asyncio.Future[Optional[UserSnapshot]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            snapshot = await loader()
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+        if snapshot is not None and generation == self._generation:
+            self.put(snapshot)
+        future.set_result(snapshot)
+        return snapshot
+
+    def _drop(self, telegram_id: int) -> None:
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None:
+            self._telegram_ids.pop(entry[1].id, None)
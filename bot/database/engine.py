@@ -0,0 +1,132 @@
+"""Dialect-aware engine construction.
+
+:func:`build_engine` turns the ``DB_*`` settings into ``create_async_engine``
+arguments and connection hooks that fit the database behind the URL:
+
+* **pool** (server databases and SQLite files) — ``pool_size``,
+  ``max_overflow``, ``pool_timeout`` and ``pool_recycle``. SQLite files get a
+  queue pool too instead of aiosqlite's default ``NullPool``, which opens
+  (and configures) a new connection for every session. SQLite has a single
+  writer, so its pool holds one connection unless ``DB_POOL_SIZE`` /
+  ``DB_MAX_OVERFLOW`` are set explicitly: more connections only contend for
+  the lock in ``busy_timeout``. In-memory SQLite keeps SQLAlchemy's single
+  shared connection;
+* **time-based pre-ping** — a connection that sat in the pool for less than
+  ``DB_PRE_PING_INTERVAL`` seconds is handed out as is; an older one is
+  pinged first and silently replaced if dead. ``0`` pings on every checkout
+  (SQLAlchemy's ``pool_pre_ping``), a negative value never pings;
+* **asyncpg** — size of the per-connection prepared-statement cache
+  (``DB_STATEMENT_CACHE_SIZE``; ``0`` behind PgBouncer in transaction mode);
+* **SQLite** — ``journal_mode=WAL``, ``synchronous``, ``busy_timeout`` and
+  ``mmap_size`` set on every new connection, so readers do not block the
+  writer and a writer waits for the lock instead of failing with
+  ``database is locked``.
+
+Usage::
+
+    engine = build_engine(settings.database_url)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from bot.config import Settings, settings as default_settings
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, settings: Settings = default_settings) -> dict[str, Any]:
+    """Return ``create_async_engine`` keyword arguments for *url*."""
+    parsed = make_url(url)
+    options: dict[str, Any] = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pre_ping_interval == 0,
+    }
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    if parsed.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        options["poolclass"] = AsyncAdaptedQueuePool
+        # The server-database defaults do not apply to a single-writer file.
+        if "db_pool_size" not in settings.model_fields_set:
+            options["pool_size"] = 1
+        if "db_max_overflow" not in settings.model_fields_set:
+            options["max_overflow"] = 0
+    if parsed.get_backend_name() == "postgresql" and parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+def sqlite_pragmas(url: str, settings: Settings = default_settings) -> dict[str, Any]:
+    """Return the PRAGMAs applied to every new SQLite connection for *url*."""
+    pragmas: dict[str, Any] = {
+        "busy_timeout": settings.db_sqlite_busy_timeout_ms,
+        "synchronous": settings.db_sqlite_synchronous,
+        "mmap_size": settings.db_sqlite_mmap_size,
+    }
+    if settings.db_sqlite_wal and not _is_memory_sqlite(url):
+        pragmas = {"journal_mode": "WAL", **pragmas}
+    return pragmas
+
+
+def build_engine(url: str, settings: Settings = default_settings, **kwargs: Any) -> AsyncEngine:
+    """Create an async engine for *url* tuned by *settings*.
+
+    Args:
+        url: SQLAlchemy async database URL.
+        settings: Source of the ``DB_*`` options.
+        **kwargs: Passed to ``create_async_engine`` over the computed options.
+    """
+    engine = create_async_engine(url, **{**engine_options(url, settings), **kwargs})
+    if engine.dialect.name == "sqlite":
+        _install_pragmas(engine, sqlite_pragmas(url, settings))
+    if settings.db_pre_ping_interval > 0:
+        _install_timed_ping(engine, settings.db_pre_ping_interval)
+    return engine
+
+
+def _install_pragmas(engine: AsyncEngine, pragmas: dict[str, Any]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _install_timed_ping(engine: AsyncEngine, interval: float) -> None:
+    dialect = engine.sync_engine.dialect
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _checked_in(_dbapi_connection: Any, record: Any) -> None:
+        if record is not None:
+            record.info["checked_in"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _checkout(dbapi_connection: Any, record: Any, _proxy: Any) -> None:
+        checked_in = record.info.get("checked_in")
+        if checked_in is None or time.monotonic() - checked_in < interval:
+            return  # brand-new or recently used connection
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as error:
+            # The pool discards this connection and retries the checkout.
+            raise exc.DisconnectionError() from error
@@ -0,0 +1,60 @@
+"""Indexes for the hot session and user queries.
+
+* ``ix_sessions_user_active`` — ``SessionRepository.get_active`` /
+  ``get_state_by_telegram_id`` / ``bulk_touch``: active session of a user,
+  newest first;
+* ``ix_users_active`` — ``UserRepository.count_active`` / ``stream_active``.
+
+Both are partial (``WHERE is_active``) on PostgreSQL and SQLite and plain
+composite indexes elsewhere. On PostgreSQL they are built ``CONCURRENTLY``,
+so writes to the tables are not blocked while the index is built.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-15 00:00:00
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ACTIVE = sa.column("is_active", sa.Boolean()).is_(True)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_sessions_user_active",
+            "sessions",
+            ["user_id", "is_active", "started_at"],
+            postgresql_where=_ACTIVE,
+            sqlite_where=_ACTIVE,
+            postgresql_concurrently=True,
+            if_not_exists=True,  # already there if create_tables() ran after the model change
+        )
+        op.create_index(
+            "ix_users_active",
+            "users",
+            ["is_active", "id"],
+            postgresql_where=_ACTIVE,
+            sqlite_where=_ACTIVE,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_active", table_name="users", postgresql_concurrently=True)
+        op.drop_index(
+            "ix_sessions_user_active", table_name="sessions", postgresql_concurrently=True
+        )
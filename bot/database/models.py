@@ -1,6 +1,6 @@
 """ORM models for the bot.
 
-Contains User and Session models. Extend this file to add domain entities.
+Contains User, Session and Broadcast models. Extend this file to add domain entities.
 """
 
 from __future__ import annotations
@@ -9,7 +9,18 @@ import enum
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Enum, ForeignKey, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -114,3 +125,72 @@ class Session(Base):
 
     def __repr__(self) -> str:
         return f"<Session id={self.id} user_id={self.user_id} state={self.state!r}>"
+
+
+# Hot-query indexes (see migration ``0002``). Partial on active rows where the dialect
+# supports it, so they stay small and ``count_active`` can be answered from the index;
+# elsewhere ``is_active`` is a regular key column.
+Index(
+    "ix_users_active",
+    User.is_active,
+    User.id,
+    postgresql_where=User.is_active.is_(True),
+    sqlite_where=User.is_active.is_(True),
+)
+Index(
+    "ix_sessions_user_active",
+    Session.user_id,
+    Session.is_active,
+    Session.started_at,
+    postgresql_where=Session.is_active.is_(True),
+    sqlite_where=Session.is_active.is_(True),
+)
+
+
+class BroadcastStatus(str, enum.Enum):
+    """Lifecycle of a :class:`Broadcast`."""
+
+    running = "running"
+    done = "done"
+    cancelled = "cancelled"
+
+
+class Broadcast(Base):
+    """A message sent to every active user, with resumable progress.
+
+    Users are visited in ``users.id`` order; ``last_user_id`` is the highest
+    id below which every user has been handled, so an interrupted broadcast
+    resumes right after it.
+
+    Attributes:
+        id: Internal surrogate key.
+        text: Message text (HTML).
+        status: Current :class:`BroadcastStatus`.
+        last_user_id: Progress cursor over ``users.id``.
+        sent: Messages delivered.
+        failed: Messages that failed permanently.
+        blocked: Recipients that blocked the bot (deactivated).
+        created_at: When the broadcast was started.
+        updated_at: Last progress checkpoint.
+    """
+
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[BroadcastStatus] = mapped_column(
+        Enum(BroadcastStatus), default=BroadcastStatus.running, nullable=False
+    )
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    blocked: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<Broadcast id={self.id} status={self.status} last_user_id={self.last_user_id}>"
@@ -0,0 +1,129 @@
+"""Write-behind buffer for Telegram profile syncs.
+
+Every ``/start`` copies the user's profile (username, names, language) into
+``users``. Doing that in its own transaction per update does not scale during
+traffic spikes, so :class:`ProfileSyncBuffer` keeps the latest profile per
+``telegram_id`` in memory and writes them all with one bulk
+``INSERT … ON CONFLICT (telegram_id) DO UPDATE``.
+
+A flush happens every *interval* seconds, as soon as *max_rows* distinct users
+are pending, and once more on :meth:`ProfileSyncBuffer.close`.
+
+Usage::
+
+    buffer = ProfileSyncBuffer(AsyncSessionFactory, interval=0.2, max_rows=500)
+    buffer.start()
+
+    async with AsyncSessionFactory() as session:
+        user, created = await UserRepository(session, profile_sync=buffer).get_or_create(tg_user)
+
+    await buffer.close()  # on shutdown
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any
+
+from aiogram.types import User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.cache import UserCache
+from bot.database.repository import UserRepository, profile_values
+from bot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProfileSyncBuffer:
+    """Collects pending user inserts / profile updates and flushes them in bulk.
+
+    Args:
+        session_factory: Factory used to open a session for each flush.
+        interval: Maximum seconds a change may wait before being flushed.
+        max_rows: Number of pending users that triggers an early flush.
+        cache: User cache to invalidate for every flushed row.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 0.2,
+        max_rows: int = 500,
+        cache: UserCache | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._cache = cache
+        self._interval = interval
+        self._max_rows = max_rows
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, telegram_id: int) -> bool:
+        """Return ``True`` if *telegram_id* has an unflushed change."""
+        return telegram_id in self._pending
+
+    def add(self, tg_user: TelegramUser) -> None:
+        """Queue the profile of *tg_user*; a later call for the same user wins."""
+        self._pending[tg_user.id] = profile_values(tg_user)
+        if len(self._pending) >= self._max_rows:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background flush loop (idempotent)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="profile-sync")
+
+    async def flush(self) -> int:
+        """Write all pending rows now.
+
+        Returns:
+            Number of rows written.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            rows, self._pending = list(self._pending.values()), {}
+            try:
+                async with self._session_factory() as session:
+                    await UserRepository(session, cache=self._cache).bulk_upsert(rows)
+                    await session.commit()
+            except Exception:
+                # Re-queue, but never overwrite a newer change that arrived meanwhile.
+                for row in rows:
+                    self._pending.setdefault(row["telegram_id"], row)
+                raise
+
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        return len(rows)
+
+    async def close(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        written = await self.flush()
+        logger.info("profile_sync_closed", flushed_rows=written)
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.exception(
+                    "profile_sync_flush_failed", pending=len(self._pending), error=str(exc)
+                )
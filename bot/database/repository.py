@@ -9,14 +9,126 @@ Usage::
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
 
 from aiogram.types import User as TelegramUser
-from sqlalchemy import select, update
+from sqlalchemy import Select, bindparam, event, exists, false, func, or_, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
-from bot.database.models import Session, User, UserRole
+from bot.config import settings
+from bot.database.cache import UserCache, UserSnapshot
+from bot.database.models import Broadcast, BroadcastStatus, Session, User, UserRole
+
+if TYPE_CHECKING:
+    from bot.database.profile_sync import ProfileSyncBuffer
+
+
+class SessionStateRow(NamedTuple):
+    """FSM columns of a session, returned by :meth:`SessionRepository.get_state_by_telegram_id`."""
+
+    id: int
+    state: Optional[str]
+    data: Optional[str]
+
+
+# Profile fields copied from the Telegram ``User`` on every interaction.
+PROFILE_FIELDS = ("username", "first_name", "last_name", "language_code")
+
+# ``Session.info`` key of the cache entries to drop once the transaction commits.
+_PENDING_INVALIDATIONS = "user_cache_pending"
+
+
+class ActiveUserRow(NamedTuple):
+    """Lightweight row returned by :meth:`UserRepository.active_page` and ``stream_active``."""
+
+    id: int
+    telegram_id: int
+    language_code: Optional[str]
+
+
+def profile_values(tg_user: TelegramUser) -> dict[str, Any]:
+    """Return the ``users`` column values carried by a Telegram ``User``."""
+    return {
+        "telegram_id": tg_user.id,
+        "username": tg_user.username,
+        "first_name": tg_user.first_name,
+        "last_name": tg_user.last_name,
+        "language_code": tg_user.language_code,
+        "is_bot": tg_user.is_bot,
+    }
+
+
+# Dialects with ``INSERT … ON CONFLICT``; others use the ORM SELECT / INSERT path.
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _profile_upsert(dialect: str, rows: list[dict[str, Any]]) -> Any:
+    """Build ``INSERT … ON CONFLICT (telegram_id) DO UPDATE`` for profile rows.
+
+    The ``DO UPDATE`` only fires when a profile field actually differs, so an
+    unchanged user neither writes a row version nor bumps ``updated_at``.
+    *dialect* must be one of ``_UPSERT_INSERTS``.
+    """
+    insert = _UPSERT_INSERTS[dialect]
+    users = User.__table__.c
+    stmt = insert(User).values([{"is_active": True, "role": UserRole.user, **row} for row in rows])
+    changed = [users[field].is_distinct_from(stmt.excluded[field]) for field in PROFILE_FIELDS]
+    return stmt.on_conflict_do_update(
+        index_elements=[users.telegram_id],
+        set_={
+            **{field: stmt.excluded[field] for field in PROFILE_FIELDS},
+            "updated_at": func.now(),
+        },
+        where=or_(*changed),
+    )
+
+
+def _upsert_returning(dialect: str, tg_user: TelegramUser, marker: datetime) -> Any:
+    """Build the single-user upsert used by :meth:`UserRepository.upsert`.
+
+    The inserted row gets ``created_at=marker``; ``created_at = marker`` in
+    ``RETURNING`` is therefore true only for a freshly inserted row. The
+    ``written`` column tells an inserted or updated row from an unchanged one.
+
+    On PostgreSQL the upsert sits in a data-modifying CTE with a fallback
+    SELECT, so the row comes back in one statement even when nothing changed.
+    SQLite has no data-modifying CTEs; there the caller issues the fallback.
+    """
+    users = User.__table__.c
+    stmt = _profile_upsert(dialect, [{**profile_values(tg_user), "created_at": marker}])
+    stmt = stmt.returning(
+        *users, (users.created_at == marker).label("inserted"), true().label("written")
+    )
+    if dialect != "postgresql":
+        return stmt
+
+    upserted = stmt.cte("upserted")
+    unchanged = _select_unchanged(tg_user.id).where(~exists(select(upserted.c.id)))
+    return select(upserted).union_all(unchanged)
+
+
+def _select_unchanged(telegram_id: int) -> Select[Any]:
+    users = User.__table__.c
+    return select(*users, false().label("inserted"), false().label("written")).where(
+        users.telegram_id == telegram_id
+    )
+
+
+def _invalidate_committed(session: OrmSession) -> None:
+    pending: dict[UserCache, set[int]] = session.info[_PENDING_INVALIDATIONS]
+    for cache, telegram_ids in pending.items():
+        for telegram_id in telegram_ids:
+            cache.invalidate(telegram_id)
+    pending.clear()
+
+
+def _forget_pending(session: OrmSession) -> None:
+    session.info[_PENDING_INVALIDATIONS].clear()
 
 
 class UserRepository:
@@ -24,10 +136,27 @@ class UserRepository:
 
     Args:
         session: Active async SQLAlchemy session.
+        profile_sync: Optional write-behind buffer. When given,
+            :meth:`get_or_create` only reads and leaves the profile write
+            to the buffer's next bulk flush.
+        upsert: Let :meth:`get_or_create` use the single-statement
+            :meth:`upsert`. Defaults to ``settings.db_user_upsert``.
+        cache: Optional read-through cache used by :meth:`get_snapshot`
+            and :meth:`get_snapshot_by_id`; writes through this repository
+            invalidate the affected user, again once the session commits.
     """
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        profile_sync: ProfileSyncBuffer | None = None,
+        upsert: bool | None = None,
+        cache: UserCache | None = None,
+    ) -> None:
         self._session = session
+        self._profile_sync = profile_sync
+        self._upsert = upsert if upsert is not None else settings.db_user_upsert
+        self._cache = cache
 
     async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         """Fetch a user by their Telegram ID.
@@ -47,6 +176,35 @@ class UserRepository:
         """Fetch a user by internal primary key."""
         return await self._session.get(User, user_id)
 
+    async def get_snapshot(self, telegram_id: int) -> Optional[UserSnapshot]:
+        """Read-only, cached variant of :meth:`get_by_telegram_id`.
+
+        Args:
+            telegram_id: Numeric Telegram user ID.
+
+        Returns:
+            Immutable :class:`~bot.database.cache.UserSnapshot` or ``None``.
+        """
+
+        async def load() -> Optional[UserSnapshot]:
+            user = await self.get_by_telegram_id(telegram_id)
+            return UserSnapshot.from_user(user) if user else None
+
+        if self._cache is None:
+            return await load()
+        return await self._cache.get_or_load(telegram_id, load)
+
+    async def get_snapshot_by_id(self, user_id: int) -> Optional[UserSnapshot]:
+        """Read-only, cached variant of :meth:`get_by_id`."""
+
+        async def load() -> Optional[UserSnapshot]:
+            user = await self.get_by_id(user_id)
+            return UserSnapshot.from_user(user) if user else None
+
+        if self._cache is None:
+            return await load()
+        return await self._cache.get_or_load_by_id(user_id, load)
+
     async def create(self, tg_user: TelegramUser) -> User:
         """Persist a new user from a Telegram ``User`` object.
 
@@ -56,14 +214,7 @@ class UserRepository:
         Returns:
             Newly created and flushed :class:`User`.
         """
-        user = User(
-            telegram_id=tg_user.id,
-            username=tg_user.username,
-            first_name=tg_user.first_name,
-            last_name=tg_user.last_name,
-            language_code=tg_user.language_code,
-            is_bot=tg_user.is_bot,
-        )
+        user = User(**profile_values(tg_user))
         self._session.add(user)
         await self._session.flush()
         return user
@@ -78,6 +229,14 @@ class UserRepository:
             A ``(user, created)`` tuple where *created* is ``True``
             when the row was inserted.
         """
+        if self._profile_sync is not None:
+            return await self._get_or_create_buffered(tg_user)
+        if self._upsert:
+            return await self.upsert(tg_user)
+        return await self._get_or_create_orm(tg_user)
+
+    async def _get_or_create_orm(self, tg_user: TelegramUser) -> tuple[User, bool]:
+        """SELECT, then update the loaded user or INSERT a new one (any dialect)."""
         user = await self.get_by_telegram_id(tg_user.id)
         if user:
             # Sync mutable profile fields
@@ -85,10 +244,98 @@ class UserRepository:
             user.first_name = tg_user.first_name
             user.last_name = tg_user.last_name
             user.language_code = tg_user.language_code
+            changed = self._session.is_modified(user)
             await self._session.flush()
+            if changed:
+                self._invalidate(tg_user.id)
             return user, False
         return await self.create(tg_user), True
 
+    async def _get_or_create_buffered(self, tg_user: TelegramUser) -> tuple[User, bool]:
+        """Write-behind variant of :meth:`get_or_create`.
+
+        Issues a single SELECT and queues the insert / profile update in the
+        :class:`~bot.database.profile_sync.ProfileSyncBuffer`. A new user is
+        returned as a transient :class:`User` that is not attached to the
+        session; it gains ``id`` and ``created_at`` on the next flush.
+        """
+        assert self._profile_sync is not None
+        user = await self.get_by_telegram_id(tg_user.id)
+        already_pending = self._profile_sync.is_pending(tg_user.id)
+        self._profile_sync.add(tg_user)
+
+        if user is None:
+            return User(**profile_values(tg_user)), not already_pending
+
+        # Reflect the fresh profile without marking the instance dirty,
+        # otherwise the caller's commit would write it a second time.
+        for field in PROFILE_FIELDS:
+            set_committed_value(user, field, getattr(tg_user, field))
+        return user, False
+
+    async def upsert(self, tg_user: TelegramUser) -> tuple[User, bool]:
+        """Change-aware ``INSERT … ON CONFLICT … DO UPDATE … WHERE … RETURNING``.
+
+        Same contract as :meth:`get_or_create`, but a returning user costs one
+        statement and an unchanged profile writes nothing. On SQLite an
+        unchanged user needs a second, read-only statement. Dialects without
+        ``ON CONFLICT`` fall back to the ORM SELECT / INSERT path.
+
+        Args:
+            tg_user: Telegram user from an update.
+
+        Returns:
+            A ``(user, created)`` tuple where *created* is ``True``
+            when the row was inserted.
+        """
+        dialect = self._session.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            return await self._get_or_create_orm(tg_user)
+        marker = datetime.now(timezone.utc)
+        result = await self._session.execute(_upsert_returning(dialect, tg_user, marker))
+        row = result.one_or_none()
+        if row is None:
+            row = (await self._session.execute(_select_unchanged(tg_user.id))).one()
+
+        values = row._asdict()
+        created = bool(values.pop("inserted"))
+        if values.pop("written"):
+            self._invalidate(tg_user.id)
+        # Adopt the returned row into the identity map without another SELECT.
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await self._session.merge(user, load=False), created
+
+    async def bulk_upsert(self, rows: list[dict[str, Any]]) -> None:
+        """Insert or update many users in one ``INSERT … ON CONFLICT`` statement.
+
+        Dialects without ``ON CONFLICT`` use one SELECT for all rows, then ORM
+        updates and inserts.
+
+        Args:
+            rows: Column values as produced by :func:`profile_values`, at most
+                one row per ``telegram_id``.
+        """
+        if not rows:
+            return
+        dialect = self._session.get_bind().dialect.name
+        if dialect in _UPSERT_INSERTS:
+            await self._session.execute(_profile_upsert(dialect, rows))
+        else:
+            await self._bulk_upsert_orm(rows)
+        for row in rows:
+            self._invalidate(row["telegram_id"])
+
+    async def _bulk_upsert_orm(self, rows: list[dict[str, Any]]) -> None:
+        pending = {row["telegram_id"]: row for row in rows}
+        result = await self._session.execute(select(User).where(User.telegram_id.in_(pending)))
+        for user in result.scalars():
+            row = pending.pop(user.telegram_id)
+            for field in PROFILE_FIELDS:
+                setattr(user, field, row[field])
+        self._session.add_all(User(**row) for row in pending.values())
+        await self._session.flush()
+
     async def set_role(self, telegram_id: int, role: UserRole) -> None:
         """Change a user's role.
 
@@ -99,22 +346,106 @@ class UserRepository:
         await self._session.execute(
             update(User).where(User.telegram_id == telegram_id).values(role=role)
         )
+        self._invalidate(telegram_id)
 
     async def deactivate(self, telegram_id: int) -> None:
         """Soft-delete a user (sets ``is_active=False``)."""
         await self._session.execute(
             update(User).where(User.telegram_id == telegram_id).values(is_active=False)
         )
+        self._invalidate(telegram_id)
 
     async def count_active(self) -> int:
         """Return the total number of active users."""
-        from sqlalchemy import func, select as sa_select
-
         result = await self._session.execute(
-            sa_select(func.count()).select_from(User).where(User.is_active.is_(True))
+            select(func.count()).select_from(User).where(User.is_active.is_(True))
         )
         return result.scalar_one()
 
+    async def active_page(self, after_id: int = 0, limit: int = 1000) -> list[ActiveUserRow]:
+        """Return the next page of active users after ``users.id`` *after_id*.
+
+        One keyset page (``WHERE id > :after_id ORDER BY id LIMIT n``), read
+        as plain tuples. Callers that pace their consumption (the broadcast
+        service) use a short session per page, so no connection or read
+        transaction is held while they wait.
+
+        Args:
+            after_id: Last ``users.id`` of the previous page (or a checkpoint).
+            limit: Rows per page.
+        """
+        result = await self._session.stream(self._active_page_query(after_id, limit))
+        try:
+            return [ActiveUserRow._make(row) async for row in result]
+        finally:
+            await result.close()
+
+    async def stream_active(
+        self, batch_size: int = 1000, after_id: int = 0
+    ) -> AsyncIterator[ActiveUserRow]:
+        """Iterate over every active user in ``users.id`` order.
+
+        Rows are fetched in pages of *batch_size* with keyset pagination
+        (``WHERE id > :last_id ORDER BY id LIMIT n``), so each page is a short
+        index range scan no matter how deep into the table it is. Within a
+        page rows are streamed from a server-side cursor where the driver
+        supports one (asyncpg). Only plain tuples are built — no ORM objects
+        and no identity map — so memory stays flat for any table size.
+
+        The session's connection and transaction stay open until iteration
+        ends; a slow consumer should page with :meth:`active_page` instead.
+
+        Args:
+            batch_size: Rows per page.
+            after_id: Start after this ``users.id`` (e.g. a saved checkpoint).
+
+        Example::
+
+            async for row in repo.stream_active(batch_size=5000):
+                await send(row.telegram_id)
+        """
+        while True:
+            result = await self._session.stream(self._active_page_query(after_id, batch_size))
+            fetched = 0
+            try:
+                async for row in result:
+                    fetched += 1
+                    after_id = row[0]
+                    yield ActiveUserRow._make(row)
+            finally:
+                await result.close()
+            if fetched < batch_size:
+                return
+
+    @staticmethod
+    def _active_page_query(after_id: int, limit: int) -> Select[Any]:
+        return (
+            select(User.id, User.telegram_id, User.language_code)
+            .where(User.is_active.is_(True), User.id > after_id)
+            .order_by(User.id)
+            .limit(limit)
+            .execution_options(yield_per=limit)
+        )
+
+    def _invalidate(self, telegram_id: int) -> None:
+        """Drop *telegram_id* from the cache now and again after the commit.
+
+        Until the commit, other sessions still read the old row and may cache
+        it again; the second drop discards that copy.
+        """
+        if self._cache is None:
+            return
+        self._cache.invalidate(telegram_id)
+        pending: dict[UserCache, set[int]] | None = self._session.info.get(
+            _PENDING_INVALIDATIONS
+        )
+        if pending is None:
+            pending = self._session.info[_PENDING_INVALIDATIONS] = {}
+            sync_session = self._session.sync_session
+            event.listen(sync_session, "after_commit", _invalidate_committed)
+            event.listen(sync_session, "after_rollback", _forget_pending)
+        pending.setdefault(self._cache, set()).add(telegram_id)
+
 
 class SessionRepository:
     """CRUD operations for :class:`~bot.database.models.Session`.
@@ -152,8 +483,118 @@ class SessionRepository:
             update(Session).where(Session.id == session_id).values(**values)
         )
 
+    async def get_state_by_telegram_id(self, telegram_id: int) -> Optional[SessionStateRow]:
+        """Return the FSM columns of the latest active session of a Telegram user."""
+        result = await self._session.execute(
+            select(Session.id, Session.state, Session.data)
+            .join(User, User.id == Session.user_id)
+            .where(User.telegram_id == telegram_id, Session.is_active.is_(True))
+            .order_by(Session.started_at.desc(), Session.id.desc())
+            .limit(1)
+        )
+        row = result.one_or_none()
+        return SessionStateRow(*row) if row is not None else None
+
+    async def bulk_update_state(self, rows: list[dict[str, Any]]) -> None:
+        """Persist FSM state of many sessions in one executemany.
+
+        Args:
+            rows: Dicts with ``id``, ``state`` and ``data`` keys.
+        """
+        now = datetime.utcnow()
+        await self._session.execute(
+            update(Session), [{**row, "last_seen_at": now} for row in rows]
+        )
+
+    async def create_with_state(self, rows: dict[int, dict[str, Any]]) -> dict[int, int]:
+        """Open sessions carrying FSM state for Telegram users that exist in ``users``.
+
+        Args:
+            rows: ``state`` / ``data`` values keyed by Telegram user id.
+
+        Returns:
+            New session ids keyed by Telegram user id; unknown users are skipped.
+        """
+        result = await self._session.execute(
+            select(User.telegram_id, User.id).where(User.telegram_id.in_(list(rows)))
+        )
+        created = {
+            telegram_id: Session(user_id=user_id, **rows[telegram_id])
+            for telegram_id, user_id in result.all()
+        }
+        self._session.add_all(created.values())
+        await self._session.flush()
+        return {telegram_id: sess.id for telegram_id, sess in created.items()}
+
+    async def bulk_touch(self, seen: dict[int, datetime]) -> None:
+        """Set ``last_seen_at`` of the active sessions of many users in one executemany.
+
+        Args:
+            seen: Timestamps keyed by Telegram user id. Users without an
+                active session are skipped.
+        """
+        table = Session.__table__
+        stmt = (
+            update(table)
+            .where(
+                table.c.is_active.is_(True),
+                table.c.user_id
+                == select(User.id)
+                .where(User.telegram_id == bindparam("telegram_id"))
+                .scalar_subquery(),
+            )
+            .values(last_seen_at=bindparam("seen_at"))
+        )
+        await self._session.execute(
+            stmt, [{"telegram_id": tid, "seen_at": at} for tid, at in seen.items()]
+        )
+
     async def close(self, session_id: int) -> None:
         """Mark a session as closed."""
         await self._session.execute(
             update(Session).where(Session.id == session_id).values(is_active=False)
         )
+
+
+class BroadcastRepository:
+    """CRUD operations for :class:`~bot.database.models.Broadcast`.
+
+    Args:
+        session: Active async SQLAlchemy session.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def create(self, text: str) -> Broadcast:
+        """Register a new running broadcast."""
+        broadcast = Broadcast(text=text)
+        self._session.add(broadcast)
+        await self._session.flush()
+        return broadcast
+
+    async def get(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Fetch a broadcast by primary key."""
+        return await self._session.get(Broadcast, broadcast_id)
+
+    async def save_progress(
+        self,
+        broadcast_id: int,
+        last_user_id: int,
+        sent: int,
+        failed: int,
+        blocked: int,
+        status: BroadcastStatus = BroadcastStatus.running,
+    ) -> None:
+        """Persist the progress cursor and counters."""
+        await self._session.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id)
+            .values(
+                last_user_id=last_user_id,
+                sent=sent,
+                failed=failed,
+                blocked=blocked,
+                status=status,
+            )
+        )
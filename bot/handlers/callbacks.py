@@ -1,24 +1,24 @@
 """Callback query handlers for inline keyboards.
 
 Patterns follow the ``"prefix:action[:payload]"`` convention used by
-:mod:`bot.keyboards.inline`.
+:mod:`bot.keyboards.inline` and are dispatched through the route index of
+:class:`~bot.utils.callback_router.CallbackRouter`.
 """
 
 from __future__ import annotations
 
-from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
-from bot.database import AsyncSessionFactory
-from bot.database.repository import UserRepository
 from bot.keyboards.inline import back_kb, main_menu_kb
+from bot.middlewares.database import DatabaseContext
+from bot.utils.callback_router import CallbackParts, CallbackRouter
 from bot.utils.logger import get_logger
 
 logger = get_logger(__name__)
-router = Router(name="callbacks")
+router = CallbackRouter(name="callbacks")
 
 
-@router.callback_query(F.data == "menu:main")
+@router.route("menu:main")
 async def cb_main_menu(callback: CallbackQuery) -> None:
     """Return to the main menu."""
     await callback.message.edit_text(  # type: ignore[union-attr]
@@ -28,15 +28,15 @@ async def cb_main_menu(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "menu:profile")
-async def cb_profile(callback: CallbackQuery) -> None:
+@router.route("menu:profile")
+async def cb_profile(callback: CallbackQuery, db: DatabaseContext) -> None:
     """Show user profile info."""
     if callback.from_user is None:
         await callback.answer()
         return
 
-    async with AsyncSessionFactory() as session:
-        user = await UserRepository(session).get_by_telegram_id(callback.from_user.id)
+    user = await db.users.get_snapshot(callback.from_user.id)
+    await db.commit()
 
     if not user:
         await callback.answer("Пользователь не найден", show_alert=True)
@@ -57,7 +57,7 @@ async def cb_profile(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "menu:help")
+@router.route("menu:help")
 async def cb_help(callback: CallbackQuery) -> None:
     """Inline help screen."""
     text = (
@@ -73,7 +73,7 @@ async def cb_help(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "menu:settings")
+@router.route("menu:settings")
 async def cb_settings(callback: CallbackQuery) -> None:
     """Inline settings placeholder."""
     await callback.message.edit_text(  # type: ignore[union-attr]
@@ -84,23 +84,30 @@ async def cb_settings(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm:"))
-async def cb_confirm(callback: CallbackQuery) -> None:
+@router.route("confirm:*")
+async def cb_confirm(callback: CallbackQuery, callback_parts: CallbackParts) -> None:
     """Generic yes/no confirmation handler.
 
-    Callback data format: ``"confirm:{yes|no}:{action}"``.
+    Callback data format: ``"confirm:{yes|no}:{action}"``; the action may
+    be missing (``"confirm:yes"``).
     """
-    _, choice, action = (callback.data or "").split(":", 2)
-    logger.info("confirm_callback", choice=choice, action=action, user_id=callback.from_user and callback.from_user.id)
+    _, choice, action = callback_parts
+    logger.info(
+        "confirm_callback",
+        choice=choice,
+        action=action,
+        user_id=callback.from_user and callback.from_user.id,
+    )
 
     if choice == "yes":
         # TODO: dispatch to action-specific logic
-        await callback.answer(f"Действие '{action}' подтверждено", show_alert=False)
+        text = f"Действие '{action}' подтверждено" if action else "Подтверждено"
+        await callback.answer(text, show_alert=False)
     else:
         await callback.answer("Отменено")
 
 
-@router.callback_query(F.data == "noop")
+@router.route("noop")
 async def cb_noop(callback: CallbackQuery) -> None:
     """No-op handler for decorative buttons (e.g. page counter)."""
     await callback.answer()
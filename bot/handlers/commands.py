@@ -15,9 +15,8 @@ from aiogram import Router
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
 
-from bot.database import AsyncSessionFactory
-from bot.database.repository import UserRepository
 from bot.keyboards.inline import main_menu_kb
+from bot.middlewares.database import DatabaseContext
 from bot.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -25,19 +24,18 @@ router = Router(name="commands")
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message) -> None:
+async def cmd_start(message: Message, db: DatabaseContext) -> None:
     """/start — greet the user and persist them in the database.
 
     Args:
         message: Incoming Telegram message.
+        db: Per-update database access (see :mod:`bot.middlewares.database`).
     """
     if message.from_user is None:
         return
 
-    async with AsyncSessionFactory() as session:
-        repo = UserRepository(session)
-        user, created = await repo.get_or_create(message.from_user)
-        await session.commit()
+    user, created = await db.users.get_or_create(message.from_user)
+    await db.commit()  # release the connection before calling the Bot API
 
     greeting = "Добро пожаловать" if created else "С возвращением"
     logger.info("start_command", user_id=message.from_user.id, new_user=created)
@@ -1,7 +1,10 @@
 """Inline keyboard factories.
 
 All keyboards are created via factory functions that return
-:class:`aiogram.types.InlineKeyboardMarkup`.
+:class:`aiogram.types.InlineKeyboardMarkup`. Static keyboards are built
+once at import and parameterized ones are memoized by
+:mod:`bot.keyboards.registry`, so the returned objects are shared — do not
+mutate them.
 
 Example::
 
@@ -13,7 +16,10 @@ from __future__ import annotations
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from bot.keyboards.registry import keyboards
 
+
+@keyboards.static
 def main_menu_kb() -> InlineKeyboardMarkup:
     """Return the main menu inline keyboard.
 
@@ -31,6 +37,7 @@ def main_menu_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@keyboards.memoize
 def confirm_kb(action: str) -> InlineKeyboardMarkup:
     """Return a Yes / No confirmation keyboard.
 
@@ -54,6 +61,7 @@ def confirm_kb(action: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@keyboards.memoize
 def back_kb(target: str = "menu:main") -> InlineKeyboardMarkup:
     """Return a single «Back» button.
 
@@ -65,6 +73,7 @@ def back_kb(target: str = "menu:main") -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@keyboards.memoize
 def paginate_kb(page: int, total_pages: int, prefix: str) -> InlineKeyboardMarkup:
     """Return pagination controls.
 
@@ -0,0 +1,117 @@
+"""Registry of prebuilt and memoized keyboards.
+
+Building an ``InlineKeyboardMarkup`` runs the builder and validates a tree
+of pydantic models — wasted work when the same keyboard is sent on every
+``/start``. The registry:
+
+* builds *static* keyboards once, at import;
+* memoizes *parameterized* keyboards in a bounded LRU keyed by the
+  factory arguments;
+* caches each keyboard's serialized JSON, which
+  :class:`~bot.utils.http.TunedAiohttpSession` reuses instead of dumping
+  the markup again for every request.
+
+Keyboards handed out by the registry are shared: treat them as immutable.
+
+Usage::
+
+    @keyboards.static
+    def main_menu_kb() -> InlineKeyboardMarkup: ...
+
+    @keyboards.memoize
+    def confirm_kb(action: str) -> InlineKeyboardMarkup: ...
+"""
+
+from __future__ import annotations
+
+import functools
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+
+class _Entry:
+    __slots__ = ("markup", "json")
+
+    def __init__(self, markup: InlineKeyboardMarkup) -> None:
+        self.markup = markup
+        self.json: Optional[str] = None
+
+
+class KeyboardRegistry:
+    """Owns prebuilt keyboards and their serialized form.
+
+    Args:
+        maxsize: Parameterized keyboards kept at most (static ones are pinned).
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._maxsize = maxsize
+        self._lru: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._by_id: dict[int, _Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def static(
+        self, build: Callable[[], InlineKeyboardMarkup]
+    ) -> Callable[[], InlineKeyboardMarkup]:
+        """Decorator: build the keyboard now and return the same instance on every call."""
+        entry = self._track(build())
+
+        @functools.wraps(build)
+        def get() -> InlineKeyboardMarkup:
+            return entry.markup
+
+        return get
+
+    def memoize(
+        self, factory: Callable[..., InlineKeyboardMarkup]
+    ) -> Callable[..., InlineKeyboardMarkup]:
+        """Decorator: cache the keyboard built for each distinct set of arguments."""
+
+        @functools.wraps(factory)
+        def get(*args: Any, **kwargs: Any) -> InlineKeyboardMarkup:
+            key = (factory, args, tuple(sorted(kwargs.items()))) if kwargs else (factory, args)
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry.markup
+            self.misses += 1
+            entry = self._lru[key] = self._track(factory(*args, **kwargs))
+            if len(self._lru) > self._maxsize:
+                _, evicted = self._lru.popitem(last=False)
+                del self._by_id[id(evicted.markup)]
+            return entry.markup
+
+        return get
+
+    def serialized(
+        self, markup: object, dumps: Callable[[InlineKeyboardMarkup], str]
+    ) -> Optional[str]:
+        """Return the cached JSON of *markup*, or ``None`` if the registry does not own it.
+
+        Args:
+            markup: Any ``reply_markup`` value.
+            dumps: Serializer used once, on the first request for this keyboard.
+        """
+        entry = self._by_id.get(id(markup))
+        if entry is None or entry.markup is not markup:
+            return None
+        if entry.json is None:
+            entry.json = dumps(entry.markup)
+        return entry.json
+
+    def _track(self, markup: InlineKeyboardMarkup) -> _Entry:
+        entry = _Entry(markup)
+        self._by_id[id(markup)] = entry
+        return entry
+
+
+# Process-wide registry used by :mod:`bot.keyboards.inline`.
+keyboards = KeyboardRegistry()
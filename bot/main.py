@@ -7,6 +7,8 @@ Run::
     python -m bot.main
     # or
     BOT_MODE=webhook python -m bot.main
+    # or, one webhook worker process per core
+    BOT_MODE=webhook BOT_WORKERS=4 python -m bot.main
 """
 
 from __future__ import annotations
@@ -18,15 +20,21 @@ from typing import NoReturn
 from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
 from aiogram.types import BotCommand
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from bot.config import BotMode, settings
-from bot.database import create_tables
+from bot.database import activity_tracker, create_tables, engine, profile_sync, user_cache
 from bot.handlers import register_handlers
-from bot.middlewares import register_middlewares
+from bot.middlewares import ApiMetricsMiddleware, FloodControlMiddleware, register_middlewares
+from bot.storage import create_storage
+from bot.supervisor import WorkerSupervisor
+from bot.utils.http import TunedAiohttpSession
 from bot.utils.logger import configure_logging, get_logger
+from bot.utils.metrics import metrics_handler, start_metrics_server
+from bot.webhook import QueuedRequestHandler
 
 logger = get_logger(__name__)
 
@@ -44,15 +52,10 @@ async def set_commands(bot: Bot) -> None:
     ])
 
 
-async def on_startup(bot: Bot) -> None:
-    """Actions performed once at startup."""
+async def configure_bot(bot: Bot) -> None:
+    """One-time startup side effects: tables, command menu, webhook registration."""
     await create_tables()
     await set_commands(bot)
-    logger.info(
-        "bot_started",
-        mode=settings.bot_mode.value,
-        environment=settings.environment.value,
-    )
 
     if settings.bot_mode == BotMode.webhook and settings.webhook_url:
         await bot.set_webhook(
@@ -63,22 +66,82 @@ async def on_startup(bot: Bot) -> None:
         logger.info("webhook_set", url=settings.webhook_url)
 
 
-async def on_shutdown(bot: Bot) -> None:
-    """Actions performed once at shutdown."""
+async def on_startup(bot: Bot, *, configure: bool = True) -> None:
+    """Actions performed once at startup.
+
+    Args:
+        bot: Active :class:`aiogram.Bot` instance.
+        configure: Run :func:`configure_bot`. Webhook workers leave it to the
+            supervisor.
+    """
+    if configure:
+        await configure_bot(bot)
+    if profile_sync is not None:
+        profile_sync.start()
+    if activity_tracker is not None:
+        activity_tracker.start()
+    logger.info(
+        "bot_started",
+        mode=settings.bot_mode.value,
+        environment=settings.environment.value,
+    )
+
+
+async def on_shutdown(bot: Bot, *, configure: bool = True) -> None:
+    """Actions performed once at shutdown.
+
+    Args:
+        bot: Active :class:`aiogram.Bot` instance.
+        configure: Remove the webhook (the counterpart of :func:`configure_bot`).
+    """
     logger.info("bot_stopping")
-    if settings.bot_mode == BotMode.webhook:
+    if configure and settings.bot_mode == BotMode.webhook:
         await bot.delete_webhook()
+    if profile_sync is not None:
+        await profile_sync.close()
+    if activity_tracker is not None:
+        await activity_tracker.close()
+    if user_cache is not None:
+        logger.info("user_cache_stats", **user_cache.stats())
     await bot.session.close()
     logger.info("bot_stopped")
 
 
+def create_bot(session: BaseSession | None = None) -> Bot:
+    """Create the :class:`aiogram.Bot` with default properties and session middlewares.
+
+    Args:
+        session: Transport to use instead of the tuned aiohttp session
+            (benchmarks pass a stub).
+    """
+    bot = Bot(
+        token=settings.bot_token.get_secret_value(),
+        session=session if session is not None else TunedAiohttpSession.from_settings(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    # Flood control first: the API latency metric must not include its waits.
+    if settings.flood_control_enabled:
+        bot.session.middleware(
+            FloodControlMiddleware(
+                global_rate=settings.flood_global_rate,
+                chat_rate=settings.flood_chat_rate,
+                chat_burst=settings.flood_chat_burst,
+                group_rate=settings.flood_group_rate,
+                max_retries=settings.flood_max_retries,
+            )
+        )
+    if settings.metrics_enabled:
+        bot.session.middleware(ApiMetricsMiddleware())
+    return bot
+
+
 def build_dispatcher() -> Dispatcher:
     """Construct and configure the dispatcher.
 
     Returns:
         Fully configured :class:`aiogram.Dispatcher`.
     """
-    dp = Dispatcher()
+    dp = Dispatcher(storage=create_storage())
     register_middlewares(dp)
     register_handlers(dp)
     return dp
@@ -86,25 +149,31 @@ def build_dispatcher() -> Dispatcher:
 
 async def run_polling() -> None:
     """Start the bot in long-polling mode."""
-    bot = Bot(
-        token=settings.bot_token.get_secret_value(),
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
+    bot = create_bot()
     dp = build_dispatcher()
 
+    metrics_runner: web.AppRunner | None = None
+    if settings.metrics_enabled and settings.metrics_port:
+        metrics_runner = await start_metrics_server(settings.webapp_host, settings.metrics_port)
+        logger.info("metrics_server_started", port=settings.metrics_port)
+
     await on_startup(bot)
     try:
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         await on_shutdown(bot)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 
-async def run_webhook() -> None:
-    """Start the bot in webhook mode behind an aiohttp web server."""
-    bot = Bot(
-        token=settings.bot_token.get_secret_value(),
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
+async def run_webhook(*, worker: bool = False) -> None:
+    """Start the bot in webhook mode behind an aiohttp web server.
+
+    Args:
+        worker: Run as one of ``BOT_WORKERS`` processes: bind the port with
+            ``SO_REUSEPORT`` and leave startup side effects to the supervisor.
+    """
+    bot = create_bot()
     dp = build_dispatcher()
 
     app = web.Application()
@@ -114,19 +183,34 @@ async def run_webhook() -> None:
         return web.json_response({"status": "ok", "mode": "webhook"})
 
     app.router.add_get("/health", health)
-
-    SimpleRequestHandler(
-        dispatcher=dp,
-        bot=bot,
-        secret_token=settings.webhook_secret.get_secret_value() if settings.webhook_secret else None,
-    ).register(app, path=settings.webhook_path)
+    if settings.metrics_enabled:
+        app.router.add_get("/metrics", metrics_handler)
+
+    secret_token = settings.webhook_secret.get_secret_value() if settings.webhook_secret else None
+    if settings.webhook_queue_size > 0:
+        QueuedRequestHandler(
+            dp,
+            bot,
+            max_queue=settings.webhook_queue_size,
+            workers=settings.webhook_queue_workers,
+            retry_after=settings.webhook_retry_after,
+            secret_token=secret_token,
+        ).register(app, path=settings.webhook_path)
+    else:
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=secret_token,
+        ).register(app, path=settings.webhook_path)
 
     setup_application(app, dp, bot=bot)
 
-    await on_startup(bot)
+    await on_startup(bot, configure=not worker)
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, settings.webapp_host, settings.webapp_port)
+    site = web.TCPSite(
+        runner, settings.webapp_host, settings.webapp_port, reuse_port=True if worker else None
+    )
     await site.start()
     logger.info("webhook_server_started", host=settings.webapp_host, port=settings.webapp_port)
 
@@ -144,14 +228,56 @@ async def run_webhook() -> None:
 
     await stop_event.wait()
     await runner.cleanup()
-    await on_shutdown(bot)
+    await on_shutdown(bot, configure=not worker)
+
+
+def _webhook_worker() -> None:
+    """Entry point of a forked webhook worker process."""
+    # Connections inherited from the supervisor belong to its (closed) event
+    # loop; start this process with an empty pool without touching them.
+    engine.sync_engine.dispose(close=False)
+    asyncio.run(run_webhook(worker=True))
+
+
+async def _configure_once() -> None:
+    bot = create_bot()
+    try:
+        await configure_bot(bot)
+    finally:
+        await bot.session.close()
+        await engine.dispose()
+
+
+async def _unconfigure() -> None:
+    bot = create_bot()
+    try:
+        await bot.delete_webhook()
+        logger.info("webhook_deleted")
+    finally:
+        await bot.session.close()
+
+
+def run_webhook_workers(workers: int) -> None:
+    """Serve the webhook from *workers* forked processes sharing one port."""
+    asyncio.run(_configure_once())
+    try:
+        WorkerSupervisor(
+            _webhook_worker,
+            workers=workers,
+            restart_delay=settings.worker_restart_delay,
+            shutdown_timeout=settings.worker_shutdown_timeout,
+        ).run()
+    finally:
+        asyncio.run(_unconfigure())
 
 
 def main() -> NoReturn:
     """CLI entry-point — select mode from config and run."""
     configure_logging()
 
-    if settings.bot_mode == BotMode.webhook:
+    if settings.bot_mode == BotMode.webhook and settings.bot_workers > 1:
+        run_webhook_workers(settings.bot_workers)
+    elif settings.bot_mode == BotMode.webhook:
         asyncio.run(run_webhook())
     else:
         asyncio.run(run_polling())
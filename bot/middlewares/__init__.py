@@ -4,8 +4,16 @@ from __future__ import annotations
 
 from aiogram import Dispatcher
 
+from bot.config import settings
+from bot.database import AsyncSessionFactory, activity_tracker, profile_sync, user_cache
+from bot.middlewares.activity import ActivityMiddleware
+from bot.middlewares.database import DatabaseContext, DatabaseMiddleware
+from bot.middlewares.flood_control import FloodControlMiddleware
+from bot.middlewares.lanes import ChatLaneMiddleware
 from bot.middlewares.logging import LoggingMiddleware
-from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.middlewares.metrics import ApiMetricsMiddleware, MetricsMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware, build_throttle_backend
+from bot.utils.metrics import chat_lanes_active
 
 
 def register_middlewares(dp: Dispatcher) -> None:
@@ -14,8 +22,40 @@ def register_middlewares(dp: Dispatcher) -> None:
     Args:
         dp: Active :class:`aiogram.Dispatcher` instance.
     """
+    if settings.chat_lanes_enabled:
+        lanes = ChatLaneMiddleware(concurrency=settings.chat_lanes_concurrency)
+        dp.update.outer_middleware(lanes)
+        chat_lanes_active.set_function(lanes.__len__)
     dp.update.outer_middleware(LoggingMiddleware())
-    dp.message.middleware(ThrottlingMiddleware())
-
-
-__all__ = ["register_middlewares", "LoggingMiddleware", "ThrottlingMiddleware"]
+    if activity_tracker is not None:
+        dp.update.outer_middleware(ActivityMiddleware(activity_tracker))
+
+    # Throttling goes first: dropped messages are counted by throttled_total
+    # only, not as handler calls, and never open a database session.
+    throttling = ThrottlingMiddleware(backend=build_throttle_backend())
+    dp.message.middleware(throttling)
+    dp.shutdown.register(throttling.backend.close)
+
+    if settings.metrics_enabled:
+        for name, observer in dp.observers.items():
+            if name not in ("update", "error"):
+                observer.middleware(MetricsMiddleware(name))
+
+    database = DatabaseMiddleware(AsyncSessionFactory, profile_sync=profile_sync, cache=user_cache)
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(database)
+
+
+__all__ = [
+    "register_middlewares",
+    "ActivityMiddleware",
+    "ApiMetricsMiddleware",
+    "ChatLaneMiddleware",
+    "DatabaseContext",
+    "DatabaseMiddleware",
+    "FloodControlMiddleware",
+    "LoggingMiddleware",
+    "MetricsMiddleware",
+    "ThrottlingMiddleware",
+]
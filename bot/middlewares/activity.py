@@ -0,0 +1,37 @@
+"""Activity tracking middleware.
+
+Marks the sender of every update as seen in the
+:class:`~bot.database.activity.ActivityTracker`, which writes
+``sessions.last_seen_at`` in bulk every few seconds.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from bot.database.activity import ActivityTracker
+
+
+class ActivityMiddleware(BaseMiddleware):
+    """Touches the update's user in *tracker* before handling the update.
+
+    Args:
+        tracker: Tracker that buffers the timestamps.
+    """
+
+    def __init__(self, tracker: ActivityTracker) -> None:
+        self.tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is not None:
+            self.tracker.touch(user.id)
+        return await handler(event, data)
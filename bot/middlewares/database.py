@@ -0,0 +1,135 @@
+"""Per-update database session middleware.
+
+:class:`DatabaseMiddleware` puts a :class:`DatabaseContext` into handler
+``data`` as ``db``. Handlers ask for it by name::
+
+    @router.message(CommandStart())
+    async def cmd_start(message: Message, db: DatabaseContext) -> None:
+        user, created = await db.users.get_or_create(message.from_user)
+
+Nothing is created up front: the ``AsyncSession`` is opened on first use of
+``db.session`` or a repository, and a pool connection is checked out only
+when the first query runs. Updates that never touch the database (``/help``)
+cost one small object.
+
+When the handler returns, the middleware commits (rolls back if the handler
+raised) and closes the session, returning the connection to the pool. A
+handler that is done with the database before a slow Bot API call can
+release the connection earlier with ``await db.commit()``.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.repository import BroadcastRepository, SessionRepository, UserRepository
+
+if TYPE_CHECKING:
+    from bot.database.cache import UserCache
+    from bot.database.profile_sync import ProfileSyncBuffer
+
+
+class DatabaseContext:
+    """Lazily opened session and repositories for one update.
+
+    Args:
+        session_factory: Factory for the session, called on first use.
+        profile_sync: Write-behind buffer handed to :attr:`users`.
+        cache: User cache handed to :attr:`users`.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        profile_sync: ProfileSyncBuffer | None = None,
+        cache: UserCache | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._profile_sync = profile_sync
+        self._cache = cache
+
+    @property
+    def opened(self) -> bool:
+        """Whether :attr:`session` has been created."""
+        return "session" in self.__dict__
+
+    @cached_property
+    def session(self) -> AsyncSession:
+        """The update's session; no connection is used until a query runs."""
+        return self._session_factory()
+
+    @cached_property
+    def users(self) -> UserRepository:
+        """:class:`UserRepository` over :attr:`session`."""
+        return UserRepository(self.session, profile_sync=self._profile_sync, cache=self._cache)
+
+    @cached_property
+    def sessions(self) -> SessionRepository:
+        """:class:`SessionRepository` over :attr:`session`."""
+        return SessionRepository(self.session)
+
+    @cached_property
+    def broadcasts(self) -> BroadcastRepository:
+        """:class:`BroadcastRepository` over :attr:`session`."""
+        return BroadcastRepository(self.session)
+
+    async def commit(self) -> None:
+        """Commit now and return the connection to the pool; later queries take a new one."""
+        if self.opened:
+            await self.session.commit()
+
+    async def close(self, commit: bool) -> None:
+        """Commit (or roll back) pending work and close the session."""
+        if not self.opened:
+            return
+        session = self.session
+        try:
+            if commit and session.in_transaction():
+                await session.commit()
+        finally:
+            await session.close()  # rolls back whatever was not committed
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """Inner middleware providing ``data["db"]``.
+
+    Register it on every observer whose handlers need the database::
+
+        dp.message.middleware(DatabaseMiddleware(AsyncSessionFactory))
+
+    Args:
+        session_factory: Factory for per-update sessions.
+        profile_sync: Write-behind buffer for :class:`UserRepository`.
+        cache: User cache for :class:`UserRepository`.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        profile_sync: ProfileSyncBuffer | None = None,
+        cache: UserCache | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._profile_sync = profile_sync
+        self._cache = cache
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        db = DatabaseContext(self._session_factory, self._profile_sync, self._cache)
+        data["db"] = db
+        try:
+            result = await handler(event, data)
+        except BaseException:
+            await db.close(commit=False)
+            raise
+        await db.close(commit=True)
+        return result
@@ -0,0 +1,195 @@
+"""Outbound flood control for Bot API requests.
+
+:class:`FloodControlMiddleware` is a session (request) middleware, so every
+``message.answer``, ``edit_text``, ``bot.send_message`` … goes through it:
+
+* requests addressed to a chat take a token from a per-chat bucket
+  (private chats: about one message per second with a small burst; groups
+  and channels: 20 messages per minute) and from one global bucket
+  (30 messages per second), following Telegram's published limits;
+* interactive traffic is served before bulk traffic when both wait for the
+  global bucket. Mark bulk senders with :func:`bulk_priority` (the
+  broadcast service does);
+* a ``RetryAfter`` answer pauses the chat's bucket (or the global one, for
+  requests without a chat) for ``retry_after`` plus jitter, and the request
+  is retried transparently up to *max_retries* times.
+
+Time spent waiting for tokens is recorded in
+``bot_api_queue_wait_seconds``, separately from the API latency measured
+by :class:`~bot.middlewares.metrics.ApiMetricsMiddleware`. Register this
+middleware first so the latency histogram excludes the wait::
+
+    bot.session.middleware(FloodControlMiddleware())
+    bot.session.middleware(ApiMetricsMiddleware())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.utils.logger import get_logger
+from bot.utils.metrics import api_queue_wait_seconds, api_retry_after_total
+from bot.utils.rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import Response, TelegramMethod
+    from aiogram.methods.base import TelegramType
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """Outbound request priority; lower values are served first."""
+
+    interactive = 0
+    bulk = 1
+
+
+send_priority: ContextVar[Priority] = ContextVar("send_priority", default=Priority.interactive)
+
+
+@contextlib.contextmanager
+def bulk_priority() -> Iterator[None]:
+    """Send requests made inside the block with :attr:`Priority.bulk`."""
+    token = send_priority.set(Priority.bulk)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class PriorityLimiter:
+    """A :class:`TokenBucket` whose waiters are served by priority, then FIFO.
+
+    Args:
+        rate: Tokens per second.
+        capacity: Burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.bucket = TokenBucket(rate, capacity)
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority = Priority.interactive) -> None:
+        if not self._waiters and self.bucket.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await waiter
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].done():  # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            await self.bucket.acquire()
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.done():
+                    waiter.set_result(None)
+                    break
+
+
+class FloodControlMiddleware(BaseRequestMiddleware):
+    """Pace chat-addressed requests and retry ``RetryAfter`` transparently.
+
+    Args:
+        global_rate: Messages per second across all chats.
+        chat_rate: Messages per second to one private chat.
+        chat_burst: Messages a private chat may receive back-to-back.
+        group_rate: Messages per second to one group or channel.
+        max_retries: Transparent retries after ``RetryAfter``.
+        max_chats: Per-chat buckets kept at most; idle ones are dropped first.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_chats: int = 100_000,
+    ) -> None:
+        self._global = PriorityLimiter(global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._max_retries = max_retries
+        self._max_chats = max_chats
+        self._chats: OrderedDict[int | str, TokenBucket] = OrderedDict()
+        self._wait = {
+            priority: api_queue_wait_seconds.labels(priority.name) for priority in Priority
+        }
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        priority = send_priority.get()
+        attempt = 0
+        while True:
+            if chat_id is not None:
+                start = time.perf_counter()
+                await self._chat_bucket(chat_id).acquire()
+                await self._global.acquire(priority)
+                self._wait[priority].observe(time.perf_counter() - start)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                if attempt == self._max_retries:
+                    raise
+                attempt += 1
+                delay = exc.retry_after + random.uniform(0.05, 0.5)
+                api_retry_after_total.labels(method.__api_method__).inc()
+                logger.warning(
+                    "api_retry_after",
+                    method=method.__api_method__,
+                    chat_id=chat_id,
+                    retry_after=exc.retry_after,
+                )
+                if chat_id is not None:
+                    self._chat_bucket(chat_id).pause(delay)
+                else:
+                    self._global.bucket.pause(delay)
+                    await asyncio.sleep(delay)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._max_chats:
+                self._chats.popitem(last=False)
+            private = isinstance(chat_id, int) and chat_id > 0
+            bucket = self._chats[chat_id] = (
+                TokenBucket(self._chat_rate, self._chat_burst)
+                if private
+                else TokenBucket(self._group_rate, 1)
+            )
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
@@ -0,0 +1,88 @@
+"""Per-chat ordered, cross-chat concurrent update processing.
+
+aiogram runs every update as its own task (polling with
+``handle_as_tasks=True``, webhook in the background), so two quick messages
+from one chat can be handled out of order — fatal for FSM flows.
+:class:`ChatLaneMiddleware` shards updates by chat into *lanes*: updates in
+the same lane run one at a time, in arrival order, while different lanes run
+concurrently up to a global limit.
+
+Lanes exist only while they have work; the last update leaving a lane
+removes it, so idle chats cost nothing.
+
+Enable with ``CHAT_LANES_ENABLED=true``; the global limit is
+``CHAT_LANES_CONCURRENCY``. The middleware sits on ``dp.update`` and works
+for both polling and webhook mode. With the queued webhook handler, an
+update waiting for its lane occupies a queue worker, so keep
+``WEBHOOK_QUEUE_WORKERS`` comfortably above the number of chats expected to
+burst at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+
+
+class _Lane:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class ChatLaneMiddleware(BaseMiddleware):
+    """Serialize updates per chat and bound concurrency across chats.
+
+    The lane key is the chat id, or the user id for chat-less updates such
+    as inline queries. Updates with neither only take a concurrency slot.
+
+    ``asyncio.Lock`` wakes waiters in FIFO order and never lets a newcomer
+    barge in, and nothing awaits between the update task starting and the
+    lock being requested, so a lane preserves the order in which updates
+    were fed to the dispatcher.
+
+    Args:
+        concurrency: Updates processed at once across all lanes.
+
+    Example::
+
+        dp.update.outer_middleware(ChatLaneMiddleware(concurrency=64))
+    """
+
+    def __init__(self, concurrency: int = 64) -> None:
+        self._lanes: dict[int, _Lane] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def __len__(self) -> int:
+        """Number of lanes with queued or running updates."""
+        return len(self._lanes)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+        key = chat.id if chat is not None else user.id if user is not None else None
+        if key is None:
+            async with self._slots:
+                return await handler(event, data)
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        lane.pending += 1
+        try:
+            async with lane.lock, self._slots:
+                return await handler(event, data)
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                del self._lanes[key]
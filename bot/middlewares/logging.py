@@ -1,6 +1,7 @@
 """Request logging middleware.
 
-Logs every incoming update with user context and processing time.
+Logs every incoming update with user context and processing time, and
+records the processing time in the ``bot_update_duration_seconds`` histogram.
 """
 
 from __future__ import annotations
@@ -12,6 +13,7 @@ from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Update, User
 
 from bot.utils.logger import get_logger
+from bot.utils.metrics import update_duration_seconds
 
 logger = get_logger(__name__)
 
@@ -62,3 +64,5 @@ class LoggingMiddleware(BaseMiddleware):
             elapsed_ms = round((time.perf_counter() - start) * 1000)
             log.exception("update_failed", processing_ms=elapsed_ms, error=str(exc))
             raise
+        finally:
+            update_duration_seconds.labels(update_type).observe(time.perf_counter() - start)
@@ -0,0 +1,117 @@
+"""Metrics middlewares.
+
+* :class:`MetricsMiddleware` — inner middleware that counts and times every
+  handler call, labelled by update type and handler name.
+* :class:`ApiMetricsMiddleware` — Bot API request middleware that times
+  outbound calls and counts failures per method.
+
+Both write to the registry in :mod:`bot.utils.metrics`.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from bot.utils.metrics import (
+    api_errors_total,
+    api_request_duration_seconds,
+    handler_calls_total,
+    handler_duration_seconds,
+    handler_errors_total,
+)
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import Response, TelegramMethod
+    from aiogram.methods.base import TelegramType
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Count and time handler calls for one event type.
+
+    Register one instance per observer so the update type is fixed::
+
+        for name, observer in dp.observers.items():
+            if name not in ("update", "error"):
+                observer.middleware(MetricsMiddleware(name))
+
+    Labelled metric children are resolved once per handler and cached, so a
+    call costs two dict lookups and a few float additions.
+    """
+
+    def __init__(self, update_type: str) -> None:
+        self._update_type = update_type
+        self._children: dict[Callable[..., Any], tuple[Any, Any, Any]] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        callback = handler_object.callback if handler_object else handler
+        children = self._children.get(callback)
+        if children is None:
+            children = self._children[callback] = self._resolve(callback)
+        calls, errors, duration = children
+
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            errors.value += 1
+            raise
+        finally:
+            calls.value += 1
+            duration.observe(time.perf_counter() - start)
+
+    def _resolve(self, callback: Callable[..., Any]) -> tuple[Any, Any, Any]:
+        name = getattr(callback, "__name__", type(callback).__name__)
+        labels = (self._update_type, name)
+        return (
+            handler_calls_total.labels(*labels),
+            handler_errors_total.labels(*labels),
+            handler_duration_seconds.labels(*labels),
+        )
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Time every outbound Bot API call.
+
+    Example::
+
+        bot.session.middleware(ApiMetricsMiddleware())
+    """
+
+    def __init__(self) -> None:
+        self._durations: dict[str, Any] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        duration = self._durations.get(api_method)
+        if duration is None:
+            duration = self._durations[api_method] = api_request_duration_seconds.labels(
+                api_method
+            )
+
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as exc:
+            api_errors_total.labels(api_method, type(exc).__name__).inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
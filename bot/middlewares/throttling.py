@@ -1,29 +1,212 @@
 """Throttling (anti-spam) middleware.
 
 Limits how frequently a single user can trigger the bot.
-Uses an in-memory TTL cache; swap for Redis-backed storage in production.
+
+The decision is delegated to a pluggable :class:`ThrottleBackend`:
+
+* :class:`MemoryThrottleBackend` (default) keeps per-user timestamps in the
+  process. Each replica enforces the limit on its own.
+* :class:`RedisThrottleBackend` runs an atomic token bucket in Redis, so the
+  limit holds across any number of replicas.
+
+Select the backend with ``THROTTLE_BACKEND=memory|redis`` (Redis needs
+``REDIS_URL``).
 """
 
 from __future__ import annotations
 
+import sys
 import time
-from typing import Any, Awaitable, Callable
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject, User
 
-from bot.config import settings
+from bot.config import ThrottleBackendKind, settings
 from bot.utils.logger import get_logger
+from bot.utils.metrics import throttled_total
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
 
 logger = get_logger(__name__)
 
 
+class ThrottleBackend(ABC):
+    """Decides whether a user may proceed."""
+
+    @abstractmethod
+    async def allow(self, user_id: int) -> bool:
+        """Consume one request for *user_id*; return ``False`` to throttle."""
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class MemoryThrottleBackend(ThrottleBackend):
+    """Per-process backend: at most one request per *rate* seconds per user.
+
+    Entries live in an :class:`~collections.OrderedDict` ordered by the time
+    of the user's last allowed request, so the oldest entries are always at
+    the front. Every check pops up to *sweep_batch* entries whose window has
+    passed, which keeps expiry amortised O(1) without a background task.
+    Past *max_entries* the oldest entry is evicted even if its window is
+    still open (that user is let through early rather than growing memory).
+
+    Args:
+        rate: Minimum seconds between allowed requests per user.
+        max_entries: Hard cap on tracked users.
+        sweep_batch: Expired entries removed per check at most.
+    """
+
+    def __init__(self, rate: float, max_entries: int = 1_000_000, sweep_batch: int = 8) -> None:
+        self._rate = rate
+        self._max_entries = max_entries
+        self._sweep_batch = sweep_batch
+        self._last_seen: OrderedDict[int, float] = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    async def allow(self, user_id: int) -> bool:
+        return self.check(user_id, time.monotonic())
+
+    def check(self, user_id: int, now: float) -> bool:
+        """Synchronous core of :meth:`allow` with an explicit monotonic *now*."""
+        last_seen = self._last_seen
+        self._sweep(now)
+
+        last = last_seen.get(user_id)
+        if last is not None and now - last < self._rate:
+            return False
+
+        last_seen[user_id] = now
+        last_seen.move_to_end(user_id)
+        if len(last_seen) > self._max_entries:
+            last_seen.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the tracked entries."""
+        # OrderedDict.__sizeof__ covers the hash table and its linked list;
+        # keys and values are small ints / floats of fixed size.
+        return sys.getsizeof(self._last_seen) + len(self._last_seen) * (
+            sys.getsizeof(2**40) + sys.getsizeof(0.0)
+        )
+
+    def _sweep(self, now: float) -> None:
+        last_seen = self._last_seen
+        deadline = now - self._rate
+        for _ in range(self._sweep_batch):
+            if not last_seen:
+                return
+            oldest = next(iter(last_seen))
+            if last_seen[oldest] > deadline:
+                return
+            del last_seen[oldest]
+            self.expired += 1
+
+
+# Token bucket refilled continuously at ARGV[1] tokens/s up to ARGV[2] tokens.
+# Uses the Redis clock so replicas with skewed clocks agree; the key expires
+# once a full bucket would have been refilled anyway.
+TOKEN_BUCKET_LUA = """
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = t
+end
+
+tokens = math.min(capacity, tokens + math.max(0, t - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', t)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return allowed
+"""
+
+
+class RedisThrottleBackend(ThrottleBackend):
+    """Distributed token bucket evaluated atomically by a Lua script.
+
+    Each check is one ``EVALSHA`` round trip; :meth:`allow_many` pipelines
+    several checks into one round trip.
+
+    Args:
+        redis: ``redis.asyncio`` client.
+        rate: Seconds per token — the same meaning as ``THROTTLE_RATE``.
+        burst: Bucket capacity, i.e. requests allowed back-to-back.
+        prefix: Key prefix for the per-user buckets.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        rate: float,
+        burst: int = 1,
+        prefix: str = "throttle:",
+    ) -> None:
+        self._redis = redis
+        self._args = (1.0 / rate if rate > 0 else float("inf"), burst)
+        self._prefix = prefix
+        self._script = redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def allow(self, user_id: int) -> bool:
+        result = await self._script(keys=[f"{self._prefix}{user_id}"], args=self._args)
+        return bool(int(result))
+
+    async def allow_many(self, user_ids: Iterable[int]) -> list[bool]:
+        """Check several users in a single pipelined round trip."""
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                key = f"{self._prefix}{user_id}"
+                await self._script(keys=[key], args=self._args, client=pipe)
+            results = await pipe.execute()
+        return [bool(int(r)) for r in results]
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def build_throttle_backend(rate: float | None = None) -> ThrottleBackend:
+    """Create the backend selected by ``settings.throttle_backend``."""
+    rate = rate if rate is not None else settings.throttle_rate
+    if settings.throttle_backend == ThrottleBackendKind.redis:
+        if not settings.redis_url:
+            raise RuntimeError("THROTTLE_BACKEND=redis requires REDIS_URL")
+        from redis.asyncio import Redis
+
+        return RedisThrottleBackend(
+            Redis.from_url(settings.redis_url), rate=rate, burst=settings.throttle_burst
+        )
+    return MemoryThrottleBackend(rate, max_entries=settings.throttle_max_entries)
+
+
 class ThrottlingMiddleware(BaseMiddleware):
     """Drop updates from users that exceed the configured request rate.
 
     Args:
         rate: Minimum seconds between allowed requests per user.
               Defaults to ``settings.throttle_rate``.
+        backend: Decision backend. Defaults to an in-memory backend
+                 using *rate*.
 
     Example::
 
@@ -33,9 +216,9 @@ class ThrottlingMiddleware(BaseMiddleware):
     their update is silently dropped from further processing.
     """
 
-    def __init__(self, rate: float | None = None) -> None:
+    def __init__(self, rate: float | None = None, backend: ThrottleBackend | None = None) -> None:
         self._rate = rate if rate is not None else settings.throttle_rate
-        self._last_seen: dict[int, float] = {}
+        self.backend = backend or MemoryThrottleBackend(self._rate)
 
     async def __call__(
         self,
@@ -47,14 +230,11 @@ class ThrottlingMiddleware(BaseMiddleware):
         if user is None:
             return await handler(event, data)
 
-        now = time.monotonic()
-        last = self._last_seen.get(user.id, 0.0)
-
-        if now - last < self._rate:
+        if not await self.backend.allow(user.id):
             logger.info("throttled", user_id=user.id)
+            throttled_total.inc()
             if isinstance(event, Message):
                 await event.answer("⏳ Слишком много запросов. Подождите немного.")
             return None  # drop update
 
-        self._last_seen[user.id] = now
         return await handler(event, data)
@@ -18,15 +18,17 @@ Example service::
     from sqlalchemy.ext.asyncio import AsyncSession
     from bot.database.repository import UserRepository
 
-    async def broadcast(session: AsyncSession, text: str, bot) -> int:
-        repo = UserRepository(session)
-        users = await repo.list_active()
-        sent = 0
-        for user in users:
-            try:
-                await bot.send_message(user.telegram_id, text)
-                sent += 1
-            except Exception:
-                pass
-        return sent
+    async def notify(session: AsyncSession, telegram_id: int, text: str, bot) -> bool:
+        user = await UserRepository(session).get_by_telegram_id(telegram_id)
+        if user is None or not user.is_active:
+            return False
+        await bot.send_message(user.telegram_id, text)
+        return True
+
+Sending to *all* users is already implemented in :mod:`bot.services.broadcast`
+(rate limiting, ``RetryAfter`` handling, resumable progress)::
+
+    from bot.services.broadcast import Broadcaster
+
+    report = await Broadcaster(bot).start("<b>Новости!</b>")
 """
@@ -0,0 +1,331 @@
+"""Rate-limit-aware broadcast to every active user.
+
+Sending to a large audience one ``await bot.send_message`` at a time takes
+hours and still trips Telegram's flood limits. :class:`Broadcaster` instead
+
+* sends with a bounded pool of workers,
+* paces all sends through one global messages-per-second
+  :class:`~bot.utils.rate_limit.TokenBucket` and keeps a minimum spacing
+  between attempts to the same chat,
+* honours ``RetryAfter`` by pausing the whole pool for the requested time,
+* deactivates users who blocked the bot via
+  :meth:`UserRepository.deactivate <bot.database.repository.UserRepository.deactivate>`,
+* checkpoints its progress in the ``broadcasts`` table, so an interrupted
+  broadcast resumes where it stopped,
+* returns (and logs) a :class:`BroadcastReport` with the achieved throughput.
+
+Usage::
+
+    broadcaster = Broadcaster(bot)
+    report = await broadcaster.start("<b>Новости!</b>")
+
+    # after a crash or restart
+    report = await broadcaster.resume(report.broadcast_id)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import enum
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import settings
+from bot.database import AsyncSessionFactory, user_cache
+from bot.database.models import Broadcast, BroadcastStatus
+from bot.database.repository import BroadcastRepository, UserRepository
+from bot.middlewares.flood_control import Priority, send_priority
+from bot.utils.logger import get_logger
+from bot.utils.rate_limit import TokenBucket
+
+logger = get_logger(__name__)
+
+
+@dataclass(slots=True)
+class BroadcastReport:
+    """Outcome of a (possibly resumed) broadcast.
+
+    Counters include the work done before a resume; *elapsed* covers only
+    the current run. A recipient is counted once every recipient before it
+    is done, so an interrupted run never counts a row its resume re-sends.
+    """
+
+    broadcast_id: int
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+    status: BroadcastStatus = BroadcastStatus.running
+    processed_this_run: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.processed_this_run / self.elapsed if self.elapsed else 0.0
+
+
+class _Outcome(enum.Enum):
+    sent = "sent"
+    failed = "failed"
+    blocked = "blocked"
+
+
+@dataclass(slots=True)
+class _Progress:
+    """Commits recipient outcomes to *report* in ``users.id`` order.
+
+    Workers finish out of order, so an outcome is counted only once every
+    recipient before it is done and :attr:`cursor` moves past it. A
+    checkpoint thus never counts a row that a resume would send again.
+    """
+
+    report: BroadcastReport
+    cursor: int
+    in_flight: OrderedDict[int, tuple[int, _Outcome | None]] = field(default_factory=OrderedDict)
+    blocked_ids: list[int] = field(default_factory=list)
+
+    def started(self, user_id: int, chat_id: int) -> None:
+        self.in_flight[user_id] = (chat_id, None)
+
+    def finished(self, user_id: int, outcome: _Outcome) -> None:
+        chat_id, _ = self.in_flight[user_id]
+        self.in_flight[user_id] = (chat_id, outcome)
+        while self.in_flight:
+            oldest, (chat_id, done) = next(iter(self.in_flight.items()))
+            if done is None:
+                break
+            self.in_flight.popitem(last=False)
+            self.cursor = oldest
+            self._commit(chat_id, done)
+
+    def _commit(self, chat_id: int, outcome: _Outcome) -> None:
+        report = self.report
+        report.processed_this_run += 1
+        if outcome is _Outcome.sent:
+            report.sent += 1
+        elif outcome is _Outcome.failed:
+            report.failed += 1
+        else:
+            report.blocked += 1
+            self.blocked_ids.append(chat_id)
+
+
+class Broadcaster:
+    """Sends one text to all active users under Telegram's rate limits.
+
+    Args:
+        bot: Bot used for sending.
+        session_factory: Session factory for reads and checkpoints.
+        concurrency: Parallel senders. Defaults to ``settings.broadcast_concurrency``.
+        rate: Global messages per second. Defaults to ``settings.broadcast_rate``.
+        chat_interval: Minimum seconds between two attempts to the same chat.
+        batch_size: Recipients fetched per query.
+        max_retries: Attempts per recipient after the first, for
+            ``RetryAfter`` and transient network / server errors.
+        checkpoint_interval: Seconds between progress checkpoints.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        *,
+        concurrency: int | None = None,
+        rate: float | None = None,
+        chat_interval: float | None = None,
+        batch_size: int | None = None,
+        max_retries: int = 3,
+        checkpoint_interval: float = 5.0,
+    ) -> None:
+        self._bot = bot
+        self._session_factory = session_factory
+        self._concurrency = concurrency or settings.broadcast_concurrency
+        self._limiter = TokenBucket(rate or settings.broadcast_rate)
+        self._chat_interval = (
+            chat_interval if chat_interval is not None else settings.broadcast_chat_interval
+        )
+        self._batch_size = batch_size or settings.broadcast_batch_size
+        self._max_retries = max_retries
+        self._checkpoint_interval = checkpoint_interval
+        self._last_attempt: dict[int, float] = {}
+
+    async def start(self, text: str) -> BroadcastReport:
+        """Create a new broadcast of *text* and run it to completion."""
+        async with self._session_factory() as session:
+            broadcast = await BroadcastRepository(session).create(text)
+            await session.commit()
+        logger.info("broadcast_started", broadcast_id=broadcast.id)
+        return await self._run(broadcast)
+
+    async def resume(self, broadcast_id: int) -> BroadcastReport:
+        """Continue an interrupted broadcast after its last checkpoint.
+
+        Raises:
+            ValueError: If the broadcast does not exist or is not running.
+        """
+        async with self._session_factory() as session:
+            broadcast = await BroadcastRepository(session).get(broadcast_id)
+        if broadcast is None or broadcast.status != BroadcastStatus.running:
+            raise ValueError(f"Broadcast {broadcast_id} cannot be resumed")
+        logger.info(
+            "broadcast_resumed", broadcast_id=broadcast_id, last_user_id=broadcast.last_user_id
+        )
+        return await self._run(broadcast)
+
+    async def _run(self, broadcast: Broadcast) -> BroadcastReport:
+        report = BroadcastReport(
+            broadcast_id=broadcast.id,
+            sent=broadcast.sent,
+            failed=broadcast.failed,
+            blocked=broadcast.blocked,
+        )
+        progress = _Progress(report, cursor=broadcast.last_user_id)
+        queue: asyncio.Queue[tuple[int, int] | None] = asyncio.Queue(self._concurrency * 2)
+        workers = [
+            asyncio.create_task(self._worker(queue, broadcast.text, progress))
+            for _ in range(self._concurrency)
+        ]
+        producer = asyncio.create_task(self._produce(queue, broadcast.last_user_id, progress))
+        checkpointer = asyncio.create_task(self._checkpoint_loop(report, progress))
+        started = time.perf_counter()
+
+        try:
+            # Stop at the first failure: once every worker has died the
+            # producer would block on a full queue forever.
+            done, _ = await asyncio.wait(
+                {producer, *workers}, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                task.result()
+            report.status = BroadcastStatus.done
+        finally:
+            tasks = (producer, *workers, checkpointer)
+            for task in tasks:
+                task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.gather(*tasks, return_exceptions=True)
+            report.elapsed = time.perf_counter() - started
+            try:
+                await self._checkpoint(report, progress)
+            except Exception as exc:
+                # Never mask the exception that ended the run; a later resume
+                # starts from the previous checkpoint.
+                logger.exception(
+                    "broadcast_checkpoint_failed", broadcast_id=report.broadcast_id, error=str(exc)
+                )
+
+        logger.info(
+            "broadcast_finished",
+            broadcast_id=report.broadcast_id,
+            status=report.status.value,
+            sent=report.sent,
+            failed=report.failed,
+            blocked=report.blocked,
+            retries=report.retries,
+            elapsed_s=round(report.elapsed, 2),
+            messages_per_second=round(report.messages_per_second, 1),
+        )
+        return report
+
+    async def _produce(
+        self, queue: asyncio.Queue[tuple[int, int] | None], after_id: int, progress: _Progress
+    ) -> None:
+        while True:
+            # A short session per page: queue.put blocks while workers are
+            # busy, and no connection or transaction is held meanwhile.
+            async with self._session_factory() as session:
+                page = await UserRepository(session).active_page(after_id, self._batch_size)
+            for row in page:
+                progress.started(row.id, row.telegram_id)
+                await queue.put((row.id, row.telegram_id))
+            if len(page) < self._batch_size:
+                break
+            after_id = page[-1].id
+        for _ in range(self._concurrency):
+            await queue.put(None)
+
+    async def _worker(
+        self, queue: asyncio.Queue[tuple[int, int] | None], text: str, progress: _Progress
+    ) -> None:
+        # Each worker runs in its own task context; replies to users go first.
+        send_priority.set(Priority.bulk)
+        while (item := await queue.get()) is not None:
+            user_id, chat_id = item
+            progress.finished(user_id, await self._deliver(chat_id, text, progress.report))
+
+    async def _deliver(self, chat_id: int, text: str, report: BroadcastReport) -> _Outcome:
+        try:
+            for attempt in range(self._max_retries + 1):
+                await self._space_chat(chat_id)
+                await self._limiter.acquire()
+                try:
+                    await self._bot.send_message(chat_id, text)
+                    return _Outcome.sent
+                except TelegramRetryAfter as exc:
+                    # Flood control is global — stop every worker, not just this one.
+                    self._limiter.pause(exc.retry_after)
+                    logger.warning("broadcast_retry_after", retry_after=exc.retry_after)
+                except TelegramForbiddenError:
+                    return _Outcome.blocked
+                except (TelegramNetworkError, TelegramServerError) as exc:
+                    await asyncio.sleep(min(2**attempt, 30))
+                    logger.warning("broadcast_send_retry", chat_id=chat_id, error=str(exc))
+                except TelegramAPIError as exc:
+                    logger.info("broadcast_send_failed", chat_id=chat_id, error=str(exc))
+                    return _Outcome.failed
+                report.retries += 1
+            return _Outcome.failed
+        finally:
+            self._last_attempt.pop(chat_id, None)
+
+    async def _space_chat(self, chat_id: int) -> None:
+        last = self._last_attempt.get(chat_id)
+        if last is not None:
+            delay = last + self._chat_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._last_attempt[chat_id] = time.monotonic()
+
+    async def _checkpoint_loop(self, report: BroadcastReport, progress: _Progress) -> None:
+        while True:
+            await asyncio.sleep(self._checkpoint_interval)
+            try:
+                await self._checkpoint(report, progress)
+            except Exception as exc:
+                logger.exception("broadcast_checkpoint_failed", error=str(exc))
+
+    async def _checkpoint(self, report: BroadcastReport, progress: _Progress) -> None:
+        blocked, progress.blocked_ids = progress.blocked_ids, []
+        try:
+            async with self._session_factory() as session:
+                users = UserRepository(session, cache=user_cache)
+                for telegram_id in blocked:
+                    await users.deactivate(telegram_id)
+                await BroadcastRepository(session).save_progress(
+                    report.broadcast_id,
+                    last_user_id=progress.cursor,
+                    sent=report.sent,
+                    failed=report.failed,
+                    blocked=report.blocked,
+                    status=report.status,
+                )
+                await session.commit()
+        except Exception:
+            progress.blocked_ids[:0] = blocked
+            raise
@@ -0,0 +1,69 @@
+"""aiogram FSM storages.
+
+:func:`create_storage` picks the storage configured by ``FSM_STORAGE``:
+
+* ``auto`` (default) — ``redis`` when ``REDIS_URL`` is set, else ``memory``;
+* ``redis`` — :class:`RedisStorage`, shared by all replicas (needs the
+  ``redis`` package);
+* ``database`` (opt-in) — :class:`SQLStorage`, state in the ``sessions``
+  table. aiogram reads the state of every update, so each update whose user
+  is not cached costs one ``users JOIN sessions`` query in its own session —
+  ``/help`` and throttled messages included. With several webhook workers
+  (``BOT_WORKERS > 1``) one user's updates reach different processes, so the
+  per-process cache is turned off (``FSM_CACHE_TTL`` is treated as ``0``)
+  and that query runs for every update;
+* ``memory`` — aiogram's :class:`~aiogram.fsm.storage.memory.MemoryStorage`
+  (lost on restart, not shared between processes).
+"""
+
+from __future__ import annotations
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.config import BotMode, FsmStorage, settings
+from bot.database import AsyncSessionFactory
+from bot.storage.redis_storage import RedisStorage
+from bot.storage.sql_storage import SQLStorage
+from bot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_storage() -> BaseStorage:
+    """Build the FSM storage selected by the settings.
+
+    Raises:
+        RuntimeError: If ``FSM_STORAGE=redis`` is set without ``REDIS_URL``.
+    """
+    kind = settings.fsm_storage
+    if kind is FsmStorage.auto:
+        kind = FsmStorage.redis if settings.redis_url else FsmStorage.memory
+
+    if kind is FsmStorage.redis:
+        if not settings.redis_url:
+            raise RuntimeError("FSM_STORAGE=redis requires REDIS_URL")
+        return RedisStorage.from_url(
+            settings.redis_url,
+            ttl=settings.fsm_ttl,
+            near_cache=settings.fsm_near_cache,
+            maxsize=settings.fsm_cache_size,
+        )
+    if kind is FsmStorage.database:
+        cache_ttl = settings.fsm_cache_ttl
+        if settings.bot_mode == BotMode.webhook and settings.bot_workers > 1 and cache_ttl > 0:
+            # Another worker may have changed the state since it was cached.
+            logger.warning(
+                "fsm_cache_disabled", reason="BOT_WORKERS > 1", fsm_cache_ttl=cache_ttl
+            )
+            cache_ttl = 0.0
+        return SQLStorage(
+            AsyncSessionFactory,
+            interval=settings.fsm_flush_interval_ms / 1000,
+            ttl=cache_ttl,
+            maxsize=settings.fsm_cache_size,
+        )
+    return MemoryStorage()
+
+
+__all__ = ["RedisStorage", "SQLStorage", "create_storage"]
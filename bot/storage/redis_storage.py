@@ -0,0 +1,250 @@
+"""aiogram FSM storage in Redis for multi-replica deployments.
+
+:class:`RedisStorage` keeps each conversation in one Redis hash
+(``fsm:<chat>:<user>:<destiny>``) with two fields: ``s`` — the state and
+``d`` — the data, as JSON, zlib-compressed from *compress_min* bytes on. This
+differs from aiogram's own ``RedisStorage``, which uses two string keys:
+
+* **one round trip for state and data** — ``get_state`` (which aiogram's FSM
+  middleware calls first on every update) fetches both fields with ``HMGET``.
+  The data is remembered for *prefetch_ttl* seconds, so the handler's
+  ``get_data`` / ``update_data`` do not go to Redis again;
+* **one round trip per write** — ``HSET`` / ``HDEL`` and ``EXPIRE`` go in one
+  pipeline;
+* **expiry** — every write resets the key's TTL to *ttl* seconds, so
+  abandoned conversations disappear on their own;
+* **near-cache** (optional, *near_cache* = ``True``) — conversations read
+  by this process stay in memory and ``get_state`` is answered without
+  Redis. Entries are invalidated by keyspace notifications
+  (``notify-keyspace-events`` is extended on start if possible). While the
+  subscription is down, or if notifications cannot be enabled, the
+  near-cache is bypassed.
+
+Usage::
+
+    storage = RedisStorage(Redis.from_url(url), ttl=86400, near_cache=True)
+    dp = Dispatcher(storage=storage)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+from bot.utils.json_codec import codec
+from bot.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger(__name__)
+
+_STATE = "s"
+_DATA = "d"
+# Keyspace events the near-cache needs: hash commands, generic (DEL, EXPIRE,
+# RENAME …), expired and evicted keys.
+_KEYSPACE_FLAGS = "hgxe"
+
+
+def pack_data(data: dict[str, Any], compress_min: int = 512) -> Optional[bytes]:
+    """Serialize FSM *data*: JSON, zlib-compressed when at least *compress_min* bytes."""
+    if not data:
+        return None
+    raw = codec.dumps(data).encode()
+    return zlib.compress(raw) if len(raw) >= compress_min else raw
+
+
+def unpack_data(raw: Optional[bytes]) -> dict[str, Any]:
+    """Inverse of :func:`pack_data`."""
+    if not raw:
+        return {}
+    if raw[:1] != b"{":
+        raw = zlib.decompress(raw)
+    return codec.loads(raw)  # type: ignore[no-any-return]
+
+
+class _Record:
+    __slots__ = ("state", "raw", "at", "trusted")
+
+    def __init__(self, state: Optional[str], raw: Optional[bytes], trusted: bool) -> None:
+        self.state = state
+        self.raw = raw
+        self.at = time.monotonic()
+        self.trusted = trusted  # fetched with no invalidation in flight
+
+
+class RedisStorage(BaseStorage):
+    """FSM storage with one hash per conversation and an optional near-cache.
+
+    Args:
+        redis: Async Redis client; closed by :meth:`close`.
+        ttl: Seconds an untouched conversation is kept (``None`` = forever).
+        near_cache: Serve reads from memory, invalidated by keyspace notifications.
+        maxsize: Conversations remembered in memory at most.
+        prefetch_ttl: Seconds data fetched by ``get_state`` is reused without
+            the near-cache.
+        compress_min: Serialized data size from which it is compressed.
+        prefix: Key prefix.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        ttl: Optional[int] = 86_400,
+        near_cache: bool = False,
+        maxsize: int = 10_000,
+        prefetch_ttl: float = 1.0,
+        compress_min: int = 512,
+        prefix: str = "fsm",
+    ) -> None:
+        self.redis = redis
+        self._ttl = ttl
+        self._near_cache = near_cache
+        self._maxsize = maxsize
+        self._prefetch_ttl = prefetch_ttl
+        self._compress_min = compress_min
+        self._prefix = prefix
+        self._keys = DefaultKeyBuilder(prefix=prefix, with_destiny=True)
+        self._records: OrderedDict[str, _Record] = OrderedDict()
+        self._generation = 0  # bumped by every invalidation
+        self._listening = False
+        self._listener: asyncio.Task[None] | None = None
+        self.near_hits = 0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> RedisStorage:
+        """Create a storage with its own client for *url*."""
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        redis_key = self._keys.build(key)
+        record = self._records.get(redis_key)
+        if record is not None and record.trusted and self._listening:
+            self.near_hits += 1
+            return record.state
+        return (await self._fetch(redis_key)).state
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        redis_key = self._keys.build(key)
+        record = self._fresh(redis_key) or await self._fetch(redis_key)
+        return unpack_data(record.raw)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        redis_key = self._keys.build(key)
+        await self._write(redis_key, _STATE, value.encode() if value is not None else None)
+        record = self._fresh(redis_key)
+        if record is not None:
+            record.state = value
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        raw = pack_data(data, self._compress_min)
+        redis_key = self._keys.build(key)
+        await self._write(redis_key, _DATA, raw)
+        record = self._fresh(redis_key)
+        if record is not None:
+            record.raw = raw
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        await self.redis.aclose()
+
+    def _fresh(self, redis_key: str) -> Optional[_Record]:
+        """Record usable for data access: near-cached, or fetched moments ago."""
+        record = self._records.get(redis_key)
+        if record is None:
+            return None
+        if record.trusted and self._listening:
+            return record
+        return record if time.monotonic() - record.at <= self._prefetch_ttl else None
+
+    async def _fetch(self, redis_key: str) -> _Record:
+        if self._near_cache and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="fsm-near-cache")
+        generation = self._generation
+        state, raw = await self.redis.hmget(redis_key, [_STATE, _DATA])
+        record = _Record(
+            state.decode() if state is not None else None,
+            raw,
+            trusted=self._near_cache and generation == self._generation,
+        )
+        self._records[redis_key] = record
+        self._records.move_to_end(redis_key)
+        if len(self._records) > self._maxsize:
+            self._records.popitem(last=False)
+        return record
+
+    async def _write(self, redis_key: str, field: str, value: Optional[bytes]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if value is None:
+                pipe.hdel(redis_key, field)
+            else:
+                pipe.hset(redis_key, field, value)
+                if self._ttl is not None:
+                    pipe.expire(redis_key, self._ttl)
+            await pipe.execute()
+
+    async def _enable_notifications(self) -> bool:
+        current = ""
+        with contextlib.suppress(Exception):  # CONFIG GET may be renamed or unsupported
+            value = (await self.redis.config_get("notify-keyspace-events")).get(
+                "notify-keyspace-events", ""
+            )
+            current = value.decode() if isinstance(value, bytes) else value
+        covered = set(current) | (set("g$lshzxet") if "A" in current else set())
+        if "K" in covered and all(flag in covered for flag in _KEYSPACE_FLAGS):
+            return True
+        try:
+            merged = "".join(sorted(set(current) | {"K"} | set(_KEYSPACE_FLAGS)))
+            await self.redis.config_set("notify-keyspace-events", merged)
+        except Exception as exc:
+            logger.warning("fsm_near_cache_disabled", reason=str(exc))
+            return False
+        return True
+
+    async def _listen(self) -> None:
+        if not await self._enable_notifications():
+            return
+        db = self.redis.connection_pool.connection_kwargs.get("db", 0)
+        channel_prefix = f"__keyspace@{db}__:"
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{channel_prefix}{self._prefix}:*")
+                async for message in pubsub.listen():
+                    if message["type"] == "psubscribe":
+                        # Anything cached before now may have missed invalidations.
+                        self._generation += 1
+                        self._records.clear()
+                        self._listening = True
+                    elif message["type"] == "pmessage":
+                        self._generation += 1
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        self._records.pop(channel[len(channel_prefix):], None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("fsm_near_cache_disconnected", error=str(exc))
+            finally:
+                # Missed invalidations are unknowable: distrust everything cached.
+                self._listening = False
+                self._generation += 1
+                self._records.clear()
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+            await asyncio.sleep(1.0)
@@ -0,0 +1,253 @@
+"""aiogram FSM storage backed by the ``sessions`` table.
+
+:class:`SQLStorage` keeps FSM state and data in ``Session.state`` /
+``Session.data`` (JSON) of the user's active session, so conversations
+survive restarts and are visible to every process:
+
+* **lazy loading** — a user's row is read on the first FSM access, with one
+  ``SELECT``; the JSON payload is only decoded when ``get_data`` needs it;
+* **per-process cache** — loaded entries are served from memory for *ttl*
+  seconds (LRU-bounded by *maxsize*). Entries with unflushed changes are
+  always served from memory;
+* **coalesced writes** — ``set_state`` / ``set_data`` only mark the entry
+  dirty. Every *interval* seconds all dirty entries are written with one
+  bulk ``UPDATE`` (and one ``INSERT`` for users without a session), so a
+  handler that changes state and data several times costs a single row
+  write. :meth:`close` — called on dispatcher shutdown — writes what is left.
+
+Other processes see a change after at most *interval* seconds, and may serve
+their own cached copy for up to *ttl* seconds. With ``BOT_WORKERS > 1``
+:func:`~bot.storage.create_storage` forces ``ttl=0`` (always read through).
+
+The ``sessions`` table has one row per user and no chat column, so only
+private-chat keys (``chat_id == user_id``, default destiny, no thread or
+business connection) are persisted. Other keys — group chats, topics — live
+in a per-process :class:`~aiogram.fsm.storage.memory.MemoryStorage`. State
+of a user with no ``users`` row yet (no ``/start``) is kept in memory only.
+FSM data must be JSON-serializable.
+
+Usage::
+
+    storage = SQLStorage(AsyncSessionFactory, interval=0.2)
+    dp = Dispatcher(storage=storage)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.repository import SessionRepository
+from bot.utils.json_codec import codec
+from bot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Entry:
+    __slots__ = ("session_id", "state", "raw", "decoded", "loaded_at")
+
+    def __init__(
+        self, session_id: Optional[int], state: Optional[str], raw: Optional[str], now: float
+    ) -> None:
+        self.session_id = session_id
+        self.state = state
+        self.raw = raw  # JSON as stored; ``None`` once ``decoded`` is authoritative
+        self.decoded: Optional[dict[str, Any]] = None
+        self.loaded_at = now
+
+    @property
+    def data(self) -> dict[str, Any]:
+        if self.decoded is None:
+            self.decoded = codec.loads(self.raw) if self.raw else {}
+            self.raw = None
+        return self.decoded
+
+    def dumps(self) -> Optional[str]:
+        if self.decoded is None:
+            return self.raw
+        return codec.dumps(self.decoded) if self.decoded else None
+
+
+class SQLStorage(BaseStorage):
+    """FSM storage on top of :class:`~bot.database.repository.SessionRepository`.
+
+    Args:
+        session_factory: Factory used to open a session per load and per flush.
+        interval: Maximum seconds a change waits before being written.
+        ttl: Seconds a loaded, unchanged entry is served from memory.
+        maxsize: Cached users kept at most; unchanged entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 0.2,
+        ttl: float = 30.0,
+        maxsize: int = 10_000,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._dirty: set[int] = set()
+        self._flushing: set[int] = set()
+        self._unregistered: set[int] = set()  # no ``users`` row: memory only
+        self._fallback = MemoryStorage()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self.loads = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if not self._persisted(key):
+            return await self._fallback.set_state(key, state)
+        entry = await self._entry(key.user_id)
+        entry.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key.user_id)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        if not self._persisted(key):
+            return await self._fallback.get_state(key)
+        return (await self._entry(key.user_id)).state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        if not self._persisted(key):
+            return await self._fallback.set_data(key, data)
+        entry = await self._entry(key.user_id)
+        entry.decoded, entry.raw = data.copy(), None
+        self._mark_dirty(key.user_id)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        if not self._persisted(key):
+            return await self._fallback.get_data(key)
+        return (await self._entry(key.user_id)).data.copy()
+
+    async def flush(self) -> int:
+        """Write every changed entry now.
+
+        Returns:
+            Number of sessions written.
+        """
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            self._flushing = dirty
+            updates: list[dict[str, Any]] = []
+            creates: dict[int, dict[str, Any]] = {}
+            for user_id in dirty:
+                entry = self._entries[user_id]
+                values = {"state": entry.state, "data": entry.dumps()}
+                if entry.session_id is None:
+                    creates[user_id] = values
+                else:
+                    updates.append({"id": entry.session_id, **values})
+            try:
+                async with self._session_factory() as session:
+                    repo = SessionRepository(session)
+                    if updates:
+                        await repo.bulk_update_state(updates)
+                    created = await repo.create_with_state(creates) if creates else {}
+                    await session.commit()
+            except Exception:
+                self._dirty |= dirty
+                raise
+            finally:
+                self._flushing = set()
+
+            now = time.monotonic()
+            for user_id in dirty:
+                self._entries[user_id].loaded_at = now
+            for user_id, session_id in created.items():
+                self._entries[user_id].session_id = session_id
+            unregistered = creates.keys() - created.keys()
+            self._unregistered.difference_update(created)
+            self._unregistered.update(unregistered)
+        if unregistered:
+            logger.warning(
+                "fsm_state_not_persisted", reason="user not registered", users=len(unregistered)
+            )
+        self.flushes += 1
+        self.flushed_rows += len(updates) + len(created)
+        self._evict()
+        return len(updates) + len(created)
+
+    async def close(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        written = await self.flush()
+        logger.info("fsm_storage_closed", flushed_rows=written)
+
+    @staticmethod
+    def _persisted(key: StorageKey) -> bool:
+        return (
+            key.chat_id == key.user_id
+            and key.destiny == "default"
+            and key.thread_id is None
+            and key.business_connection_id is None
+        )
+
+    async def _entry(self, user_id: int) -> _Entry:
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if entry is not None and (self._pinned(user_id) or now - entry.loaded_at < self._ttl):
+            self._entries.move_to_end(user_id)
+            return entry
+
+        async with self._session_factory() as session:
+            row = await SessionRepository(session).get_state_by_telegram_id(user_id)
+        self.loads += 1
+        current = self._entries.get(user_id)
+        if current is not None and (self._pinned(user_id) or current is not entry):
+            return current  # changed or reloaded while we were reading
+        fresh = _Entry(*row, now) if row is not None else _Entry(None, None, None, now)
+        self._entries[user_id] = fresh
+        self._entries.move_to_end(user_id)
+        self._evict()
+        return fresh
+
+    def _mark_dirty(self, user_id: int) -> None:
+        self._dirty.add(user_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="fsm-flush")
+
+    def _pinned(self, user_id: int) -> bool:
+        """Whether memory holds the only up-to-date copy of *user_id*'s state."""
+        return user_id in self._dirty or user_id in self._flushing or user_id in self._unregistered
+
+    def _evict(self) -> None:
+        excess = len(self._entries) - self._maxsize
+        if excess <= 0:
+            return
+        evictable = (user_id for user_id in self._entries if not self._pinned(user_id))
+        for user_id in list(itertools.islice(evictable, excess)):
+            del self._entries[user_id]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.exception("fsm_flush_failed", error=str(exc))
+            if not self._dirty:
+                return
@@ -0,0 +1,163 @@
+"""Pre-fork supervisor for multi-process webhook mode (``BOT_WORKERS>1``).
+
+One Python process handles updates on one core. With ``BOT_WORKERS=N`` the
+supervisor forks *N* worker processes. Each worker runs its own event loop,
+``Dispatcher`` and database connection pool, and binds the webhook port
+with ``SO_REUSEPORT`` so the kernel spreads connections between them.
+
+The supervisor itself never serves requests:
+
+* it runs the one-time startup side effects (tables, command menu,
+  ``set_webhook``) before forking, and ``delete_webhook`` after the last
+  worker exits;
+* on ``SIGTERM`` / ``SIGINT`` it forwards ``SIGTERM`` to every worker,
+  waits up to *shutdown_timeout* for them to finish in-flight updates, and
+  kills the stragglers;
+* a worker that exits unexpectedly is restarted after *restart_delay*
+  seconds (doubling on repeated quick crashes, up to a minute).
+
+Per-process state (the in-memory throttle, the user cache, ``/metrics``)
+is not shared between workers. Use ``THROTTLE_BACKEND=redis`` for a global
+limit, and note that each scrape of ``/metrics`` reaches a single worker.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import signal
+import time
+from collections.abc import Callable
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from types import FrameType
+
+from bot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# A worker that lived at least this long is considered healthy again.
+_STABLE_AFTER = 30.0
+_MAX_RESTART_DELAY = 60.0
+
+
+class WorkerSupervisor:
+    """Fork *workers* processes running *target* and keep them alive.
+
+    Args:
+        target: Worker entry point, called in the child process.
+        workers: Number of worker processes.
+        restart_delay: Seconds before restarting a crashed worker.
+        shutdown_timeout: Seconds workers get to exit after ``SIGTERM``.
+
+    Example::
+
+        WorkerSupervisor(worker_main, workers=4).run()
+    """
+
+    def __init__(
+        self,
+        target: Callable[[], None],
+        workers: int,
+        restart_delay: float = 1.0,
+        shutdown_timeout: float = 30.0,
+    ) -> None:
+        self._target = target
+        self._workers = workers
+        self._restart_delay = restart_delay
+        self._shutdown_timeout = shutdown_timeout
+        self._context = multiprocessing.get_context("fork")
+        self._slots: list[BaseProcess | None] = [None] * workers
+        self._started_at = [0.0] * workers
+        self._delays = [restart_delay] * workers
+        self._restart_at: list[float | None] = [None] * workers
+        self._stopping = False
+        self.restarts = 0
+
+    def run(self) -> None:
+        """Start the workers and supervise them until a stop signal arrives."""
+        previous = {
+            sig: signal.signal(sig, self._request_stop) for sig in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for slot in range(self._workers):
+                self._spawn(slot)
+            logger.info("supervisor_started", workers=self._workers)
+            while not self._stopping:
+                self._reap(timeout=1.0)
+        finally:
+            self._stop_all()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            logger.info("supervisor_stopped", restarts=self.restarts)
+
+    def stop(self) -> None:
+        """Ask :meth:`run` to shut the workers down and return."""
+        self._stopping = True
+
+    def _request_stop(self, signum: int, _: FrameType | None) -> None:
+        logger.info("supervisor_stopping", signal=signal.Signals(signum).name)
+        self.stop()
+
+    def _spawn(self, slot: int) -> None:
+        process = self._context.Process(
+            target=self._child_main, name=f"bot-worker-{slot}", daemon=False
+        )
+        process.start()
+        self._slots[slot] = process
+        self._started_at[slot] = time.monotonic()
+        logger.info("worker_started", slot=slot, pid=process.pid)
+
+    def _child_main(self) -> None:
+        # The parent's handlers only set a flag; workers install their own.
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        self._target()
+
+    def _reap(self, timeout: float) -> None:
+        # Restarts are deadlines rather than sleeps, so one crashed worker's
+        # back-off never delays reaping or restarting the others.
+        now = time.monotonic()
+        for slot, restart_at in enumerate(self._restart_at):
+            if restart_at is not None and restart_at <= now:
+                self._restart_at[slot] = None
+                self.restarts += 1
+                self._spawn(slot)
+        due = [restart_at for restart_at in self._restart_at if restart_at is not None]
+        if due:
+            timeout = min(timeout, max(0.0, min(due) - now))
+
+        alive = {p.sentinel: slot for slot, p in enumerate(self._slots) if p is not None}
+        for sentinel in wait(list(alive), timeout=timeout):
+            slot = alive[sentinel]  # type: ignore[index]
+            process = self._slots[slot]
+            assert process is not None
+            process.join()
+            if self._stopping:
+                continue
+            lived = time.monotonic() - self._started_at[slot]
+            if lived >= _STABLE_AFTER:
+                self._delays[slot] = self._restart_delay
+            delay = self._delays[slot]
+            self._delays[slot] = min(delay * 2, _MAX_RESTART_DELAY)
+            logger.error(
+                "worker_exited",
+                slot=slot,
+                pid=process.pid,
+                exitcode=process.exitcode,
+                restart_in=delay,
+            )
+            self._slots[slot] = None
+            self._restart_at[slot] = time.monotonic() + delay
+
+    def _stop_all(self) -> None:
+        running = [p for p in self._slots if p is not None and p.is_alive()]
+        for process in running:
+            process.terminate()  # SIGTERM → the worker's graceful shutdown
+        deadline = time.monotonic() + self._shutdown_timeout
+        for process in running:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("worker_killed", pid=process.pid)
+                process.kill()
+                process.join()
+        self._slots = [None] * self._workers
@@ -0,0 +1,144 @@
+"""Indexed dispatch for ``"prefix:action[:payload]"`` callback data.
+
+With plain aiogram filters every callback query is tested against each
+``F.data == …`` / ``F.data.startswith(…)`` handler in turn, so a tap costs
+O(handlers). :class:`CallbackRouter` registers a single filter that splits
+``callback.data`` once and finds the handler with at most three dict
+lookups, whatever the number of routes:
+
+1. the full string (``"menu:main"``, ``"noop"``);
+2. ``prefix:action:*`` routes (``"items:page:*"`` matches ``"items:page:3"``);
+3. ``prefix:*`` routes (``"confirm:*"`` matches ``"confirm:yes:delete"``).
+
+Handlers keep their usual aiogram signature: they receive the callback and
+whatever middleware data they ask for, plus ``callback_parts`` — the parsed
+:class:`CallbackParts`. The matched handler is exposed as ``data["handler"]``,
+so flags and :class:`~bot.middlewares.metrics.MetricsMiddleware` labels are
+per route, as with regular handlers.
+
+Usage::
+
+    router = CallbackRouter(name="callbacks")
+
+    @router.route("menu:main")
+    async def cb_main_menu(callback: CallbackQuery) -> None: ...
+
+    @router.route("confirm:*")
+    async def cb_confirm(callback: CallbackQuery, callback_parts: CallbackParts) -> None: ...
+
+Handlers registered with ``router.callback_query(...)`` still work; they are
+tried after the index.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, NamedTuple, Optional, TypeVar, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery
+
+CallbackT = TypeVar("CallbackT", bound=Callable[..., Any])
+
+_WILDCARD = "*"
+
+
+class CallbackParts(NamedTuple):
+    """``callback.data`` split on the separator.
+
+    ``"confirm:yes:delete"`` → ``("confirm", "yes", "delete")``;
+    ``"noop"`` → ``("noop", "", None)``. The payload keeps any further
+    separators.
+    """
+
+    prefix: str
+    action: str
+    payload: Optional[str]
+
+
+class CallbackRouter(Router):
+    """Router that dispatches callback queries through a route index.
+
+    Args:
+        name: Router name.
+        separator: Separator between prefix, action and payload.
+    """
+
+    def __init__(self, *, name: Optional[str] = None, separator: str = ":") -> None:
+        super().__init__(name=name)
+        self._separator = separator
+        self._exact: dict[str, HandlerObject] = {}
+        # prefix -> action (None for ``prefix:*``) -> handler
+        self._wildcards: dict[str, dict[Optional[str], HandlerObject]] = {}
+        self.callback_query.register(self._dispatch, self._match)
+
+    def __len__(self) -> int:
+        return len(self._exact) + sum(map(len, self._wildcards.values()))
+
+    def route(self, pattern: str) -> Callable[[CallbackT], CallbackT]:
+        """Decorator: handle callbacks whose data matches *pattern*.
+
+        Args:
+            pattern: Exact callback data, or ``"prefix:*"`` /
+                ``"prefix:action:*"`` to match everything below it.
+
+        Raises:
+            ValueError: If *pattern* is malformed or already registered.
+        """
+
+        def decorator(callback: CallbackT) -> CallbackT:
+            self.add_route(pattern, callback)
+            return callback
+
+        return decorator
+
+    def add_route(self, pattern: str, callback: Callable[..., Any]) -> None:
+        """Register *callback* for *pattern*; see :meth:`route`."""
+        handler = HandlerObject(callback=callback)
+        parts = pattern.split(self._separator)
+        if parts[-1] != _WILDCARD:
+            if pattern in self._exact:
+                raise ValueError(f"callback route {pattern!r} is already registered")
+            self._exact[pattern] = handler
+            return
+
+        if len(parts) not in (2, 3) or _WILDCARD in parts[:-1]:
+            raise ValueError(
+                f"wildcard route {pattern!r} must be 'prefix:*' or 'prefix:action:*'"
+            )
+        actions = self._wildcards.setdefault(parts[0], {})
+        action = parts[1] if len(parts) == 3 else None
+        if action in actions:
+            raise ValueError(f"callback route {pattern!r} is already registered")
+        actions[action] = handler
+
+    def parse(self, data: str) -> CallbackParts:
+        """Split callback *data* into :class:`CallbackParts`."""
+        prefix, _, rest = data.partition(self._separator)
+        action, sep, payload = rest.partition(self._separator)
+        return CallbackParts(prefix, action, payload if sep else None)
+
+    async def _match(self, callback: CallbackQuery) -> Union[bool, dict[str, Any]]:
+        data = callback.data
+        if data is None:
+            return False
+        parts = self.parse(data)
+        handler = self._exact.get(data)
+        if handler is None:
+            if len(parts.prefix) == len(data):  # no separator: exact routes only
+                return False
+            actions = self._wildcards.get(parts.prefix)
+            if actions is None:
+                return False
+            if parts.payload is not None:
+                handler = actions.get(parts.action)
+            if handler is None:
+                handler = actions.get(None)
+                if handler is None:
+                    return False
+        return {"handler": handler, "callback_parts": parts}
+
+    @staticmethod
+    async def _dispatch(callback: CallbackQuery, handler: HandlerObject, **kwargs: Any) -> Any:
+        return await handler.call(callback, handler=handler, **kwargs)
@@ -0,0 +1,115 @@
+"""Tuned HTTP session for the Bot API client.
+
+aiogram's default :class:`~aiogram.client.session.aiohttp.AiohttpSession`
+uses aiohttp's connector defaults: 100 connections, 15 s keep-alive, a 10 s
+DNS cache and one 60 s timeout for every method. :class:`TunedAiohttpSession`
+makes these configurable (see the ``API_*`` settings) and adds per-method
+timeouts, so a stuck ``sendDocument`` cannot hold a connection as long as
+a quick ``sendMessage`` would. JSON goes through the codec selected by
+``JSON_BACKEND`` (:mod:`bot.utils.json_codec`). Keyboards from :mod:`bot.keyboards.registry`
+are sent as their cached JSON instead of being serialized per request.
+
+aiohttp has no HTTP/1.1 pipelining; throughput comes from reusing
+keep-alive connections and from the size of the pool.
+
+Usage::
+
+    bot = Bot(token, session=TunedAiohttpSession.from_settings())
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Optional
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiohttp import FormData
+
+from bot.config import settings
+from bot.keyboards.registry import keyboards
+from bot.utils.json_codec import codec
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.methods import TelegramMethod
+    from aiogram.methods.base import TelegramType
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """:class:`AiohttpSession` with explicit pool, keep-alive, DNS and timeout settings.
+
+    Args:
+        limit: Total simultaneous connections (0 = unlimited).
+        limit_per_host: Simultaneous connections per host (0 = unlimited).
+        keepalive_timeout: Seconds an idle connection is kept open.
+        ttl_dns_cache: Seconds resolved addresses are cached.
+        timeout: Default request timeout in seconds.
+        method_timeouts: Per-method timeouts, keyed by Bot API method name
+            (e.g. ``{"sendDocument": 120}``).
+        **kwargs: Passed to :class:`AiohttpSession` (``api``, ``proxy`` …).
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: int = 300,
+        timeout: float = 60.0,
+        method_timeouts: Optional[Mapping[str, float]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(timeout=timeout, **kwargs)
+        self._connector_init.update(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=ttl_dns_cache,
+        )
+        self._method_timeouts = dict(method_timeouts or {})
+
+    @classmethod
+    def from_settings(cls, **kwargs: Any) -> TunedAiohttpSession:
+        """Build a session from the ``API_*`` and ``JSON_BACKEND`` settings."""
+        kwargs.setdefault("json_loads", codec.loads)
+        kwargs.setdefault("json_dumps", codec.dumps)
+        return cls(
+            limit=settings.api_pool_size,
+            limit_per_host=settings.api_pool_per_host,
+            keepalive_timeout=settings.api_keepalive_timeout,
+            ttl_dns_cache=settings.api_dns_ttl,
+            timeout=settings.api_timeout,
+            method_timeouts=settings.api_method_timeouts,
+            **kwargs,
+        )
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[TelegramType]) -> FormData:
+        markup = getattr(method, "reply_markup", None)
+        files: dict[str, Any] = {}
+        markup_json = (
+            keyboards.serialized(markup, lambda m: self.prepare_value(m, bot=bot, files=files))
+            if markup is not None
+            else None
+        )
+        if markup_json is None:
+            return super().build_form_data(bot, method)
+
+        # Same as AiohttpSession.build_form_data, minus dumping the keyboard.
+        form = FormData(quote_fields=False)
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", markup_json)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        if timeout is None:
+            timeout = self._method_timeouts.get(method.__api_method__)  # type: ignore[assignment]
+        return await super().make_request(bot, method, timeout=timeout)
@@ -0,0 +1,96 @@
+"""Pluggable JSON codec.
+
+One codec is chosen at import from the ``JSON_BACKEND`` setting and used for:
+
+* webhook request bodies and Bot API responses (``bot.session.json_loads``);
+* Bot API request fields such as ``reply_markup`` (``bot.session.json_dumps``);
+* JSON log rendering (:func:`bot.utils.logger.configure_logging`).
+
+``auto`` picks the first installed of orjson, msgspec and the stdlib
+:mod:`json`. A backend that is requested explicitly but not installed falls
+back to the stdlib; :attr:`JsonCodec.name` tells which one is in use.
+
+Usage::
+
+    from bot.utils.json_codec import codec
+
+    data = codec.loads(body)
+    text = codec.dumps(data)
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any, NamedTuple, Optional
+
+from bot.config import settings
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+_Default = Optional[Callable[[Any], Any]]
+
+
+class JsonCodec(NamedTuple):
+    """A ``loads`` / ``dumps`` pair.
+
+    ``loads`` accepts ``str`` or ``bytes``. ``dumps`` returns ``str`` and
+    takes an optional ``default`` hook for unsupported objects, like
+    :func:`json.dumps`.
+    """
+
+    name: str
+    loads: Callable[[str | bytes], Any]
+    dumps: Callable[..., str]
+
+
+def _orjson() -> JsonCodec:
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any, default: _Default = None, **_: Any) -> str:
+        return orjson.dumps(obj, default=default, option=options).decode()
+
+    return JsonCodec("orjson", orjson.loads, dumps)
+
+
+def _msgspec() -> JsonCodec:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+
+    def dumps(obj: Any, default: _Default = None, **_: Any) -> str:
+        if default is None:
+            return encoder.encode(obj).decode()
+        return msgspec.json.encode(obj, enc_hook=default).decode()
+
+    return JsonCodec("msgspec", decoder.decode, dumps)
+
+
+def _stdlib() -> JsonCodec:
+    return JsonCodec("json", json.loads, json.dumps)
+
+
+_FACTORIES = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def get_codec(backend: str = "auto") -> JsonCodec:
+    """Return the codec for *backend* (``auto``, ``orjson``, ``msgspec`` or ``json``).
+
+    Raises:
+        ValueError: If *backend* is not one of the names above.
+    """
+    if backend != "auto" and backend not in _FACTORIES:
+        raise ValueError(f"unknown JSON backend {backend!r}; expected auto or one of {BACKENDS}")
+    for name in BACKENDS if backend == "auto" else (backend, "json"):
+        try:
+            return _FACTORIES[name]()
+        except ImportError:
+            continue
+    return _stdlib()
+
+
+# Process-wide codec selected by ``JSON_BACKEND``.
+codec = get_codec(settings.json_backend.value)
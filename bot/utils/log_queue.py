@@ -0,0 +1,166 @@
+"""Background log writer.
+
+With a plain :class:`logging.StreamHandler` every log call renders the
+record (JSON or console) and writes it to stdout on the calling thread — the
+event loop. When stdout is a slow pipe, each ``update_processed`` line
+stalls every other update.
+
+:class:`BackgroundLogHandler` only enqueues the record. A daemon thread
+renders queued records with the handler's formatter and writes them in
+batches, one ``write`` + ``flush`` per batch.
+
+Overflow policy: the queue is bounded. When it is full, records below
+*block_level* are dropped and counted (``bot_log_records_dropped_total``);
+records at or above it (errors by default) wait up to *block_timeout*
+seconds for room before being dropped too. :meth:`close` — called by
+:func:`logging.shutdown` at exit — writes out everything still queued.
+
+The writer thread is restarted in forked children (``BOT_WORKERS``), so a
+handler configured before the fork keeps working in every worker.
+
+Records are rendered later, on the writer thread. Log values, not mutable
+objects you are about to change. Anything that must be read on the logging
+thread — the time, context variables — is attached to the record by the
+*prepare* callback before it is queued.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import queue
+import sys
+import threading
+import weakref
+from collections.abc import Callable
+from typing import IO, Optional
+
+from bot.utils.metrics import log_records_dropped_total
+
+_STOP = object()
+
+
+def _restart_in_child(ref: weakref.ref[BackgroundLogHandler]) -> None:
+    handler = ref()
+    if handler is not None:
+        handler._after_fork()
+
+
+class BackgroundLogHandler(logging.Handler):
+    """Handler that renders and writes records on a background thread.
+
+    Args:
+        stream: Destination; defaults to ``sys.stdout``.
+        max_queue: Records buffered at most.
+        batch_size: Records rendered and written per ``write`` call.
+        block_level: Records at this level or above wait for room instead of
+            being dropped at once.
+        block_timeout: Seconds such records wait before being dropped.
+        prepare: Called with each record in :meth:`emit`, on the logging
+            thread, before it is queued.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[IO[str]] = None,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        block_level: int = logging.ERROR,
+        block_timeout: float = 1.0,
+        prepare: Optional[Callable[[logging.LogRecord], None]] = None,
+    ) -> None:
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stdout
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue[object] = queue.Queue(max_queue)
+        self._batch_size = batch_size
+        self._block_level = block_level
+        self._block_timeout = block_timeout
+        self._prepare = prepare
+        self._dropped_total = log_records_dropped_total.labels()
+        self._closed = False
+        self._start()
+        os.register_at_fork(after_in_child=functools.partial(_restart_in_child, weakref.ref(self)))
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._prepare is not None:
+            try:
+                self._prepare(record)
+            except Exception:
+                self.handleError(record)
+                return
+        try:
+            self._queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= self._block_level:
+            try:
+                self._queue.put(record, timeout=self._block_timeout)
+                return
+            except queue.Full:
+                pass
+        self.dropped += 1
+        self._dropped_total.inc()
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been written."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        super().close()
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives; the queue's locks may be held by the dead writer.
+        if not self._closed:
+            self._queue = queue.Queue(self._queue.maxsize)
+            self._start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            lines: list[str] = []
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                    continue
+                try:
+                    lines.append(self.format(item))  # type: ignore[arg-type]
+                except Exception:
+                    self.handleError(item)  # type: ignore[arg-type]
+            self._write(lines)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            # Nothing sensible to do from the writer thread; keep going.
+            pass
+        self.written += len(lines)
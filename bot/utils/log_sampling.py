@@ -0,0 +1,107 @@
+"""Log sampling for high-volume events.
+
+:class:`SamplingProcessor` is a structlog processor that keeps only part of
+selected events, chosen by event name:
+
+* a fixed ratio (``{"update_received": 0.01}`` keeps 1 %);
+* an adaptive limit in events per second (``{"update_processed": 50}``):
+  the keep probability for the current second is ``limit / count`` of the
+  previous second, so volume stays near the limit at any traffic level.
+
+When both apply, the smaller probability wins. Warnings, errors and events
+whose ``processing_ms`` reaches *slow_ms* are always kept. A kept event that
+was sampled carries ``sample_rate`` — the probability it was kept with — so
+the original count is ``sum(1 / sample_rate)``.
+
+Dropped events raise :class:`structlog.DropEvent` from the first processor
+in the chain, so nothing else (timestamp, rendering, I/O) runs for them.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable, Mapping
+from typing import Any, Optional
+
+import structlog
+
+_ALWAYS_KEEP = frozenset({"warning", "warn", "error", "exception", "critical", "fatal"})
+
+
+class _Window:
+    __slots__ = ("start", "count", "probability")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.count = 0
+        self.probability = 1.0
+
+
+class SamplingProcessor:
+    """structlog processor that samples events by name.
+
+    Args:
+        ratios: Fixed keep ratio (0–1) per event name.
+        limits: Target events per second per event name.
+        slow_ms: Events with ``processing_ms`` at or above this are always
+            kept (``None`` disables the exception).
+        clock: Monotonic clock, injectable for tests.
+        rand: Uniform ``[0, 1)`` source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        ratios: Optional[Mapping[str, float]] = None,
+        limits: Optional[Mapping[str, float]] = None,
+        slow_ms: Optional[float] = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self._ratios = dict(ratios or {})
+        self._limits = dict(limits or {})
+        self._slow_ms = slow_ms
+        self._clock = clock
+        self._rand = rand
+        self._windows: dict[str, _Window] = {}
+        self._sampled = frozenset(self._ratios) | frozenset(self._limits)
+
+    def __bool__(self) -> bool:
+        return bool(self._sampled)
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: structlog.types.EventDict
+    ) -> structlog.types.EventDict:
+        event = event_dict.get("event")
+        if event not in self._sampled or method_name in _ALWAYS_KEEP:
+            return event_dict
+
+        probability = self._ratios.get(event, 1.0)
+        limit = self._limits.get(event)
+        if limit is not None:
+            probability = min(probability, self._adaptive(event, limit))
+        if probability >= 1.0:
+            return event_dict
+
+        slow_ms = self._slow_ms
+        if slow_ms is not None and event_dict.get("processing_ms", 0) >= slow_ms:
+            return event_dict
+        if self._rand() >= probability:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = probability
+        return event_dict
+
+    def _adaptive(self, event: str, limit: float) -> float:
+        now = self._clock()
+        window = self._windows.get(event)
+        if window is None:
+            window = self._windows[event] = _Window(now)
+        elif now - window.start >= 1.0:
+            # Rate of the window that just ended sets the probability for this one;
+            # after an idle gap longer than a window, start again at 1.
+            idle = now - window.start >= 2.0
+            window.probability = 1.0 if idle else min(1.0, limit / max(window.count, 1))
+            window.start = now
+            window.count = 0
+        window.count += 1
+        return window.probability
@@ -2,6 +2,10 @@
 
 In ``development`` mode logs are rendered as coloured, human-readable text.
 In ``production`` mode logs are emitted as JSON for log aggregators.
+With ``LOG_ASYNC=true`` records are rendered and written off the event loop
+by :class:`~bot.utils.log_queue.BackgroundLogHandler`. High-volume events
+can be sampled with ``LOG_SAMPLE_RATES`` / ``LOG_SAMPLE_LIMITS`` (see
+:mod:`bot.utils.log_sampling`).
 
 Usage::
 
@@ -15,10 +19,51 @@ from __future__ import annotations
 
 import logging
 import sys
+from typing import Any
 
 import structlog
+from structlog.types import EventDict, WrappedLogger
 
-from bot.config import settings
+from bot.config import JsonBackend, settings
+from bot.utils.json_codec import codec
+from bot.utils.log_queue import BackgroundLogHandler
+from bot.utils.log_sampling import SamplingProcessor
+from bot.utils.metrics import log_queue_depth
+
+_timestamper = structlog.processors.TimeStamper(fmt="iso")
+
+# Attributes set on stdlib records by :func:`_capture_caller_context`.
+_CONTEXT_ATTR = "structlog_contextvars"
+_TIMESTAMP_ATTR = "structlog_timestamp"
+
+
+def _capture_caller_context(record: logging.LogRecord) -> None:
+    """Attach the emit time and the caller's context variables to a stdlib record.
+
+    Runs in :meth:`BackgroundLogHandler.emit` on the logging thread; the
+    writer thread that renders the record later has neither.
+    """
+    if hasattr(record, "_logger"):
+        return  # a structlog record: its chain already ran on the caller
+    setattr(record, _CONTEXT_ATTR, structlog.contextvars.get_contextvars())
+    setattr(record, _TIMESTAMP_ATTR, _timestamper(None, "", {})["timestamp"])
+
+
+def _caller_contextvars(logger: WrappedLogger, method: str, event_dict: EventDict) -> EventDict:
+    """``merge_contextvars`` using the variables captured when the record was emitted."""
+    context: dict[str, Any] | None = getattr(event_dict.get("_record"), _CONTEXT_ATTR, None)
+    if context is None:
+        return structlog.contextvars.merge_contextvars(logger, method, event_dict)
+    return {**context, **event_dict}
+
+
+def _caller_timestamp(logger: WrappedLogger, method: str, event_dict: EventDict) -> EventDict:
+    """``TimeStamper`` using the time captured when the record was emitted."""
+    timestamp = getattr(event_dict.get("_record"), _TIMESTAMP_ATTR, None)
+    if timestamp is None:
+        return _timestamper(logger, method, event_dict)
+    event_dict["timestamp"] = timestamp
+    return event_dict
 
 
 def configure_logging() -> None:
@@ -32,17 +77,36 @@ def configure_logging() -> None:
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
+        _timestamper,
+        structlog.processors.StackInfoRenderer(),
+    ]
+    # Stdlib records may be rendered on the writer thread (LOG_ASYNC): take the
+    # time and context variables captured when they were emitted.
+    foreign_pre_chain: list[structlog.types.Processor] = [
+        _caller_contextvars,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        _caller_timestamp,
         structlog.processors.StackInfoRenderer(),
     ]
 
     if settings.log_json or settings.is_production:
-        renderer: structlog.types.Processor = structlog.processors.JSONRenderer()
+        renderer: structlog.types.Processor = structlog.processors.JSONRenderer(
+            serializer=codec.dumps
+        )
     else:
         renderer = structlog.dev.ConsoleRenderer(colors=True)
 
+    # Sampling runs first so dropped events cost as little as possible.
+    sampler = SamplingProcessor(
+        ratios=settings.log_sample_rates,
+        limits=settings.log_sample_limits,
+        slow_ms=settings.log_sample_slow_ms,
+    )
+
     structlog.configure(
         processors=[
+            *([sampler] if sampler else []),
             *shared_processors,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
@@ -52,17 +116,30 @@ def configure_logging() -> None:
     )
 
     formatter = structlog.stdlib.ProcessorFormatter(
-        foreign_pre_chain=shared_processors,
+        foreign_pre_chain=foreign_pre_chain,
         processors=[
             structlog.stdlib.ProcessorFormatter.remove_processors_meta,
             renderer,
         ],
     )
 
-    handler = logging.StreamHandler(sys.stdout)
+    handler: logging.Handler
+    if settings.log_async:
+        handler = BackgroundLogHandler(
+            sys.stdout,
+            max_queue=settings.log_queue_size,
+            batch_size=settings.log_batch_size,
+            prepare=_capture_caller_context,
+        )
+        log_queue_depth.set_function(handler.__len__)
+    else:
+        handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(formatter)
 
     root_logger = logging.getLogger()
+    for previous in root_logger.handlers:
+        if isinstance(previous, BackgroundLogHandler):
+            previous.close()
     root_logger.handlers = [handler]
     root_logger.setLevel(log_level)
 
@@ -72,6 +149,11 @@ def configure_logging() -> None:
             logging.DEBUG if settings.debug else logging.WARNING
         )
 
+    if settings.json_backend is not JsonBackend.auto and codec.name != settings.json_backend:
+        get_logger(__name__).warning(
+            "json_backend_unavailable", requested=settings.json_backend.value, using=codec.name
+        )
+
 
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """Return a structlog logger bound to *name*.
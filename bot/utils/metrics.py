@@ -0,0 +1,368 @@
+"""In-process metrics with Prometheus text exposition.
+
+A tiny registry of counters, gauges and histograms — no client library and
+no push gateway. Scrape ``GET /metrics`` on the webhook server, or on the
+side server started by :func:`start_metrics_server` in polling mode.
+
+Hot-path updates are cheap: a labelled child is created once per label
+combination and cached, after which ``inc()`` / ``observe()`` only touch
+preallocated numbers. All formatting happens at scrape time.
+
+Usage::
+
+    from bot.utils.metrics import throttled_total, update_duration_seconds
+
+    throttled_total.inc()
+    update_duration_seconds.labels("message").observe(0.042)
+"""
+
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds: 1 ms … 10 s.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: tuple[float, ...]) -> None:
+        self._upper_bounds = upper_bounds
+        # One slot per bucket plus +Inf; stored per bucket, made cumulative on render.
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+ChildT = TypeVar("ChildT", _CounterChild, _GaugeChild, _HistogramChild)
+
+
+class _Metric(ABC, Generic[ChildT]):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], ChildT] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str) -> ChildT:
+        """Return the child for *values*, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> ChildT:
+        """Create the value holder for one label combination."""
+
+    @abstractmethod
+    def _samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        """Yield ``(suffix, labels, value)`` for every sample of the metric."""
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {_escape_help(self.documentation)}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for suffix, labels, value in self._samples():
+            yield f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Counter(_Metric[_CounterChild]):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter."""
+        self._default.value += amount
+
+    def _samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for values, child in self._children.items():
+            yield "", tuple(zip(self.labelnames, values)), child.value
+
+
+class Gauge(_Metric[_GaugeChild]):
+    """Value that can go up and down.
+
+    Args:
+        function: If given, the unlabelled gauge reports ``function()`` at
+            scrape time instead of a stored value.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Callable[[], float] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge."""
+        self._default.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Report ``function()`` at scrape time."""
+        self._function = function
+
+    def _samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        if self._function is not None:
+            yield "", (), float(self._function())
+            return
+        for values, child in self._children.items():
+            yield "", tuple(zip(self.labelnames, values)), child.value
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """Distribution of observed values in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self._upper_bounds = tuple(sorted(b for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._upper_bounds)
+
+    def observe(self, value: float) -> None:
+        """Record *value* on the unlabelled histogram."""
+        self._default.observe(value)
+
+    def _samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        bounds = [*map(_format_value, self._upper_bounds), "+Inf"]
+        for values, child in self._children.items():
+            labels = tuple(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                yield "_bucket", (*labels, ("le", bound)), cumulative
+            yield "_sum", labels, child.sum
+            yield "_count", labels, child.count
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# ── Bot metrics ──────────────────────────────────────────────────────────────
+
+registry = MetricsRegistry()
+
+update_duration_seconds = registry.register(
+    Histogram(
+        "bot_update_duration_seconds",
+        "Time to process an update, from the outer middleware down.",
+        ["update_type"],
+    )
+)
+handler_calls_total = registry.register(
+    Counter("bot_handler_calls_total", "Handler invocations.", ["update_type", "handler"])
+)
+handler_errors_total = registry.register(
+    Counter("bot_handler_errors_total", "Handlers that raised.", ["update_type", "handler"])
+)
+handler_duration_seconds = registry.register(
+    Histogram(
+        "bot_handler_duration_seconds",
+        "Time spent in a handler and its inner middlewares.",
+        ["update_type", "handler"],
+    )
+)
+throttled_total = registry.register(
+    Counter("bot_throttled_updates_total", "Updates dropped by throttling.")
+)
+db_checkouts_total = registry.register(
+    Counter("bot_db_checkouts_total", "Connections checked out of the pool (one per DB session).")
+)
+db_checked_out = registry.register(
+    Gauge("bot_db_connections_in_use", "Pool connections currently checked out.")
+)
+api_request_duration_seconds = registry.register(
+    Histogram(
+        "bot_api_request_duration_seconds",
+        "Latency of outbound Bot API calls.",
+        ["method"],
+    )
+)
+api_errors_total = registry.register(
+    Counter("bot_api_errors_total", "Outbound Bot API calls that failed.", ["method", "error"])
+)
+api_queue_wait_seconds = registry.register(
+    Histogram(
+        "bot_api_queue_wait_seconds",
+        "Time outbound calls waited for flood-control tokens.",
+        ["priority"],
+    )
+)
+api_retry_after_total = registry.register(
+    Counter("bot_api_retry_after_total", "RetryAfter answers retried transparently.", ["method"])
+)
+
+webhook_queue_depth = registry.register(
+    Gauge("bot_webhook_queue_depth", "Webhook updates waiting for a worker.", function=lambda: 0)
+)
+webhook_rejected_total = registry.register(
+    Counter("bot_webhook_rejected_total", "Webhook requests refused because the queue was full.")
+)
+
+chat_lanes_active = registry.register(
+    Gauge("bot_chat_lanes_active", "Chats with queued or running updates.", function=lambda: 0)
+)
+
+log_records_dropped_total = registry.register(
+    Counter("bot_log_records_dropped_total", "Log records dropped because the log queue was full.")
+)
+log_queue_depth = registry.register(
+    Gauge("bot_log_queue_depth", "Log records waiting for the writer thread.", function=lambda: 0)
+)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count pool checkouts of *engine* and report connections in use."""
+    from sqlalchemy import event
+
+    checkouts = db_checkouts_total.labels()
+    in_use = db_checked_out.labels()
+
+    def _on_checkout(*_: object) -> None:
+        checkouts.value += 1
+        in_use.value += 1
+
+    def _on_checkin(*_: object) -> None:
+        in_use.value -= 1
+
+    event.listen(engine.sync_engine, "checkout", _on_checkout)
+    event.listen(engine.sync_engine, "checkin", _on_checkin)
+
+
+# ── HTTP exposition ──────────────────────────────────────────────────────────
+
+async def metrics_handler(_: web.Request) -> web.Response:
+    """aiohttp handler serving :data:`registry`."""
+    return web.Response(body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` on a separate port (for polling mode).
+
+    Returns:
+        The runner; call ``await runner.cleanup()`` on shutdown.
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,86 @@
+"""Asyncio rate-limiting primitives.
+
+Usage::
+
+    bucket = TokenBucket(rate=25)        # 25 operations per second
+    await bucket.acquire()               # waits until a token is available
+    bucket.pause(retry_after)            # e.g. after Telegram's RetryAfter
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """Token bucket shared by any number of coroutines.
+
+    Waiters are served in FIFO order. :meth:`pause` empties the bucket and
+    blocks every waiter until the pause is over — useful when the remote
+    side asks us to back off globally.
+
+    Args:
+        rate: Tokens added per second.
+        capacity: Maximum burst size. Defaults to ``max(1, rate)``.
+        clock: Monotonic time source.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self._capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take *tokens* if available right now, without waiting."""
+        now = self._clock()
+        if now < self._paused_until or self._lock.locked():
+            return False
+        self._refill(now)
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait for *tokens* and take them.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        start = self._clock()
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return self._clock() - start
+                await asyncio.sleep((tokens - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket and block all acquirers for *seconds*."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated = now
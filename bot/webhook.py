@@ -0,0 +1,137 @@
+"""Webhook ingestion through a bounded queue.
+
+:class:`QueuedRequestHandler` is a drop-in replacement for aiogram's
+``SimpleRequestHandler``. It answers Telegram as soon as the update is
+parsed and queued, and a fixed pool of workers feeds queued updates to the
+dispatcher. When the queue is full the request is refused with
+``503 Service Unavailable`` and a ``Retry-After`` header. Telegram redelivers
+unacknowledged updates later, so a slow database turns into backpressure
+instead of an unbounded pile of tasks.
+
+Enable with ``WEBHOOK_QUEUE_SIZE>0``; see :func:`bot.main.run_webhook`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from bot.utils.logger import get_logger
+from bot.utils.metrics import webhook_queue_depth, webhook_rejected_total
+
+logger = get_logger(__name__)
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """ACK webhook requests immediately and process updates from a bounded queue.
+
+    Args:
+        dispatcher: Dispatcher that processes the updates.
+        bot: Bot the webhook belongs to.
+        max_queue: Updates waiting for a worker at most.
+        workers: Concurrent ``feed_update`` calls.
+        retry_after: Seconds advertised in ``Retry-After`` when the queue is full.
+        drain_timeout: Seconds :meth:`close` waits for queued updates.
+        secret_token: Expected ``X-Telegram-Bot-Api-Secret-Token``.
+        **data: Extra keyword arguments passed to handlers.
+
+    Example::
+
+        QueuedRequestHandler(dp, bot, max_queue=1000, workers=32).register(app, path="/webhook")
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        *,
+        max_queue: int = 1000,
+        workers: int = 16,
+        retry_after: int = 1,
+        drain_timeout: float = 10.0,
+        secret_token: str | None = None,
+        **data: Any,
+    ) -> None:
+        super().__init__(dispatcher, bot, secret_token=secret_token, **data)
+        self._queue: asyncio.Queue[tuple[Bot, dict[str, Any]]] = asyncio.Queue(max_queue)
+        self._worker_count = workers
+        self._retry_after = str(retry_after)
+        self._drain_timeout = drain_timeout
+        self._workers: list[asyncio.Task[None]] = []
+        self.rejected = 0
+        webhook_queue_depth.set_function(self._queue.qsize)
+
+    @property
+    def queue_depth(self) -> int:
+        """Updates currently waiting for a worker."""
+        return self._queue.qsize()
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._handle_start)
+        super().register(app, path=path, **kwargs)
+
+    async def _handle_start(self, app: web.Application) -> None:
+        self.start()
+
+    def start(self) -> None:
+        """Spawn the worker pool (idempotent)."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"webhook-worker-{i}")
+                for i in range(self._worker_count)
+            ]
+
+    async def close(self) -> None:
+        """Drain the queue (up to *drain_timeout*), stop workers, close the bot session."""
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), self._drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("webhook_queue_not_drained", pending=self._queue.qsize())
+            for task in self._workers:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await super().close()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+        if self._queue.full():
+            return self._reject()
+
+        # Decode the raw bytes: orjson and msgspec parse them without a str copy.
+        update = bot.session.json_loads(await request.read())
+        try:
+            self._queue.put_nowait((bot, update))
+        except asyncio.QueueFull:
+            return self._reject()
+        return web.Response()
+
+    __call__ = handle
+
+    def _reject(self) -> web.Response:
+        self.rejected += 1
+        webhook_rejected_total.inc()
+        return web.Response(
+            status=503, text="Update queue is full", headers={"Retry-After": self._retry_after}
+        )
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            bot, update = await queue.get()
+            try:
+                result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=bot, result=result)
+            except Exception as exc:
+                logger.exception("webhook_update_failed", error=str(exc))
+            finally:
+                queue.task_done()
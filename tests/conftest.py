@@ -3,14 +3,23 @@
 from __future__ import annotations
 
 import os
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, ContextManager
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 # Force test environment before any bot imports
 os.environ.setdefault("BOT_TOKEN", "0:fake_token_for_tests")
@@ -49,6 +58,60 @@ async def db_session(engine, create_db) -> AsyncGenerator[AsyncSession, None]:
         await session.rollback()
 
 
+@pytest.fixture
+async def make_db(
+    tmp_path: Path,
+) -> AsyncGenerator[Callable[..., Awaitable[async_sessionmaker[AsyncSession]]], None]:
+    """Factory for private databases with the schema created.
+
+    ``await make_db()`` returns a session factory over a fresh in-memory
+    database; ``await make_db(file=True)`` uses a SQLite file instead, so
+    separate sessions get separate connections and see only committed rows.
+    The engine is ``factory.kw["bind"]``. Engines are disposed after the test.
+    """
+    engines: list[AsyncEngine] = []
+
+    async def _make(file: bool = False) -> async_sessionmaker[AsyncSession]:
+        path = tmp_path / f"db{len(engines)}.sqlite"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path if file else ':memory:'}")
+        engines.append(engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, expire_on_commit=False)
+
+    yield _make
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.fixture
+def capture_statements() -> Callable[[Any], ContextManager[list[str]]]:
+    """Context manager recording the SQL keyword of every statement an engine runs.
+
+    Usage::
+
+        with capture_statements(engine) as statements:
+            ...
+        assert statements == ["SELECT", "UPDATE"]
+    """
+
+    @contextmanager
+    def _capture(engine: Any) -> Iterator[list[str]]:
+        sync_engine = getattr(engine, "sync_engine", engine)
+        statements: list[str] = []
+
+        def _record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+            statements.append(statement.split()[0])
+
+        event.listen(sync_engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", _record)
+
+    return _capture
+
+
 # ── Bot / Dispatcher ──────────────────────────────────────────────────────────
 
 @pytest.fixture
@@ -87,6 +150,26 @@ def tg_user():
     )
 
 
+@pytest.fixture
+def make_tg_user() -> Callable[..., MagicMock]:
+    """Factory for minimal fake Telegram users (profile fields only)."""
+    def _make(
+        user_id: int = 42,
+        username: str = "tester",
+        first_name: str = "Test",
+        last_name: str | None = "User",
+    ) -> MagicMock:
+        user = MagicMock()
+        user.id = user_id
+        user.username = username
+        user.first_name = first_name
+        user.last_name = last_name
+        user.language_code = "en"
+        user.is_bot = False
+        return user
+    return _make
+
+
 @pytest.fixture
 def make_message(tg_user, bot):
     """Factory for creating fake Message objects."""
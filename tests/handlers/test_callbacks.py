@@ -0,0 +1,26 @@
+"""Integration tests for callback query handlers."""
+
+from __future__ import annotations
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from bot.handlers.callbacks import cb_confirm
+from bot.utils.callback_router import CallbackParts
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("parts", "expected"),
+    [
+        (CallbackParts("confirm", "yes", "delete"), "Действие 'delete' подтверждено"),
+        (CallbackParts("confirm", "yes", None), "Подтверждено"),
+        (CallbackParts("confirm", "no", None), "Отменено"),
+    ],
+)
+async def test_cb_confirm_answers(parts, expected):
+    """cb_confirm names the action only when the callback data carries one."""
+    callback = MagicMock()
+    callback.answer = AsyncMock()
+    await cb_confirm(callback, parts)
+    assert callback.answer.call_args[0][0] == expected
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 from bot.handlers.commands import cmd_help, cmd_settings, cmd_start
 
@@ -33,8 +33,10 @@ async def test_cmd_start_no_from_user():
     msg = MagicMock()
     msg.from_user = None
     msg.answer = AsyncMock()
-    await cmd_start(msg)
+    db = MagicMock()
+    await cmd_start(msg, db)
     msg.answer.assert_not_awaited()
+    db.users.get_or_create.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -50,20 +52,14 @@ async def test_cmd_start_creates_user(make_message):
     fake_user.created_at = datetime.utcnow()
 
     msg = make_message("/start")
+    db = MagicMock()
+    db.users.get_or_create = AsyncMock(return_value=(fake_user, True))
+    db.commit = AsyncMock()
 
-    with patch("bot.handlers.commands.AsyncSessionFactory") as mock_factory, \
-         patch("bot.handlers.commands.UserRepository") as mock_repo_cls:
-
-        mock_session = AsyncMock()
-        mock_factory.return_value.__aenter__ = AsyncMock(return_value=mock_session)
-        mock_factory.return_value.__aexit__ = AsyncMock(return_value=False)
-
-        mock_repo = AsyncMock()
-        mock_repo.get_or_create = AsyncMock(return_value=(fake_user, True))
-        mock_repo_cls.return_value = mock_repo
-
-        await cmd_start(msg)
+    await cmd_start(msg, db)
 
+    db.users.get_or_create.assert_awaited_once_with(msg.from_user)
+    db.commit.assert_awaited_once()
     msg.answer.assert_awaited_once()
     text = msg.answer.call_args[0][0]
     assert "Test User" in text
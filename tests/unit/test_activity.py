@@ -0,0 +1,76 @@
+"""Unit tests for the coalescing ActivityTracker."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from bot.database.activity import ActivityTracker
+from bot.database.models import Session
+from bot.database.repository import SessionRepository, UserRepository
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+async def db(make_db, make_tg_user, capture_statements):
+    """A private database where users 9001 and 9002 have an active session."""
+    factory = await make_db()
+    async with factory() as session:
+        for telegram_id in (9001, 9002):
+            user = await UserRepository(session).create(make_tg_user(user_id=telegram_id))
+            await SessionRepository(session).create(user.id)
+        await session.commit()
+
+    with capture_statements(factory.kw["bind"]) as statements:
+        yield factory, statements
+
+
+async def _last_seen(factory) -> list[datetime]:  # type: ignore[no-untyped-def]
+    async with factory() as session:
+        result = await session.execute(select(Session.last_seen_at).order_by(Session.user_id))
+        return [value.replace(tzinfo=None) for value in result.scalars()]
+
+
+@pytest.mark.asyncio
+async def test_touches_are_coalesced_into_one_write(db):
+    """Many touches become one executemany UPDATE; the latest touch per user wins."""
+    factory, statements = db
+    tracker = ActivityTracker(factory, interval=60)
+    for offset in range(100):
+        tracker.touch(9001, at=T0 + offset)
+    tracker.touch(9002, at=T0)
+    tracker.touch(777, at=T0)  # no session: skipped
+    assert len(tracker) == 3 and not statements
+
+    assert await tracker.flush() == 3
+    assert statements.count("UPDATE") == 1
+    assert await _last_seen(factory) == [datetime(2024, 1, 1, 0, 1, 39), datetime(2024, 1, 1)]
+    assert await tracker.flush() == 0
+
+    tracker.touch(9002, at=T0 + 60)
+    await tracker.close()
+    assert (await _last_seen(factory))[1] == datetime(2024, 1, 1, 0, 1)
+    assert tracker.touches == 103 and tracker.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_newer_touches(db):
+    """Rows of a failed flush are retried without overwriting later touches."""
+    factory, _ = db
+
+    def broken_factory():  # type: ignore[no-untyped-def]
+        raise ConnectionError("database is down")
+
+    tracker = ActivityTracker(broken_factory, interval=60)  # type: ignore[arg-type]
+    tracker.touch(9001, at=T0)
+    with pytest.raises(ConnectionError):
+        await tracker.flush()
+    assert len(tracker) == 1
+
+    tracker.touch(9001, at=T0 + 30)
+    tracker._session_factory = factory
+    assert await tracker.flush() == 1
+    assert (await _last_seen(factory))[0] == datetime(2024, 1, 1, 0, 0, 30)
@@ -0,0 +1,158 @@
+"""Unit tests for the Broadcaster service and the TokenBucket it uses."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.database.models import BroadcastStatus
+from bot.database.repository import BroadcastRepository, UserRepository
+from bot.services.broadcast import Broadcaster
+from bot.utils.rate_limit import TokenBucket
+
+BLOCKED_ID = 7003
+FLOODED_ID = 7005
+
+
+@pytest.fixture
+async def session_factory(make_db, make_tg_user):
+    """A private database, so recipients are exactly the users created here.
+
+    A file, because the producer, workers and checkpoints hold separate connections.
+    """
+    factory = await make_db(file=True)
+    async with factory() as session:
+        repo = UserRepository(session)
+        for telegram_id in range(7001, 7011):
+            await repo.create(make_tg_user(user_id=telegram_id))
+        await session.commit()
+    return factory
+
+
+def _flaky_bot() -> MagicMock:
+    method = SendMessage(chat_id=0, text="")
+    flooded = False
+
+    async def send_message(chat_id: int, text: str) -> None:
+        nonlocal flooded
+        if chat_id == BLOCKED_ID:
+            raise TelegramForbiddenError(method, "Forbidden: bot was blocked by the user")
+        if chat_id == FLOODED_ID and not flooded:
+            flooded = True
+            raise TelegramRetryAfter(method, "Flood control exceeded", retry_after=0)
+
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=send_message)
+    return bot
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reports_and_deactivates_blocked(session_factory):
+    """Every user is attempted once; blocked users are deactivated."""
+    bot = _flaky_bot()
+    broadcaster = Broadcaster(
+        bot, session_factory, concurrency=3, rate=1000, chat_interval=0, batch_size=4
+    )
+    report = await broadcaster.start("hello")
+
+    assert report.status == BroadcastStatus.done
+    assert (report.sent, report.blocked, report.failed, report.retries) == (9, 1, 0, 1)
+    assert bot.send_message.await_count == 11
+
+    async with session_factory() as session:
+        blocked = await UserRepository(session).get_by_telegram_id(BLOCKED_ID)
+        saved = await BroadcastRepository(session).get(report.broadcast_id)
+    assert blocked.is_active is False
+    assert (saved.status, saved.sent, saved.blocked) == (BroadcastStatus.done, 9, 1)
+    assert saved.last_user_id == 10
+
+    with pytest.raises(ValueError):
+        await broadcaster.resume(report.broadcast_id)
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_after_checkpoint(session_factory):
+    """A resumed broadcast skips recipients before the saved watermark."""
+    async with session_factory() as session:
+        repo = BroadcastRepository(session)
+        broadcast = await repo.create("hello")
+        await repo.save_progress(broadcast.id, last_user_id=6, sent=6, failed=0, blocked=0)
+        await session.commit()
+
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    report = await Broadcaster(
+        bot, session_factory, concurrency=2, rate=1000, chat_interval=0
+    ).resume(broadcast.id)
+
+    sent_to = sorted(call.args[0] for call in bot.send_message.await_args_list)
+    assert sent_to == [7007, 7008, 7009, 7010]
+    assert (report.sent, report.processed_this_run) == (10, 4)
+
+
+@pytest.mark.asyncio
+async def test_resume_after_mid_page_crash_counts_each_user_once(session_factory):
+    """Rows finished past the checkpointed cursor are counted by the resume only."""
+    later_sent = asyncio.Event()
+
+    async def send_message(chat_id: int, text: str) -> None:
+        if chat_id == 7004:
+            # Fail only after later rows of the same page went out.
+            await later_sent.wait()
+            raise RuntimeError("worker crashed")
+        if chat_id == 7006:
+            later_sent.set()
+
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=send_message)
+    broadcaster = Broadcaster(
+        bot, session_factory, concurrency=3, rate=1000, chat_interval=0, batch_size=4
+    )
+    with pytest.raises(RuntimeError):
+        await broadcaster.start("hello")
+
+    async with session_factory() as session:
+        saved = await BroadcastRepository(session).get(1)
+    assert (saved.status, saved.last_user_id, saved.sent) == (BroadcastStatus.running, 3, 3)
+
+    bot.send_message = AsyncMock()
+    report = await Broadcaster(
+        bot, session_factory, concurrency=3, rate=1000, chat_interval=0, batch_size=4
+    ).resume(saved.id)
+
+    sent_to = sorted(call.args[0] for call in bot.send_message.await_args_list)
+    assert sent_to == list(range(7004, 7011))
+    assert (report.sent, report.processed_this_run, report.processed) == (10, 7, 10)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fails_instead_of_hanging_when_workers_die(session_factory):
+    """With every worker dead the run raises rather than blocking on a full queue."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=RuntimeError("boom"))
+    broadcaster = Broadcaster(
+        bot, session_factory, concurrency=1, rate=1000, chat_interval=0, batch_size=10
+    )
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(broadcaster.start("hello"), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_and_pauses():
+    """Burst up to capacity, then wait; pause drains the bucket."""
+    now = 0.0
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    now = 0.5
+    assert bucket.try_acquire()
+    bucket.pause(10)
+    now = 5.0
+    assert not bucket.try_acquire()
+    now = 11.0
+    assert bucket.try_acquire()
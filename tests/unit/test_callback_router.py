@@ -0,0 +1,92 @@
+"""Unit tests for the indexed callback router."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from bot.utils.callback_router import CallbackParts, CallbackRouter
+
+
+def _update(data: str | None, update_id: int = 1) -> Update:
+    user = User(id=1, is_bot=False, first_name="Test")
+    message = Message(
+        message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"), text="menu"
+    )
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id), from_user=user, chat_instance="1", message=message, data=data
+        ),
+    )
+
+
+@pytest.fixture
+def routed():
+    router = CallbackRouter(name="test")
+    calls: list[tuple[str, CallbackParts | None]] = []
+
+    @router.route("menu:main")
+    async def menu(callback: CallbackQuery) -> None:
+        calls.append(("menu", None))
+
+    @router.route("noop")
+    async def noop(callback: CallbackQuery, callback_parts: CallbackParts) -> None:
+        calls.append(("noop", callback_parts))
+
+    @router.route("items:page:*")
+    async def page(callback: CallbackQuery, callback_parts: CallbackParts) -> None:
+        calls.append(("page", callback_parts))
+
+    @router.route("items:*")
+    async def items(callback: CallbackQuery, callback_parts: CallbackParts, handler) -> None:
+        calls.append((handler.callback.__name__, callback_parts))
+
+    @router.callback_query(F.data == "legacy")
+    async def legacy(callback: CallbackQuery) -> None:
+        calls.append(("legacy", None))
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp, router, calls
+
+
+@pytest.mark.asyncio
+async def test_dispatches_exact_then_action_then_prefix(routed):
+    """The most specific route wins; parsed parts and the route handler are injected."""
+    dp, router, calls = routed
+    bot = Bot("42:TEST")
+    for i, data in enumerate(["menu:main", "noop", "items:page:3", "items:page", "items:x:y:z"]):
+        await dp.feed_update(bot, _update(data, i))
+
+    assert calls == [
+        ("menu", None),
+        ("noop", CallbackParts("noop", "", None)),
+        ("page", CallbackParts("items", "page", "3")),
+        ("items", CallbackParts("items", "page", None)),
+        ("items", CallbackParts("items", "x", "y:z")),
+    ]
+    assert len(router) == 4
+
+
+@pytest.mark.asyncio
+async def test_unmatched_falls_through_to_regular_handlers(routed):
+    """Filter-based handlers on the same router still run; unknown data is unhandled."""
+    dp, _, calls = routed
+    bot = Bot("42:TEST")
+    await dp.feed_update(bot, _update("legacy"))
+    await dp.feed_update(bot, _update("items"))  # no separator: not under "items:*"
+    await dp.feed_update(bot, _update(None))
+    assert calls == [("legacy", None)]
+
+
+def test_rejects_duplicate_and_malformed_routes():
+    router = CallbackRouter()
+    router.add_route("confirm:*", lambda callback: None)
+    with pytest.raises(ValueError):
+        router.add_route("confirm:*", lambda callback: None)
+    with pytest.raises(ValueError):
+        router.add_route("a:*:b:*", lambda callback: None)
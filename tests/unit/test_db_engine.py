@@ -0,0 +1,66 @@
+"""Unit tests for the dialect-aware engine builder."""
+
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import text
+
+from bot.config import Settings
+from bot.database.engine import build_engine, engine_options
+
+
+def _settings(**overrides) -> Settings:  # type: ignore[no-untyped-def]
+    return Settings(bot_token="0:test", **overrides)
+
+
+def test_options_follow_the_dialect():
+    """Pool options skip in-memory SQLite; asyncpg gets its statement cache size."""
+    settings = _settings(db_pool_size=7, db_statement_cache_size=0)
+
+    memory = engine_options("sqlite+aiosqlite:///:memory:", settings)
+    assert "pool_size" not in memory and "connect_args" not in memory
+
+    postgres = engine_options("postgresql+asyncpg://u:p@db/bot", settings)
+    assert postgres["pool_size"] == 7
+    assert postgres["connect_args"] == {"prepared_statement_cache_size": 0}
+    assert postgres["pool_pre_ping"] is False
+    assert engine_options("sqlite+aiosqlite:///x.db", _settings(db_pre_ping_interval=0))[
+        "pool_pre_ping"
+    ]
+
+
+def test_sqlite_file_pool_defaults_to_one_connection():
+    """SQLite files default to one pooled connection; explicit sizes still apply."""
+    default = engine_options("sqlite+aiosqlite:///x.db", _settings())
+    assert (default["pool_size"], default["max_overflow"]) == (1, 0)
+
+    sized = engine_options("sqlite+aiosqlite:///x.db", _settings(db_pool_size=4))
+    assert (sized["pool_size"], sized["max_overflow"]) == (4, 0)
+
+    postgres = engine_options("postgresql+asyncpg://u:p@db/bot", _settings())
+    assert (postgres["pool_size"], postgres["max_overflow"]) == (10, 10)
+
+
+async def test_sqlite_pragmas_and_timed_ping(tmp_path, monkeypatch):
+    """New SQLite connections get WAL and friends; only idle connections are pinged."""
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}",
+        _settings(db_pre_ping_interval=0.2, db_sqlite_busy_timeout_ms=1234),
+    )
+    pings: list[object] = []
+    monkeypatch.setattr(engine.sync_engine.dialect, "do_ping", pings.append)
+
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 1234
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert pings == []
+
+    await asyncio.sleep(0.25)  # idle longer than the interval
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert len(pings) == 1
+    await engine.dispose()
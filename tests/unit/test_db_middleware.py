@@ -0,0 +1,64 @@
+"""Unit tests for the per-update DatabaseMiddleware."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+from bot.database.repository import SessionRepository, UserRepository
+from bot.middlewares.database import DatabaseContext, DatabaseMiddleware
+
+
+@pytest.fixture
+async def db(make_db):
+    """A private database plus a counter of pool checkouts."""
+    factory = await make_db()
+    checkouts = [0]
+    event.listen(
+        factory.kw["bind"].sync_engine,
+        "checkout",
+        lambda *_: checkouts.__setitem__(0, checkouts[0] + 1),
+    )
+    return factory, checkouts
+
+
+async def test_connection_is_used_only_when_queried(db, make_tg_user):
+    """Handlers that never query cost no connection; two repositories share one."""
+    factory, checkouts = db
+    middleware = DatabaseMiddleware(factory)
+
+    async def help_handler(event, data):  # type: ignore[no-untyped-def]
+        return "help"
+
+    data: dict = {}
+    assert await middleware(help_handler, object(), data) == "help"
+    assert not data["db"].opened and checkouts[0] == 0
+
+    async def start_handler(event, data):  # type: ignore[no-untyped-def]
+        db: DatabaseContext = data["db"]
+        user, _ = await db.users.get_or_create(make_tg_user(user_id=7001))
+        await db.sessions.create(user.id)
+
+    await middleware(start_handler, object(), {})
+    assert checkouts[0] == 1
+
+    async with factory() as session:
+        user = await UserRepository(session).get_by_telegram_id(7001)
+        assert user is not None
+        assert await SessionRepository(session).get_active(user.id) is not None
+
+
+async def test_handler_error_rolls_back(db, make_tg_user):
+    """Work done by a failing handler is discarded and the error propagates."""
+    factory, _ = db
+    middleware = DatabaseMiddleware(factory)
+
+    async def failing_handler(event, data):  # type: ignore[no-untyped-def]
+        await data["db"].users.get_or_create(make_tg_user(user_id=7002))
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await middleware(failing_handler, object(), {})
+
+    async with factory() as session:
+        assert await UserRepository(session).get_by_telegram_id(7002) is None
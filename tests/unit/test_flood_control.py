@@ -0,0 +1,85 @@
+"""Unit tests for outbound flood control."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from bot.middlewares.flood_control import (
+    FloodControlMiddleware,
+    Priority,
+    PriorityLimiter,
+    bulk_priority,
+    send_priority,
+)
+from bot.utils.metrics import api_retry_after_total
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_go_before_bulk():
+    """Once the bucket is empty, an interactive waiter overtakes queued bulk ones."""
+    limiter = PriorityLimiter(rate=200, capacity=1)
+    await limiter.acquire()
+    order: list[str] = []
+
+    async def take(name: str, priority: Priority) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+
+    tasks = [asyncio.create_task(take(f"bulk{i}", Priority.bulk)) for i in range(2)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(take("reply", Priority.interactive)))
+    await asyncio.gather(*tasks)
+
+    assert order == ["reply", "bulk0", "bulk1"]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_retried_transparently():
+    """A RetryAfter answer is retried after the pause; the caller sees success."""
+    middleware = FloodControlMiddleware(global_rate=1000)
+    method = SendMessage(chat_id=42, text="hi")
+    response = MagicMock()
+    make_request = AsyncMock(
+        side_effect=[TelegramRetryAfter(method, "Flood control", retry_after=0), response]
+    )
+    retries = api_retry_after_total.labels("sendMessage")
+    before = retries.value
+
+    assert await middleware(make_request, MagicMock(), method) is response
+    assert make_request.await_count == 2
+    assert retries.value == before + 1
+
+    make_request = AsyncMock(side_effect=TelegramRetryAfter(method, "Flood", retry_after=0))
+    with pytest.raises(TelegramRetryAfter):
+        await FloodControlMiddleware(max_retries=1)(make_request, MagicMock(), method)
+    assert make_request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_paces_per_chat_but_not_chatless_calls():
+    """Past the burst, a chat waits for its bucket; chat-less calls are not paced."""
+    middleware = FloodControlMiddleware(global_rate=1000, chat_rate=20, chat_burst=2)
+    make_request = AsyncMock()
+
+    start = time.perf_counter()
+    for _ in range(3):
+        await middleware(make_request, MagicMock(), SendMessage(chat_id=7, text="x"))
+    assert time.perf_counter() - start >= 0.04
+
+    start = time.perf_counter()
+    for _ in range(5):
+        await middleware(make_request, MagicMock(), AnswerCallbackQuery(callback_query_id="1"))
+    assert time.perf_counter() - start < 0.04
+
+
+def test_bulk_priority_context():
+    """bulk_priority marks sends as bulk only inside the block."""
+    with bulk_priority():
+        assert send_priority.get() is Priority.bulk
+    assert send_priority.get() is Priority.interactive
@@ -0,0 +1,34 @@
+"""Unit tests for the tuned Bot API session."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendDocument, SendMessage
+
+from bot.utils.http import TunedAiohttpSession
+
+
+@pytest.mark.asyncio
+async def test_connector_settings_and_method_timeouts():
+    """Pool settings reach the connector; per-method timeouts override the default."""
+    session = TunedAiohttpSession(
+        limit=7, keepalive_timeout=5, ttl_dns_cache=60, method_timeouts={"sendDocument": 120}
+    )
+    assert session._connector_init["limit"] == 7
+    assert session._connector_init["keepalive_timeout"] == 5
+    assert session._connector_init["ttl_dns_cache"] == 60
+
+    with patch.object(AiohttpSession, "make_request", AsyncMock()) as make_request:
+        await session.make_request(MagicMock(), SendDocument(chat_id=1, document="file-id"))
+        await session.make_request(MagicMock(), SendMessage(chat_id=1, text="hi"))
+        await session.make_request(MagicMock(), SendMessage(chat_id=1, text="hi"), timeout=3)
+
+    timeouts = [call.kwargs["timeout"] for call in make_request.await_args_list]
+    assert timeouts == [120, None, 3]
+
+    connector_session = await session.create_session()
+    assert connector_session.connector.limit == 7
+    await session.close()
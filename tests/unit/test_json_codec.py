@@ -0,0 +1,36 @@
+"""Unit tests for JSON codec selection."""
+
+from __future__ import annotations
+
+import sys
+from datetime import date
+
+import pytest
+
+from bot.utils.json_codec import BACKENDS, get_codec
+
+PAYLOAD = {"update_id": 1, "message": {"text": "Привет", "entities": [{"offset": 0}]}}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_round_trip_and_default_hook(backend):
+    """Every installed backend decodes str and bytes and honours ``default``."""
+    if backend != "json":
+        pytest.importorskip(backend)
+    codec = get_codec(backend)
+    assert codec.name == backend
+
+    text = codec.dumps(PAYLOAD)
+    assert isinstance(text, str)
+    assert codec.loads(text) == codec.loads(text.encode()) == PAYLOAD
+    assert codec.loads(codec.dumps({"day": date(2024, 5, 1)}, default=str)) == {
+        "day": "2024-05-01"
+    }
+
+
+def test_missing_backend_falls_back_to_stdlib(monkeypatch):
+    """An explicit but uninstalled backend falls back; unknown names are rejected."""
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    assert get_codec("msgspec").name == "json"
+    with pytest.raises(ValueError):
+        get_codec("simplejson")
@@ -0,0 +1,57 @@
+"""Unit tests for the keyboard registry."""
+
+from __future__ import annotations
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.keyboards.inline import back_kb, main_menu_kb, paginate_kb
+from bot.keyboards.registry import KeyboardRegistry
+from bot.utils.http import TunedAiohttpSession
+
+
+def _fields(form) -> dict[str, str]:
+    return {options["name"]: value for options, _, value in form._fields}
+
+
+def test_static_and_memoized_keyboards_are_shared():
+    """Static keyboards are built once; parameterized ones once per arguments."""
+    assert main_menu_kb() is main_menu_kb()
+    assert back_kb("menu:main") is back_kb("menu:main")
+    assert paginate_kb(1, 5, "items") is paginate_kb(1, 5, "items")
+    assert paginate_kb(1, 5, "items") is not paginate_kb(2, 5, "items")
+
+
+def test_memoize_is_bounded():
+    """Past maxsize the least recently used keyboard is rebuilt and forgotten."""
+    registry = KeyboardRegistry(maxsize=2)
+
+    @registry.memoize
+    def kb(n: int) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text=str(n), callback_data=str(n))]]
+        )
+
+    first = kb(1)
+    kb(2)
+    kb(3)
+    assert len(registry) == 2
+    assert registry.serialized(first, str) is None
+    assert kb(1) is not first
+    assert (registry.hits, registry.misses) == (0, 4)
+
+
+def test_session_sends_cached_keyboard_json():
+    """The tuned session sends the same form as aiogram, reusing the cached JSON."""
+    bot = Bot("42:TEST", default=DefaultBotProperties(parse_mode="HTML"))
+    method = SendMessage(chat_id=1, text="hi", reply_markup=main_menu_kb())
+
+    expected = _fields(AiohttpSession().build_form_data(bot, method))
+    session = TunedAiohttpSession()
+    assert _fields(session.build_form_data(bot, method)) == expected
+    assert _fields(session.build_form_data(bot, method)) == expected
+    assert "menu:profile" in expected["reply_markup"]
+    assert expected["parse_mode"] == "HTML"
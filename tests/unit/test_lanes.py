@@ -0,0 +1,55 @@
+"""Unit tests for the per-chat lane scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot.middlewares.lanes import ChatLaneMiddleware
+
+
+@pytest.mark.asyncio
+async def test_orders_per_chat_and_bounds_concurrency():
+    """Same-chat updates finish in arrival order; chats overlap up to the limit."""
+    middleware = ChatLaneMiddleware(concurrency=2)
+    finished: dict[int, list[int]] = {1: [], 2: [], 3: []}
+    running = peak = 0
+
+    async def handler(event, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(event["delay"])
+        running -= 1
+        finished[data["event_chat"].id].append(event["seq"])
+
+    tasks = []
+    for seq in range(4):
+        for chat_id in finished:
+            event = {"seq": seq, "delay": (4 - seq) * 0.002}
+            data = {"event_chat": MagicMock(id=chat_id)}
+            tasks.append(asyncio.create_task(middleware(handler, event, data)))
+
+    await asyncio.sleep(0)
+    assert len(middleware) == 3
+    await asyncio.gather(*tasks)
+
+    assert all(seqs == [0, 1, 2, 3] for seqs in finished.values())
+    assert peak == 2
+    assert len(middleware) == 0
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_user_then_no_lane():
+    """Chat-less updates use the user's lane; anonymous ones only take a slot."""
+    middleware = ChatLaneMiddleware()
+    seen = []
+
+    async def handler(event, data):
+        seen.append(len(middleware))
+
+    await middleware(handler, None, {"event_from_user": MagicMock(id=7)})
+    await middleware(handler, None, {})
+    assert seen == [1, 0]
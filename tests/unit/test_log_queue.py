@@ -0,0 +1,103 @@
+"""Unit tests for the background log handler."""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import structlog
+
+from bot.config import settings
+from bot.utils.log_queue import BackgroundLogHandler
+from bot.utils.logger import configure_logging
+from bot.utils.metrics import log_records_dropped_total
+
+
+def _record(msg: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, None, None)
+
+
+class _GatedStream(io.StringIO):
+    """Stream whose writes block until the gate opens."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate = threading.Event()
+        self.writes = 0
+
+    def write(self, s: str) -> int:
+        self.gate.wait()
+        self.writes += 1
+        return super().write(s)
+
+
+def test_writes_in_order_in_batches_and_flushes_on_close():
+    """Queued records come out in order, several per write, all of them by close()."""
+    stream = _GatedStream()
+    handler = BackgroundLogHandler(stream, batch_size=50)
+    for i in range(100):
+        handler.emit(_record(f"line {i}"))
+    stream.gate.set()
+    handler.close()
+
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(100)]
+    assert handler.written == 100
+    assert stream.writes <= 3  # the writer may wake on the first record alone
+
+
+def test_drops_when_full_but_waits_for_errors():
+    """Low-level records are dropped on overflow and counted; errors wait for room."""
+    dropped = log_records_dropped_total.labels()
+    before = dropped.value
+    stream = _GatedStream()
+    handler = BackgroundLogHandler(stream, max_queue=2, batch_size=1, block_timeout=5)
+    handler.emit(_record("taken by the writer"))
+    while len(handler):  # wait until the writer is stuck on the gate
+        time.sleep(0.001)
+    handler.emit(_record("queued 1"))
+    handler.emit(_record("queued 2"))
+    handler.emit(_record("dropped"))
+    assert handler.dropped == 1
+    assert dropped.value == before + 1
+
+    threading.Timer(0.05, stream.gate.set).start()
+    handler.emit(_record("error", logging.ERROR))  # blocks until the writer drains
+    handler.flush()
+    handler.close()
+    assert stream.getvalue().splitlines() == [
+        "taken by the writer", "queued 1", "queued 2", "error"
+    ]
+
+
+def test_stdlib_records_keep_emit_time_and_caller_context(monkeypatch):
+    """Foreign records are stamped and given contextvars on the caller, not the writer."""
+    stream = _GatedStream()
+    monkeypatch.setattr(sys, "stdout", stream)
+    monkeypatch.setattr(settings, "log_async", True)
+    monkeypatch.setattr(settings, "log_json", True)
+    root = logging.getLogger()
+    previous = root.handlers[:], root.level
+    previous_config = structlog.get_config()
+    configure_logging()
+    handler = root.handlers[0]
+    try:
+        with structlog.contextvars.bound_contextvars(update_id=7):
+            logging.getLogger("third.party").warning("slow %s", "thing")
+        emitted = datetime.now(timezone.utc)
+        time.sleep(0.05)
+        stream.gate.set()
+        handler.flush()
+    finally:
+        handler.close()
+        root.handlers, root.level = previous
+        structlog.configure(**previous_config)
+
+    line = json.loads(stream.getvalue())
+    assert line["event"] == "slow thing"
+    assert line["update_id"] == 7
+    assert datetime.fromisoformat(line["timestamp"].replace("Z", "+00:00")) <= emitted
@@ -0,0 +1,50 @@
+"""Unit tests for the log sampling processor."""
+
+from __future__ import annotations
+
+import itertools
+
+import pytest
+import structlog
+
+from bot.utils.log_sampling import SamplingProcessor
+
+
+def _kept(sampler: SamplingProcessor, method: str = "info", **event_dict) -> dict | None:
+    try:
+        return sampler(None, method, event_dict)
+    except structlog.DropEvent:
+        return None
+
+
+def test_fixed_ratio_keeps_errors_and_slow_events():
+    """A ratio drops most events but never errors or slow updates; kept ones carry sample_rate."""
+    rolls = itertools.cycle([0.05, 0.5])
+    sampler = SamplingProcessor(
+        ratios={"update_processed": 0.1}, slow_ms=500, rand=rolls.__next__
+    )
+
+    assert _kept(sampler, event="update_processed", processing_ms=3) == {
+        "event": "update_processed", "processing_ms": 3, "sample_rate": 0.1
+    }
+    assert _kept(sampler, event="update_processed", processing_ms=3) is None
+    assert "sample_rate" not in _kept(sampler, event="update_processed", processing_ms=900)
+    assert _kept(sampler, "exception", event="update_processed") is not None
+    assert _kept(sampler, event="user_registered") == {"event": "user_registered"}
+
+
+def test_adaptive_limit_follows_previous_second():
+    """The keep probability for a second is the limit over the previous second's count."""
+    now = 0.0
+    sampler = SamplingProcessor(
+        limits={"update_received": 10}, clock=lambda: now, rand=lambda: 0.5
+    )
+
+    assert all(_kept(sampler, event="update_received") for _ in range(100))  # first second
+    now = 1.0
+    assert _kept(sampler, event="update_received") is None  # probability 10 / 100 = 0.1, roll 0.5
+    sampler._rand = lambda: 0.05
+    assert _kept(sampler, event="update_received")["sample_rate"] == pytest.approx(0.1)
+
+    now = 5.0  # after an idle gap sampling starts over
+    assert "sample_rate" not in _kept(sampler, event="update_received")
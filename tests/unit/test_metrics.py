@@ -0,0 +1,95 @@
+"""Unit tests for the metrics registry and middlewares."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram import Dispatcher
+
+from bot.config import settings
+from bot.middlewares import register_middlewares
+from bot.middlewares.metrics import MetricsMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.utils.metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    _CounterChild,
+    _Metric,
+    handler_calls_total,
+    registry,
+)
+
+
+def test_text_exposition_format():
+    """Counters, histograms and label escaping follow the text format."""
+    reg = MetricsRegistry()
+    hits = reg.register(Counter("hits_total", "Cache hits.", ["kind"]))
+    latency = reg.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+
+    hits.labels('a"b').inc()
+    hits.labels('a"b').inc(2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    lines = reg.render().splitlines()
+    assert lines[:3] == [
+        "# HELP hits_total Cache hits.",
+        "# TYPE hits_total counter",
+        'hits_total{kind="a\\"b"} 3',
+    ]
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 3.65" in lines
+    assert "latency_seconds_count 4" in lines
+
+    with pytest.raises(ValueError):
+        reg.register(Counter("hits_total", "Duplicate."))
+
+
+def test_incomplete_metric_type_cannot_be_created():
+    """A metric type without ``_samples`` fails on construction, not on scrape."""
+
+    class Incomplete(_Metric[_CounterChild]):
+        kind = "counter"
+
+        def _new_child(self) -> _CounterChild:
+            return _CounterChild()
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete_total", "Never rendered.")
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_handler_calls():
+    """Calls and errors are recorded under the handler's name."""
+
+    async def cb_sample(*_):
+        return None
+
+    middleware = MetricsMiddleware("callback_query")
+    data = {"handler": MagicMock(callback=cb_sample)}
+    calls = handler_calls_total.labels("callback_query", "cb_sample")
+    before = calls.value
+
+    await middleware(AsyncMock(), MagicMock(), data)
+    with pytest.raises(RuntimeError):
+        await middleware(AsyncMock(side_effect=RuntimeError), MagicMock(), data)
+
+    assert calls.value == before + 2
+    rendered = registry.render()
+    labels = '{update_type="callback_query",handler="cb_sample"}'
+    assert f"bot_handler_errors_total{labels} 1" in rendered
+    assert f"bot_handler_duration_seconds_count{labels} 2" in rendered
+
+
+def test_throttled_messages_are_not_counted_as_handler_calls(monkeypatch):
+    """Throttling wraps the metrics middleware, so dropped messages never reach it."""
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    dp = Dispatcher()
+    register_middlewares(dp)
+
+    kinds = [type(middleware) for middleware in dp.message.middleware]
+    assert kinds.index(ThrottlingMiddleware) < kinds.index(MetricsMiddleware)
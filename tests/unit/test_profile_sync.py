@@ -0,0 +1,68 @@
+"""Unit tests for the write-behind ProfileSyncBuffer."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.database.profile_sync import ProfileSyncBuffer
+from bot.database.repository import UserRepository
+
+
+@pytest.fixture
+def session_factory(engine, create_db):
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_flush_inserts_and_updates_in_bulk(session_factory, make_tg_user):
+    """A flush upserts every pending user in one go; the latest change wins."""
+    buffer = ProfileSyncBuffer(session_factory)
+    buffer.add(make_tg_user(user_id=5001, username="first"))
+    buffer.add(make_tg_user(user_id=5002))
+    buffer.add(make_tg_user(user_id=5001, username="second"))
+
+    assert len(buffer) == 2
+    assert await buffer.flush() == 2
+    assert len(buffer) == 0
+
+    async with session_factory() as session:
+        user = await UserRepository(session).get_by_telegram_id(5001)
+    assert user is not None
+    assert user.username == "second"
+    assert user.is_active is True
+
+    buffer.add(make_tg_user(user_id=5001, username="third"))
+    await buffer.close()
+
+    async with session_factory() as session:
+        user = await UserRepository(session).get_by_telegram_id(5001)
+    assert user.username == "third"
+    assert buffer.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_buffered_defers_writes(session_factory, make_tg_user):
+    """With a buffer, get_or_create reads only and reports creation once."""
+    buffer = ProfileSyncBuffer(session_factory)
+    tg_user = make_tg_user(user_id=5101, username="newbie")
+
+    async with session_factory() as session:
+        repo = UserRepository(session, profile_sync=buffer)
+        user, created = await repo.get_or_create(tg_user)
+        assert created is True
+        assert user.full_name == "Test User"
+        _, created_again = await repo.get_or_create(tg_user)
+        assert created_again is False
+        assert await repo.get_by_telegram_id(5101) is None
+
+    await buffer.flush()
+
+    renamed = make_tg_user(user_id=5101, username="renamed")
+    async with session_factory() as session:
+        repo = UserRepository(session, profile_sync=buffer)
+        user, created = await repo.get_or_create(renamed)
+        assert created is False
+        assert user.username == "renamed"
+        assert not session.dirty
+    assert buffer.is_pending(5101)
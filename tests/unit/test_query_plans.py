@@ -0,0 +1,118 @@
+"""Query-plan regression tests for the hot user and session queries.
+
+The schema is built by the Alembic migrations, the queries are captured
+from the repository methods themselves, and each one is run through
+``EXPLAIN``. A plan that reads ``users`` or ``sessions`` with a full table
+scan fails the test.
+
+SQLite always runs. PostgreSQL runs when ``TEST_POSTGRES_URL`` points at a
+throw-away database (``postgresql+asyncpg://…``); sequential scans are
+disabled there so that an unusable index shows up even on tiny tables.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, async_sessionmaker, create_async_engine
+
+from bot.config import settings
+from bot.database.repository import SessionRepository, UserRepository
+
+HOT_TABLES = ("users", "sessions")
+MIGRATIONS = Path(__file__).resolve().parents[2] / "bot" / "database" / "migrations"
+
+
+def _alembic(url: str, monkeypatch: pytest.MonkeyPatch) -> Config:
+    monkeypatch.setattr(settings, "database_url", url)
+    config = Config()  # no ini file: leave the test run's logging alone
+    config.set_main_option("script_location", str(MIGRATIONS))
+    return config
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def migrated_url(request, tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    """URL of a database upgraded to ``head``."""
+    if request.param == "sqlite":
+        url = f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}"
+    else:
+        url = os.environ.get("TEST_POSTGRES_URL", "")
+        if not url:
+            pytest.skip("TEST_POSTGRES_URL is not set")
+    config = _alembic(url, monkeypatch)
+    command.upgrade(config, "head")
+    yield url
+    command.downgrade(config, "base")
+
+
+async def _capture_hot_queries(url: str, tg_user: Any) -> list[tuple[str, Any]]:
+    engine = create_async_engine(url)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        user = await UserRepository(session).create(tg_user)
+        await SessionRepository(session).create(user.id)
+        await session.commit()
+
+    captured: list[tuple[str, Any]] = []
+
+    def _record(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        captured.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    async with factory() as session:
+        sessions, users = SessionRepository(session), UserRepository(session)
+        await sessions.get_active(user.id)
+        await sessions.get_state_by_telegram_id(tg_user.id)
+        await sessions.bulk_touch({tg_user.id: user.created_at})
+        await users.count_active()
+        async for _ in users.stream_active(batch_size=10):
+            break
+        await session.rollback()
+    await engine.dispose()
+    return captured
+
+
+async def _full_scans(conn: AsyncConnection, statement: str, parameters: Any) -> list[str]:
+    if conn.dialect.name == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        details = [row[-1] for row in result]
+        pattern = re.compile(rf"^SCAN ({'|'.join(HOT_TABLES)})\b(?!.*USING .*INDEX)")
+        return [detail for detail in details if pattern.match(detail)]
+
+    await conn.exec_driver_sql("SET enable_seqscan = off")
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    nodes = [(json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]]
+    scans = []
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+async def test_hot_queries_use_indexes(migrated_url, make_tg_user):
+    """No hot repository query falls back to a full scan of users or sessions."""
+    queries = await _capture_hot_queries(migrated_url, make_tg_user(user_id=4242))
+    assert len(queries) == 5
+
+    engine = create_async_engine(migrated_url)
+    async with engine.connect() as conn:
+        failures = {
+            statement: scans
+            for statement, parameters in queries
+            if (scans := await _full_scans(conn, statement, parameters))
+        }
+    await engine.dispose()
+    assert not failures
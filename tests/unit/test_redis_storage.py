@@ -0,0 +1,90 @@
+"""Unit tests for the Redis FSM storage (against fakeredis)."""
+
+from __future__ import annotations
+
+import asyncio
+
+import fakeredis
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from bot.storage.redis_storage import RedisStorage, pack_data, unpack_data
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+def _count_round_trips(client) -> list[int]:
+    """Count commands and pipeline executions sent by *client*."""
+    trips = [0]
+    execute_command, pipeline = client.execute_command, client.pipeline
+
+    async def counted_command(*args, **kwargs):
+        trips[0] += 1
+        return await execute_command(*args, **kwargs)
+
+    def counted_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*a, **kw):
+            trips[0] += 1
+            return await execute(*a, **kw)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    client.execute_command, client.pipeline = counted_command, counted_pipeline
+    return trips
+
+
+@pytest.mark.asyncio
+async def test_one_round_trip_per_read_and_write_with_ttl():
+    """get_state fetches data too; writes pipeline HSET + EXPIRE; big data is compressed."""
+    client = fakeredis.FakeAsyncRedis()
+    storage = RedisStorage(client, ttl=600, compress_min=64)
+    trips = _count_round_trips(client)
+
+    await storage.set_state(KEY, "Form:name")
+    await storage.set_data(KEY, {"name": "Иван", "bio": "x" * 200})
+    assert trips[0] == 2
+    assert 0 < await client.ttl("fsm:1:1:default") <= 600
+    assert len(await client.hget("fsm:1:1:default", "d")) < 100
+
+    trips[0] = 0
+    assert await storage.get_state(KEY) == "Form:name"
+    data = await storage.update_data(KEY, {"age": 30})
+    assert data == {"name": "Иван", "bio": "x" * 200, "age": 30}
+    assert trips[0] == 2  # HMGET, then the pipelined write; get_data was served locally
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    assert not await client.exists("fsm:1:1:default")
+    assert unpack_data(pack_data({"a": 1})) == {"a": 1}
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_near_cache_is_invalidated_by_other_writers():
+    """Repeated reads skip Redis until another replica changes the conversation."""
+    server = fakeredis.FakeServer()
+    ours = RedisStorage(fakeredis.FakeAsyncRedis(server=server), near_cache=True)
+    theirs = RedisStorage(fakeredis.FakeAsyncRedis(server=server))
+    await theirs.set_state(KEY, "Form:a")
+
+    assert await ours.get_state(KEY) == "Form:a"  # starts the listener
+    for _ in range(50):
+        if ours._listening:
+            break
+        await asyncio.sleep(0.01)
+    assert await ours.get_state(KEY) == "Form:a"  # fetched after subscribing
+    assert await ours.get_state(KEY) == "Form:a"
+    assert ours.near_hits == 1
+
+    await theirs.set_state(KEY, "Form:b")
+    for _ in range(50):
+        if await ours.get_state(KEY) == "Form:b":
+            break
+        await asyncio.sleep(0.01)
+    assert await ours.get_state(KEY) == "Form:b"
+    await ours.close()
+    await theirs.close()
@@ -2,35 +2,22 @@
 
 from __future__ import annotations
 
+from datetime import datetime, timezone
+
 import pytest
-from unittest.mock import MagicMock
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 
-from bot.database.repository import UserRepository
+from bot.database import repository
+from bot.database.repository import UserRepository, _upsert_returning, profile_values
 from bot.database.models import UserRole
 
 
-def _make_tg_user(
-    user_id: int = 42,
-    username: str = "tester",
-    first_name: str = "Test",
-    last_name: str | None = "User",
-):
-    """Helper to build a minimal fake Telegram User."""
-    user = MagicMock()
-    user.id = user_id
-    user.username = username
-    user.first_name = first_name
-    user.last_name = last_name
-    user.language_code = "en"
-    user.is_bot = False
-    return user
-
-
 @pytest.mark.asyncio
-async def test_create_user(db_session):
+async def test_create_user(db_session, make_tg_user):
     """UserRepository.create() persists a new user."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=1001)
+    tg_user = make_tg_user(user_id=1001)
 
     user = await repo.create(tg_user)
     await db_session.flush()
@@ -42,10 +29,10 @@ async def test_create_user(db_session):
 
 
 @pytest.mark.asyncio
-async def test_get_by_telegram_id(db_session):
+async def test_get_by_telegram_id(db_session, make_tg_user):
     """get_by_telegram_id returns the correct user."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=1002)
+    tg_user = make_tg_user(user_id=1002)
     await repo.create(tg_user)
     await db_session.flush()
 
@@ -62,10 +49,10 @@ async def test_get_by_telegram_id_missing(db_session):
 
 
 @pytest.mark.asyncio
-async def test_get_or_create_new(db_session):
+async def test_get_or_create_new(db_session, make_tg_user):
     """get_or_create returns (user, True) for a new user."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=2001, username="newbie")
+    tg_user = make_tg_user(user_id=2001, username="newbie")
 
     user, created = await repo.get_or_create(tg_user)
     assert created is True
@@ -73,10 +60,10 @@ async def test_get_or_create_new(db_session):
 
 
 @pytest.mark.asyncio
-async def test_get_or_create_existing(db_session):
+async def test_get_or_create_existing(db_session, make_tg_user):
     """get_or_create returns (user, False) for an existing user."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=2002)
+    tg_user = make_tg_user(user_id=2002)
 
     await repo.create(tg_user)
     await db_session.flush()
@@ -86,20 +73,118 @@ async def test_get_or_create_existing(db_session):
 
 
 @pytest.mark.asyncio
-async def test_full_name_with_last_name(db_session):
+async def test_full_name_with_last_name(db_session, make_tg_user):
     """User.full_name includes last name when present."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=3001, first_name="Alice", last_name="Smith")
+    tg_user = make_tg_user(user_id=3001, first_name="Alice", last_name="Smith")
     user = await repo.create(tg_user)
     await db_session.flush()
     assert user.full_name == "Alice Smith"
 
 
 @pytest.mark.asyncio
-async def test_full_name_without_last_name(db_session):
+async def test_full_name_without_last_name(db_session, make_tg_user):
     """User.full_name is just first name when last_name is absent."""
     repo = UserRepository(db_session)
-    tg_user = _make_tg_user(user_id=3002, first_name="Bob", last_name=None)
+    tg_user = make_tg_user(user_id=3002, first_name="Bob", last_name=None)
     user = await repo.create(tg_user)
     await db_session.flush()
     assert user.full_name == "Bob"
+
+
+@pytest.mark.asyncio
+async def test_upsert_new_then_existing(db_session, make_tg_user):
+    """upsert inserts once, then reports existing users as not created."""
+    repo = UserRepository(db_session, upsert=True)
+    tg_user = make_tg_user(user_id=4001, username="upserted")
+
+    user, created = await repo.get_or_create(tg_user)
+    assert created is True
+    assert user.id is not None
+    assert user.username == "upserted"
+
+    again, created = await repo.get_or_create(tg_user)
+    assert created is False
+    assert again is user
+
+
+@pytest.mark.asyncio
+async def test_upsert_writes_only_changed_profiles(
+    db_session, make_tg_user, capture_statements
+):
+    """An unchanged profile leaves the row alone; a changed one is updated."""
+    repo = UserRepository(db_session, upsert=True)
+    await repo.upsert(make_tg_user(user_id=4002, username="before"))
+
+    with capture_statements(db_session.get_bind()) as statements:
+        _, created = await repo.upsert(make_tg_user(user_id=4002, username="before"))
+        assert (await db_session.execute(text("SELECT changes()"))).scalar_one() == 0
+        user, _ = await repo.upsert(make_tg_user(user_id=4002, username="after"))
+
+    assert created is False
+    assert user.username == "after"
+    assert statements.count("INSERT") == 2
+
+
+def test_upsert_is_a_single_statement_on_postgresql(make_tg_user):
+    """On PostgreSQL the upsert and the unchanged-row fallback share one statement."""
+    stmt = _upsert_returning("postgresql", make_tg_user(user_id=4003), datetime.now(timezone.utc))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH upserted AS")
+    assert "ON CONFLICT (telegram_id) DO UPDATE" in sql
+    assert "IS DISTINCT FROM" in sql
+    assert "UNION ALL" in sql
+
+
+@pytest.mark.asyncio
+async def test_stream_active_walks_pages_in_id_order(db_session, make_tg_user):
+    """stream_active yields active users only, across page boundaries."""
+    repo = UserRepository(db_session)
+    for telegram_id in range(4101, 4106):
+        await repo.create(make_tg_user(user_id=telegram_id))
+    await repo.deactivate(4103)
+    first = await repo.get_by_telegram_id(4101)
+
+    rows = [row async for row in repo.stream_active(batch_size=2, after_id=first.id - 1)]
+    mine = [row for row in rows if 4101 <= row.telegram_id <= 4105]
+
+    assert [row.telegram_id for row in mine] == [4101, 4102, 4104, 4105]
+    assert [row.id for row in rows] == sorted(row.id for row in rows)
+    assert mine[0].language_code == "en"
+
+
+@pytest.mark.asyncio
+async def test_active_page_returns_one_keyset_page(db_session, make_tg_user):
+    """active_page returns at most *limit* active users after *after_id*."""
+    repo = UserRepository(db_session)
+    for telegram_id in range(4201, 4205):
+        await repo.create(make_tg_user(user_id=telegram_id))
+    await repo.deactivate(4202)
+    first = await repo.get_by_telegram_id(4201)
+
+    page = await repo.active_page(after_id=first.id - 1, limit=2)
+    rest = await repo.active_page(after_id=page[-1].id, limit=10)
+
+    assert [row.telegram_id for row in page] == [4201, 4203]
+    assert rest[0].telegram_id == 4204
+
+
+@pytest.mark.asyncio
+async def test_upsert_falls_back_without_on_conflict(db_session, make_tg_user, monkeypatch):
+    """Dialects without ON CONFLICT (e.g. MySQL) use the ORM get-or-create path."""
+    monkeypatch.setattr(repository, "_UPSERT_INSERTS", {})
+    repo = UserRepository(db_session, upsert=True)
+
+    user, created = await repo.get_or_create(make_tg_user(user_id=4301, username="first"))
+    again, created_again = await repo.upsert(make_tg_user(user_id=4301, username="second"))
+    await repo.bulk_upsert(
+        [
+            profile_values(make_tg_user(user_id=4301, username="third")),
+            profile_values(make_tg_user(user_id=4302)),
+        ]
+    )
+
+    assert (created, created_again) == (True, False)
+    assert again is user
+    assert (await repo.get_by_telegram_id(4301)).username == "third"
+    assert await repo.get_by_telegram_id(4302) is not None
@@ -0,0 +1,105 @@
+"""Unit tests for the SQL-backed FSM storage."""
+
+from __future__ import annotations
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.config import BotMode, FsmStorage, settings
+from bot.database.repository import SessionRepository, UserRepository
+from bot.storage import create_storage
+from bot.storage.sql_storage import SQLStorage
+
+
+def _key(user_id: int, chat_id: int | None = None) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=chat_id or user_id, user_id=user_id)
+
+
+@pytest.fixture
+async def db(make_db, make_tg_user, capture_statements):
+    """A private database with users 8001 and 8002, plus a statement log."""
+    factory = await make_db()
+    async with factory() as session:
+        for telegram_id in (8001, 8002):
+            await UserRepository(session).create(make_tg_user(user_id=telegram_id))
+        await session.commit()
+
+    with capture_statements(factory.kw["bind"]) as statements:
+        yield factory, statements
+
+
+@pytest.mark.asyncio
+async def test_coalesces_writes_and_survives_restart(db):
+    """Several changes become one write per session; a new storage loads them lazily."""
+    factory, statements = db
+    storage = SQLStorage(factory, interval=60)
+
+    for step in ("a", "b", "c"):
+        await storage.set_state(_key(8001), f"Form:{step}")
+        await storage.update_data(_key(8001), {step: 1})
+    await storage.set_state(_key(8002), "Form:a")
+    assert await storage.get_data(_key(8001)) == {"a": 1, "b": 1, "c": 1}
+    assert statements.count("SELECT") == 2 and "UPDATE" not in statements
+
+    statements.clear()
+    assert await storage.flush() == 2
+    assert statements.count("INSERT") == 2  # both users get their first session
+    await storage.set_state(_key(8001), "Form:done")
+    await storage.set_state(_key(8002), None)
+    statements.clear()
+    await storage.close()
+    assert statements == ["UPDATE"]  # one executemany for both sessions
+
+    restarted = SQLStorage(factory)
+    assert await restarted.get_state(_key(8001)) == "Form:done"
+    assert await restarted.get_data(_key(8001)) == {"a": 1, "b": 1, "c": 1}
+    assert await restarted.get_state(_key(8002)) is None
+    assert restarted.loads == 2
+    async with factory() as session:
+        row = await SessionRepository(session).get_state_by_telegram_id(8001)
+    assert row.state == "Form:done"
+
+
+@pytest.mark.asyncio
+async def test_group_and_unregistered_keys_stay_in_memory(db):
+    """Group keys and users without a users row are served but not persisted."""
+    factory, statements = db
+    storage = SQLStorage(factory, interval=60, ttl=0)
+    group = _key(8001, chat_id=-100)
+    await storage.set_state(group, "Group:a")
+    await storage.set_state(_key(9999), "Form:a")
+    await storage.flush()
+
+    assert await storage.get_state(group) == "Group:a"
+    assert await storage.get_state(_key(8001)) is None
+    assert await storage.get_state(_key(9999)) == "Form:a"  # pinned despite ttl=0
+    await storage.close()
+    assert "UPDATE" not in statements and "INSERT" not in statements
+
+
+@pytest.mark.parametrize(
+    ("mode", "workers", "expected_ttl"),
+    [(BotMode.webhook, 4, 0.0), (BotMode.webhook, 1, 30.0), (BotMode.polling, 4, 30.0)],
+)
+def test_create_storage_disables_cache_with_several_workers(
+    monkeypatch: pytest.MonkeyPatch, mode: BotMode, workers: int, expected_ttl: float
+) -> None:
+    """Webhook workers share users, so each must read FSM state from the database."""
+    monkeypatch.setattr(settings, "fsm_storage", FsmStorage.database)
+    monkeypatch.setattr(settings, "fsm_cache_ttl", 30.0)
+    monkeypatch.setattr(settings, "bot_mode", mode)
+    monkeypatch.setattr(settings, "bot_workers", workers)
+
+    storage = create_storage()
+
+    assert isinstance(storage, SQLStorage)
+    assert storage._ttl == expected_ttl
+
+
+def test_auto_storage_without_redis_stays_in_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The database storage costs a query per uncached update, so it is opt-in."""
+    monkeypatch.setattr(settings, "fsm_storage", FsmStorage.auto)
+    monkeypatch.setattr(settings, "redis_url", None)
+
+    assert isinstance(create_storage(), MemoryStorage)
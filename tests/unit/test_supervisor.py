@@ -0,0 +1,60 @@
+"""Unit tests for the pre-fork worker supervisor."""
+
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+
+from bot.supervisor import WorkerSupervisor
+
+
+def _serve_forever() -> None:
+    time.sleep(60)
+
+
+def test_restarts_crashed_worker_and_stops_all():
+    """A killed worker is replaced; stop() terminates every worker."""
+    supervisor = WorkerSupervisor(_serve_forever, workers=2, restart_delay=0.05)
+    pids: list[int] = []
+
+    def crash_first() -> None:
+        os.kill(supervisor._slots[0].pid, signal.SIGKILL)
+
+    def stop() -> None:
+        pids.extend(p.pid for p in supervisor._slots if p is not None)
+        supervisor.stop()
+
+    threading.Timer(0.3, crash_first).start()
+    threading.Timer(1.5, stop).start()
+    supervisor.run()
+
+    assert supervisor.restarts == 1
+    assert len(pids) == 2
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            continue
+        raise AssertionError(f"worker {pid} is still running")
+
+
+def test_restarts_simultaneous_crashes_in_parallel():
+    """One worker's restart delay does not hold back another's restart."""
+    supervisor = WorkerSupervisor(_serve_forever, workers=2, restart_delay=0.5)
+    restarted: list[int] = []
+
+    def crash_all() -> None:
+        for process in supervisor._slots:
+            os.kill(process.pid, signal.SIGKILL)
+
+    def stop() -> None:
+        restarted.append(supervisor.restarts)
+        supervisor.stop()
+
+    threading.Timer(0.2, crash_all).start()
+    threading.Timer(1.0, stop).start()
+    supervisor.run()
+
+    assert restarted == [2]
@@ -0,0 +1,102 @@
+"""Unit tests for the throttling middleware and its backends."""
+
+from __future__ import annotations
+
+import gc
+import os
+import resource
+from unittest.mock import AsyncMock
+
+import pytest
+
+from bot.middlewares.throttling import (
+    MemoryThrottleBackend,
+    RedisThrottleBackend,
+    ThrottlingMiddleware,
+)
+
+
+@pytest.mark.asyncio
+async def test_middleware_drops_throttled_updates(make_message, tg_user):
+    """The second message inside the window is dropped with a notice."""
+    middleware = ThrottlingMiddleware(backend=MemoryThrottleBackend(rate=60))
+    handler = AsyncMock(return_value="handled")
+    first, second = make_message("one"), make_message("two")
+
+    assert await middleware(handler, first, {"event_from_user": tg_user}) == "handled"
+    assert await middleware(handler, second, {"event_from_user": tg_user}) is None
+
+    handler.assert_awaited_once()
+    second.answer.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_allows_after_rate():
+    """A zero rate never throttles; a long rate throttles the repeat."""
+    assert await MemoryThrottleBackend(rate=0).allow(1)
+    assert await MemoryThrottleBackend(rate=0).allow(1)
+
+    backend = MemoryThrottleBackend(rate=60)
+    assert await backend.allow(1)
+    assert not await backend.allow(1)
+    assert await backend.allow(2)
+
+
+@pytest.mark.asyncio
+async def test_redis_token_bucket():
+    """The Lua bucket allows *burst* requests, then throttles, per user."""
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+    backend = RedisThrottleBackend(redis, rate=60, burst=2)
+
+    assert [await backend.allow(1) for _ in range(3)] == [True, True, False]
+    assert await backend.allow(2)
+    assert await backend.allow_many([2, 3, 3]) == [True, True, True]
+    assert await backend.allow_many([3]) == [False]
+    assert 0 < await redis.pttl("throttle:1") <= 120_000
+
+    await backend.close()
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def test_memory_backend_expires_and_caps():
+    """Expired users are swept as traffic flows; the cap is never exceeded."""
+    backend = MemoryThrottleBackend(rate=1.0, max_entries=3)
+    for user_id in range(3):
+        assert backend.check(user_id, now=0.0)
+    assert not backend.check(0, now=0.5)
+
+    assert backend.check(3, now=0.6)  # over the cap: user 0 is evicted early
+    assert len(backend) == 3 and backend.evicted == 1
+
+    assert backend.check(4, now=5.0)  # everything older than 4.0 is swept
+    assert len(backend) == 1 and backend.expired == 3
+    assert backend.memory_usage() > 0
+
+
+def test_memory_backend_rss_stays_flat_for_10m_users():
+    """10M distinct users pass through without the process growing."""
+    backend = MemoryThrottleBackend(rate=0.5, max_entries=200_000)
+    check = backend.check
+    # 100k distinct users per simulated second; each window is half a second.
+    step = 1 / 100_000
+
+    for user_id in range(1_000_000):  # warm up to steady state
+        check(user_id, user_id * step)
+    gc.collect()
+    baseline = _rss_bytes()
+
+    for user_id in range(1_000_000, 10_000_000):
+        check(user_id, user_id * step)
+    gc.collect()
+
+    assert len(backend) <= 200_000
+    assert _rss_bytes() - baseline < 16 * 1024 * 1024
@@ -0,0 +1,174 @@
+"""Unit tests for the read-through UserCache."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from bot.database.cache import UserCache, UserSnapshot
+from bot.database.models import UserRole
+from bot.database.repository import UserRepository
+
+
+def _snapshot(telegram_id: int, user_id: int | None = None) -> UserSnapshot:
+    now = datetime(2024, 1, 1)
+    return UserSnapshot(
+        id=user_id or telegram_id,
+        telegram_id=telegram_id,
+        username=None,
+        first_name="Test",
+        last_name=None,
+        language_code="en",
+        is_bot=False,
+        is_active=True,
+        role=UserRole.user,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    """Least recently used entries are evicted first; stale entries reload."""
+    clock = _Clock()
+    cache = UserCache(maxsize=2, ttl=10, clock=clock)
+    cache.put(_snapshot(1))
+    cache.put(_snapshot(2))
+    assert cache.get(1) is not None  # 1 becomes most recently used
+    cache.put(_snapshot(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.evictions == 1
+
+    clock.now = 11
+    assert cache.get(1) is None
+    assert cache.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    """A burst of misses for one key triggers a single loader call."""
+    cache = UserCache()
+    calls = 0
+
+    async def loader() -> UserSnapshot:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return _snapshot(7, user_id=70)
+
+    results = await asyncio.gather(*(cache.get_or_load(7, loader) for _ in range(5)))
+    assert calls == 1
+    assert all(r == results[0] for r in results)
+
+    assert await cache.get_or_load_by_id(70, loader) == results[0]
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_first_loader_is_cancelled():
+    """Cancelling the task running a shared load does not cancel its waiters."""
+    cache = UserCache()
+    started = asyncio.Event()
+    calls = 0
+
+    async def loader() -> UserSnapshot:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.sleep(60)
+        return _snapshot(7, user_id=70)
+
+    first = asyncio.create_task(cache.get_or_load(7, loader))
+    await started.wait()
+    second = asyncio.create_task(cache.get_or_load(7, loader))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == _snapshot(7, user_id=70)
+    assert first.cancelled()
+    assert calls == 2
+    assert cache.get(7) == _snapshot(7, user_id=70)
+
+
+@pytest.mark.asyncio
+async def test_repository_writes_invalidate(db_session, make_tg_user):
+    """get_snapshot is served from cache until set_role drops the entry."""
+    cache = UserCache()
+    repo = UserRepository(db_session, cache=cache)
+    await repo.create(make_tg_user(user_id=6001))
+
+    first = await repo.get_snapshot(6001)
+    assert first is not None and first.role == UserRole.user
+    assert await repo.get_snapshot(6001) is first
+    assert await repo.get_snapshot_by_id(first.id) is first
+
+    await repo.set_role(6001, UserRole.admin)
+    db_session.expire_all()
+    updated = await repo.get_snapshot(6001)
+    assert updated.role == UserRole.admin
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 1)
+
+    with pytest.raises(AttributeError):
+        updated.role = UserRole.user  # type: ignore[misc]
+
+
+@pytest.fixture
+async def file_session_factory(make_db):
+    """Separate connections to one database, so sessions see only committed rows."""
+    return await make_db(file=True)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_repeated_after_commit(file_session_factory, make_tg_user):
+    """A pre-commit row cached by another session is dropped once the writer commits."""
+    cache = UserCache()
+    async with file_session_factory() as session:
+        await UserRepository(session).create(make_tg_user(user_id=6101))
+        await session.commit()
+
+    async with file_session_factory() as writer:
+        await UserRepository(writer, cache=cache).set_role(6101, UserRole.admin)
+        async with file_session_factory() as reader:
+            stale = await UserRepository(reader, cache=cache).get_snapshot(6101)
+        assert stale.role == UserRole.user and cache.get(6101) is stale
+        await writer.commit()
+
+    assert cache.get(6101) is None
+    async with file_session_factory() as reader:
+        fresh = await UserRepository(reader, cache=cache).get_snapshot(6101)
+    assert fresh.role == UserRole.admin
+
+
+@pytest.mark.asyncio
+async def test_unchanged_profile_keeps_cache_entry(file_session_factory, make_tg_user):
+    """get_or_create only invalidates when it actually wrote the row."""
+    cache = UserCache()
+    for upsert, name in ((False, "Test"), (True, "RenamedFalse")):
+        tg_user = make_tg_user(user_id=6102, first_name=name)
+        async with file_session_factory() as session:
+            repo = UserRepository(session, upsert=upsert, cache=cache)
+            await repo.get_or_create(tg_user)
+            await session.commit()
+            cached = await repo.get_snapshot(6102)
+            await repo.get_or_create(tg_user)
+            await session.commit()
+            assert cache.get(6102) is cached
+
+            renamed = make_tg_user(user_id=6102, first_name=f"Renamed{upsert}")
+            await repo.get_or_create(renamed)
+            await session.commit()
+            assert cache.get(6102) is None
@@ -0,0 +1,57 @@
+"""Unit tests for the queued webhook request handler."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import QueuedRequestHandler
+
+
+def _update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "hi",
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_acks_immediately_and_rejects_when_full():
+    """Requests return before handlers run; a full queue answers 503 + Retry-After."""
+    release = asyncio.Event()
+    handled: list[int] = []
+    dp = Dispatcher()
+
+    @dp.message()
+    async def slow(message) -> None:
+        await release.wait()
+        handled.append(message.message_id)
+
+    handler = QueuedRequestHandler(dp, Bot("42:TEST"), max_queue=1, workers=1, retry_after=3)
+    app = web.Application()
+    handler.register(app, path="/webhook")
+
+    async with TestClient(TestServer(app)) as client:
+        first = await client.post("/webhook", json=_update(1))
+        await asyncio.sleep(0.01)  # the worker picks up update 1 and blocks
+        second = await client.post("/webhook", json=_update(2))
+        third = await client.post("/webhook", json=_update(3))
+
+        assert (first.status, second.status, third.status) == (200, 200, 503)
+        assert third.headers["Retry-After"] == "3"
+        assert handler.queue_depth == 1 and handler.rejected == 1
+        assert handled == []
+
+        release.set()
+    # Closing the server drains the queue before stopping the workers.
+    assert handled == [1, 2]